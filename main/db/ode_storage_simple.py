@@ -1,24 +1,37 @@
 import json
 import os
 import threading
+import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable
 import numpy as np
 
+from .preview import build_preview_levels, envelope_buckets, select_preview, MIN_PREVIEW_POINTS, PREVIEW_LEVELS
+from .retention import RetentionPolicy
+from .similarity import SimilarityIndex, compute_signature
+from .storage_policy import StoragePolicy, compute_digest, verify_digest
+
 
 class ODEStorage:
     """ПРОСТОЙ и РАБОЧИЙ ODEStorage с гарантированной записью"""
 
-    def __init__(self, db_path: str = "data/simulations.json"):
+    def __init__(self, db_path: str = "data/simulations.json", policy: Optional[StoragePolicy] = None,
+                 read_only: bool = False):
         """
         Инициализация хранилища
 
         Args:
             db_path: путь к JSON файлу
+            policy: политика хранения траекторий (по умолчанию хранить все)
+            read_only: только чтение - файл никогда не перезаписывается
+                (снимок в памяти может устареть, пока другой процесс пишет)
         """
         print(f"🚀 Инициализация ODEStorage: {db_path}")
 
         self.db_path = db_path
+        self.read_only = read_only
+        self.policy = policy or StoragePolicy('full')
+        self._resolver: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
         self._lock = threading.Lock()
 
         # Создаем директорию если нужно
@@ -27,6 +40,9 @@ class ODEStorage:
         # Загружаем существующие данные или создаем новые
         self._data = self._load_data()
 
+        # Индексы: ID -> запись и сигнатуры для поиска похожих траекторий
+        self._rebuild_indexes()
+
         print(f"✅ ODEStorage готов. Записей: {len(self._data.get('simulations', []))}")
 
     def _load_data(self) -> Dict[str, Any]:
@@ -49,8 +65,42 @@ class ODEStorage:
             }
         }
 
+    def _rebuild_indexes(self) -> int:
+        """
+        Построить индексы (старые записи получают сигнатуру и превью здесь)
+
+        Returns:
+            Количество дополненных записей
+        """
+        sims = self._data.get('simulations', [])
+        self._by_id = {sim.get('id'): sim for sim in sims}
+        self._similarity = SimilarityIndex(capacity=max(1024, len(sims)))
+
+        migrated = 0
+        for sim in sims:
+            updated = False
+            signature = sim.get('signature')
+            if 'signature' not in sim:
+                signature = compute_signature(sim.get('results', {}).get('y_values', []))
+                sim['signature'] = signature
+                updated = True
+            if signature is not None:
+                self._similarity.add(sim['id'], signature)
+
+            if 'previews' not in sim:
+                results = sim.get('results', {})
+                sim['previews'] = build_preview_levels(results.get('t_values', []),
+                                                       results.get('y_values', []))
+                updated = True
+            migrated += updated
+
+        return migrated
+
     def _save_data(self) -> bool:
         """ГАРАНТИРОВАННОЕ сохранение на диск"""
+        if self.read_only:
+            print("⚠️ Хранилище открыто только для чтения, изменения не сохраняются")
+            return False
         try:
             # 1. Создаем временный файл
             temp_path = self.db_path + '.tmp'
@@ -96,6 +146,12 @@ class ODEStorage:
         Returns:
             ID сохраненной симуляции
         """
+        # Solution (logic.solution) хранится в JSON как словарь списков;
+        # узлы плотного решения (из экспорта прежних версий) не хранятся
+        if hasattr(results, 'to_dict'):
+            results = results.to_dict()
+        results = {key: value for key, value in results.items() if key != 'dense'}
+
         with self._lock:
             print(f"\n💾 НАЧИНАЕМ СОХРАНЕНИЕ...")
             print(f"   Тип: {equation_type}")
@@ -114,6 +170,29 @@ class ODEStorage:
                 # Рассчитываем статистику
                 stats = self._calculate_stats(results)
 
+                # Сигнатура для поиска похожих траекторий
+                signature = compute_signature(results.get('y_values', []))
+
+                # Дешевые детерминированные решения храним как рецепт + дайджест
+                recipe_only = not self.policy.store_trajectory(results)
+
+                # Пирамида превью (огибающие min/max) для миниатюр и наложений;
+                # у рецепта - только самый грубый уровень, остальное пересчитывается
+                previews = build_preview_levels(results.get('t_values', []),
+                                                results.get('y_values', []),
+                                                PREVIEW_LEVELS[:1] if recipe_only else PREVIEW_LEVELS)
+
+                stored_results = results
+                digest = None
+                if recipe_only:
+                    digest = compute_digest(results)
+                    stored_results = {
+                        'success': True,
+                        'equation': results.get('equation'),
+                        'recipe': results['recipe'],
+                        'recipe_only': True
+                    }
+
                 # Создаем запись симуляции
                 simulation = {
                     'id': sim_id,
@@ -132,9 +211,13 @@ class ODEStorage:
                         'tags': tags or [],
                         'description': description
                     },
-                    'results': results,
+                    'results': stored_results,
+                    'signature': signature,
+                    'previews': previews,
                     'saved_at': datetime.now().isoformat()
                 }
+                if digest is not None:
+                    simulation['digest'] = digest
 
                 # Добавляем симуляцию
                 if 'simulations' not in self._data:
@@ -156,6 +239,10 @@ class ODEStorage:
                 if self._save_data():
                     print(f"✅ УСПЕХ! Симуляция сохранена. ID: {sim_id}")
 
+                    self._by_id[sim_id] = simulation
+                    if signature is not None:
+                        self._similarity.add(sim_id, signature)
+
                     # Дополнительная проверка
                     check_data = self._load_data()
                     check_count = len(check_data.get('simulations', []))
@@ -184,7 +271,7 @@ class ODEStorage:
         }
 
         y_values = results.get('y_values', [])
-        if y_values and len(y_values) > 0:
+        if len(y_values) > 0:
             try:
                 y_array = np.array(y_values, dtype=np.float32)
                 stats.update({
@@ -198,19 +285,112 @@ class ODEStorage:
 
         return stats
 
+    def set_resolver(self, resolver: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]):
+        """
+        Задать функцию пересчета решения по рецепту
+
+        Args:
+            resolver: recipe -> results (словарь в формате решателя)
+        """
+        self._resolver = resolver
+
     def get_simulation(self, simulation_id: str) -> Optional[Dict[str, Any]]:
         """Получить симуляцию по ID"""
         with self._lock:
             try:
-                sim_id = int(simulation_id)
-                for sim in self._data.get('simulations', []):
-                    if sim.get('id') == sim_id:
-                        return sim
+                sim = self._by_id.get(int(simulation_id))
             except (ValueError, TypeError):
-                pass
+                return None
+
+        if sim and sim.get('results', {}).get('recipe_only'):
+            return self._materialize(sim)
+
+        return sim
+
+    def _materialize(self, sim: Dict[str, Any]) -> Dict[str, Any]:
+        """Пересчитать траекторию симуляции, сохраненной как рецепт"""
+        recipe = sim['results'].get('recipe', {})
 
+        if self._resolver is None:
+            results = {'success': False, 'error': 'Решатель для пересчета не подключен'}
+        else:
+            try:
+                results = self._resolver(recipe)
+            except Exception as e:
+                results = {'success': False, 'error': f'Ошибка пересчета: {e}'}
+
+            if results.get('success'):
+                mismatch = verify_digest(sim.get('digest', {}), results)
+                if mismatch:
+                    print(f"⚠️ Пересчет симуляции {sim.get('id')} не совпал с дайджестом: {mismatch}")
+                    results = {'success': False, 'error': f'Пересчитанное решение не совпало: {mismatch}'}
+
+        materialized = dict(sim)
+        materialized['results'] = results
+        return materialized
+
+    def load_preview(self, simulation_id: str, max_points: int = 256) -> Optional[Dict[str, Any]]:
+        """
+        Превью траектории не длиннее max_points корзин
+
+        Returns:
+            {'id', 'points', 't', 'y_min', 'y_max', 'exact'}; для коротких
+            траекторий отдаются сами данные (y_min == y_max, exact=True).
+            Точек никогда не больше max_points.
+
+        Raises:
+            ValueError: max_points меньше двух
+        """
+        if max_points < MIN_PREVIEW_POINTS:
+            raise ValueError(f"Превью должно содержать не меньше {MIN_PREVIEW_POINTS} точек: {max_points}")
+
+        with self._lock:
+            try:
+                sim = self._by_id.get(int(simulation_id))
+            except (ValueError, TypeError):
+                return None
+        if not sim:
             return None
 
+        # Превью хранится и у рецептов, пересчет нужен только без него
+        preview = select_preview(sim.get('previews', {}), max_points)
+        if preview is not None:
+            return {
+                'id': sim['id'],
+                'points': len(preview['t']),
+                't': preview['t'],
+                'y_min': preview['y_min'],
+                'y_max': preview['y_max'],
+                'exact': False
+            }
+
+        # Уровней нет: траектория слишком коротка даже для самого грубого уровня
+        if sim.get('results', {}).get('recipe_only'):
+            sim = self._materialize(sim)
+        results = sim.get('results', {})
+        y_values = results.get('y_values', [])
+        t_values = results.get('t_values', [])
+        if len(y_values) > max_points:
+            envelope = envelope_buckets(t_values, y_values, max_points)
+            return {'id': sim['id'], 'points': len(envelope['t']), **envelope, 'exact': False}
+        return {
+            'id': sim['id'],
+            'points': len(y_values),
+            't': t_values,
+            'y_min': y_values,
+            'y_max': y_values,
+            'exact': True
+        }
+
+    def load_previews(self, simulation_ids: List[str], max_points: int = 256) -> List[Dict[str, Any]]:
+        """Превью нескольких симуляций (отсутствующие ID пропускаются)"""
+        previews = []
+        for simulation_id in simulation_ids:
+            preview = self.load_preview(simulation_id, max_points)
+            if preview is not None:
+                previews.append(preview)
+        return previews
+
     def list_simulations(self,
                          limit: int = 50,
                          sort_by: str = 'created_at',
@@ -295,34 +475,135 @@ class ODEStorage:
 
     def delete_simulation(self, simulation_id: str) -> bool:
         """Удалить симуляцию"""
+        return self.delete_simulations([simulation_id]) > 0
+
+    def delete_simulations(self, simulation_ids: List[str]) -> int:
+        """
+        Удалить несколько симуляций одной перезаписью файла
+
+        Returns:
+            Количество удаленных симуляций
+        """
         with self._lock:
             try:
-                sim_id = int(simulation_id)
-                original_count = len(self._data.get('simulations', []))
+                ids = {int(sim_id) for sim_id in simulation_ids} & set(self._by_id)
+                if not ids:
+                    return 0
+
+                if self._remove_locked(ids) and self._save_data():
+                    print(f"🗑️ Удалено симуляций: {len(ids)}")
+                    return len(ids)
 
-                # Фильтруем симуляции
-                self._data['simulations'] = [
-                    sim for sim in self._data.get('simulations', [])
-                    if sim.get('id') != sim_id
-                ]
+                # Откатываем изменения в памяти
+                self._data = self._load_data()
+                self._rebuild_indexes()
+                return 0
 
-                new_count = len(self._data['simulations'])
+            except Exception as e:
+                print(f"Ошибка удаления: {e}")
+                return 0
 
-                if new_count < original_count:
-                    # Обновляем метаданные
-                    self._data['metadata']['total_simulations'] = new_count
-                    self._data['metadata']['updated_at'] = datetime.now().isoformat()
+    def _remove_locked(self, ids) -> bool:
+        """Убрать симуляции из памяти (вызывается под блокировкой)"""
+        original_count = len(self._data.get('simulations', []))
 
-                    # Сохраняем изменения
-                    if self._save_data():
-                        print(f"🗑️ Симуляция {sim_id} удалена")
-                        return True
+        self._data['simulations'] = [
+            sim for sim in self._data.get('simulations', [])
+            if sim.get('id') not in ids
+        ]
+        new_count = len(self._data['simulations'])
 
-                return False
+        for sim_id in ids:
+            self._by_id.pop(sim_id, None)
+            self._similarity.remove(sim_id)
 
-            except Exception as e:
-                print(f"Ошибка удаления: {e}")
-                return False
+        # Обновляем метаданные
+        self._data['metadata']['total_simulations'] = new_count
+        self._data['metadata']['updated_at'] = datetime.now().isoformat()
+
+        return new_count < original_count
+
+    def compact(self, policy: Optional[RetentionPolicy] = None) -> Dict[str, Any]:
+        """
+        Применить правила хранения и уплотнить хранилище
+
+        Удаляет симуляции, нарушающие policy, перестраивает индексы
+        и перезаписывает файл. Если ничего не удалено и не дополнено,
+        файл не перезаписывается.
+
+        Returns:
+            Отчет: сколько удалено, сколько байт освобождено и был ли записан файл
+        """
+        started = time.perf_counter()
+        bytes_before = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+
+        with self._lock:
+            expired = policy.select_expired(self._data.get('simulations', [])) if policy else set()
+            if expired:
+                self._remove_locked(expired)
+            migrated = self._rebuild_indexes()
+            written = bool(expired or migrated)
+            saved = self._save_data() if written else True
+
+        bytes_after = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+
+        report = {
+            'success': saved,
+            'written': written,
+            'removed': len(expired),
+            'removed_ids': sorted(expired),
+            'remaining': len(self._data.get('simulations', [])),
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_freed': bytes_before - bytes_after,
+            'duration': time.perf_counter() - started
+        }
+
+        print(f"🧹 Уплотнение: удалено {report['removed']}, "
+              f"освобождено {self._format_file_size(max(report['bytes_freed'], 0))}")
+        return report
+
+    def find_similar(self, simulation_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Найти симуляции с похожей динамикой
+
+        Args:
+            simulation_id: ID симуляции-образца
+            k: количество соседей
+
+        Returns:
+            Список метаданных соседей с полем 'distance' (по возрастанию)
+        """
+        try:
+            sim_id = int(simulation_id)
+        except (ValueError, TypeError):
+            return []
+
+        # Индекс меняют сохранение, удаление и фоновое уплотнение
+        with self._lock:
+            signature = self._similarity.get(sim_id)
+            if signature is None:
+                return []
+
+            neighbours = self._similarity.query(signature, k=k, exclude_id=sim_id)
+            sims = [(item, self._by_id.get(item['id'])) for item in neighbours]
+
+        results = []
+        for item, sim in sims:
+            if not sim:
+                continue
+            metadata = sim.get('metadata', {})
+            results.append({
+                'id': metadata.get('id'),
+                'name': metadata.get('name'),
+                'equation_type': metadata.get('equation_type'),
+                'created_at': metadata.get('created_at'),
+                'amplitude': metadata.get('amplitude'),
+                'tags': metadata.get('tags', []),
+                'distance': item['distance']
+            })
+
+        return results
 
     def get_statistics(self) -> Dict[str, Any]:
         """Получить статистику хранилища"""
@@ -330,6 +611,8 @@ class ODEStorage:
             import os
 
             total = len(self._data.get('simulations', []))
+            recipe_only = sum(1 for sim in self._data.get('simulations', [])
+                              if sim.get('results', {}).get('recipe_only'))
             file_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
 
             # Статистика по типам уравнений
@@ -349,6 +632,7 @@ class ODEStorage:
 
             return {
                 'total_simulations': total,
+                'recipe_only_simulations': recipe_only,
                 'last_id': self._data.get('metadata', {}).get('last_id', 0),
                 'db_path': self.db_path,
                 'file_exists': os.path.exists(self.db_path),
@@ -432,8 +716,9 @@ class ODEStorage:
 
     def close(self):
         """Закрыть хранилище"""
-        # Сохраняем данные перед закрытием
-        self._save_data()
+        # Сохраняем данные перед закрытием (кроме режима только для чтения)
+        if not self.read_only:
+            self._save_data()
         print("🔒 ODEStorage закрыт")
 
     def __enter__(self):
@@ -0,0 +1,122 @@
+# main/db/preview.py
+import base64
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Уровни пирамиды превью (количество корзин огибающей)
+PREVIEW_LEVELS = (256, 2048, 16384)
+# Уровень строится, только если в корзину попадает не меньше этого числа точек:
+# иначе огибающая почти не меньше самих данных
+MIN_BUCKET_SIZE = 4
+# Меньше двух точек превью не бывает (нужен хотя бы отрезок)
+MIN_PREVIEW_POINTS = 2
+
+
+def envelope_buckets(t_values: Sequence[float],
+                     y_values: Sequence[float],
+                     buckets: int) -> Dict[str, List[float]]:
+    """
+    Огибающая min/max по корзинам одинаковой длины
+
+    Returns:
+        {'t': [...], 'y_min': [...], 'y_max': [...]} длины buckets
+    """
+    t = np.asarray(t_values, dtype=np.float64)
+    y = np.asarray(y_values, dtype=np.float64)
+    n = len(y)
+
+    # Границы корзин строго возрастают, так как n > buckets
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+    y_min = np.minimum.reduceat(y, edges)
+    y_max = np.maximum.reduceat(y, edges)
+    t_start = t[edges]
+
+    return {
+        't': t_start.tolist(),
+        'y_min': y_min.tolist(),
+        'y_max': y_max.tolist()
+    }
+
+
+def pack_values(values: Sequence[float]) -> str:
+    """Массив в base64 от float32 (так уровни превью занимают в JSON вчетверо меньше)"""
+    return base64.b64encode(np.asarray(values, dtype=np.float32).tobytes()).decode('ascii')
+
+
+def unpack_values(values: Union[str, Sequence[float]]) -> np.ndarray:
+    """Массив из pack_values (списки записей прежнего вида - как есть)"""
+    if isinstance(values, str):
+        return np.frombuffer(base64.b64decode(values), dtype=np.float32).astype(np.float64)
+    return np.asarray(values, dtype=np.float64)
+
+
+def build_preview_levels(t_values: Sequence[float],
+                         y_values: Sequence[float],
+                         levels: Sequence[int] = PREVIEW_LEVELS) -> Dict[str, Dict[str, Any]]:
+    """
+    Пирамида превью траектории
+
+    Строятся только уровни не длиннее n / MIN_BUCKET_SIZE: более
+    подробные огибающие сопоставимы с самими данными, и такие превью
+    отдаются из results. Массивы уровней упакованы (pack_values).
+    """
+    n = min(len(t_values), len(y_values))
+    if n < 2:
+        return {}
+
+    t = np.asarray(t_values[:n], dtype=np.float64)
+    y = np.asarray(y_values[:n], dtype=np.float64)
+
+    pyramid = {}
+    for level in sorted(levels):
+        if level * MIN_BUCKET_SIZE > n:
+            break
+        bucket = envelope_buckets(t, y, level)
+        pyramid[str(level)] = {key: pack_values(bucket[key]) for key in ('t', 'y_min', 'y_max')}
+        pyramid[str(level)]['points'] = level
+
+    return pyramid
+
+
+def _level_points(level: Dict[str, Any]) -> int:
+    """Число корзин уровня (у упакованных - из 'points', у списков - длина)"""
+    if isinstance(level['t'], str):
+        return int(level['points'])
+    return len(level['t'])
+
+
+def shrink_envelope(preview: Dict[str, Any], buckets: int) -> Dict[str, Any]:
+    """Огибающая, сжатая до buckets корзин (соседние корзины объединяются)"""
+    t = unpack_values(preview['t'])
+    y_min = unpack_values(preview['y_min'])
+    y_max = unpack_values(preview['y_max'])
+    n = len(t)
+    if n <= buckets:
+        return {'t': t.tolist(), 'y_min': y_min.tolist(), 'y_max': y_max.tolist(), 'points': n}
+
+    edges = np.linspace(0, n, max(buckets, 1) + 1).astype(np.int64)[:-1]
+    return {
+        't': t[edges].tolist(),
+        'y_min': np.minimum.reduceat(y_min, edges).tolist(),
+        'y_max': np.maximum.reduceat(y_max, edges).tolist(),
+        'points': len(edges)
+    }
+
+
+def select_preview(pyramid: Dict[str, Dict[str, Any]],
+                   max_points: int) -> Optional[Dict[str, Any]]:
+    """
+    Самый подробный уровень, укладывающийся в max_points
+
+    Уровни сравниваются по фактическому числу корзин; если все длиннее,
+    самый грубый сжимается до max_points. Массивы отдаются списками.
+    """
+    if max_points < MIN_PREVIEW_POINTS:
+        raise ValueError(f"Превью должно содержать не меньше {MIN_PREVIEW_POINTS} точек: {max_points}")
+    if not pyramid:
+        return None
+
+    levels = sorted(pyramid.values(), key=_level_points)
+    fitting = [level for level in levels if _level_points(level) <= max_points]
+    return shrink_envelope(fitting[-1] if fitting else levels[0], max_points)
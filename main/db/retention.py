@@ -0,0 +1,139 @@
+# main/db/retention.py
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable, Set
+
+
+class RetentionPolicy:
+    """
+    Правила хранения симуляций
+
+    Все ограничения необязательные; при превышении удаляются самые старые записи.
+
+    Args:
+        max_count: максимальное число симуляций в хранилище
+        max_age_days: максимальный возраст симуляции в днях
+        tag_quotas: {тег: сколько последних симуляций с этим тегом оставить}
+        type_quotas: {тип уравнения: сколько последних симуляций оставить}
+    """
+
+    def __init__(self,
+                 max_count: Optional[int] = None,
+                 max_age_days: Optional[float] = None,
+                 tag_quotas: Optional[Dict[str, int]] = None,
+                 type_quotas: Optional[Dict[str, int]] = None):
+        self.max_count = max_count
+        self.max_age_days = max_age_days
+        self.tag_quotas = tag_quotas or {}
+        self.type_quotas = type_quotas or {}
+
+    def select_expired(self,
+                       simulations: List[Dict[str, Any]],
+                       now: Optional[datetime] = None) -> Set[int]:
+        """ID симуляций, нарушающих правила хранения"""
+        now = now or datetime.now()
+        expired = set()
+
+        # От новых к старым: квоты оставляют первые N
+        ordered = sorted(simulations,
+                         key=lambda sim: (sim.get('metadata', {}).get('created_at', ''), sim.get('id', 0)),
+                         reverse=True)
+
+        if self.max_age_days is not None:
+            cutoff = (now - timedelta(days=self.max_age_days)).isoformat()
+            for sim in ordered:
+                if sim.get('metadata', {}).get('created_at', '') < cutoff:
+                    expired.add(sim['id'])
+
+        type_seen: Dict[str, int] = {}
+        tag_seen: Dict[str, int] = {}
+        for sim in ordered:
+            if sim['id'] in expired:
+                continue
+            metadata = sim.get('metadata', {})
+
+            eq_type = metadata.get('equation_type')
+            if eq_type in self.type_quotas:
+                type_seen[eq_type] = type_seen.get(eq_type, 0) + 1
+                if type_seen[eq_type] > self.type_quotas[eq_type]:
+                    expired.add(sim['id'])
+                    continue
+
+            for tag in metadata.get('tags', []):
+                if tag in self.tag_quotas:
+                    tag_seen[tag] = tag_seen.get(tag, 0) + 1
+                    if tag_seen[tag] > self.tag_quotas[tag]:
+                        expired.add(sim['id'])
+                        break
+
+        if self.max_count is not None:
+            survivors = [sim for sim in ordered if sim['id'] not in expired]
+            for sim in survivors[self.max_count:]:
+                expired.add(sim['id'])
+
+        return expired
+
+
+class CompactionJob:
+    """
+    Фоновое применение правил хранения и уплотнение хранилища
+
+    Args:
+        storage: объект ODEStorage
+        policy: правила хранения
+        interval: период запуска в секундах
+        initial_delay: задержка перед первым запуском
+        on_report: функция, получающая отчет каждого прохода
+    """
+
+    def __init__(self,
+                 storage,
+                 policy: RetentionPolicy,
+                 interval: float = 3600.0,
+                 initial_delay: float = 30.0,
+                 on_report: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.storage = storage
+        self.policy = policy
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.on_report = on_report
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Запустить фоновый поток"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-compaction", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Остановить фоновый поток"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """Один проход уплотнения"""
+        report = self.storage.compact(self.policy)
+        self.last_report = report
+        if self.on_report:
+            try:
+                self.on_report(report)
+            except Exception as e:
+                print(f"⚠️ Ошибка обработчика отчета уплотнения: {e}")
+        return report
+
+    def _run(self):
+        if self._stop.wait(self.initial_delay):
+            return
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Ошибка фонового уплотнения: {e}")
+            if self._stop.wait(self.interval):
+                return
@@ -0,0 +1,180 @@
+# main/db/similarity.py
+import threading
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+# Размеры частей сигнатуры
+WAVEFORM_POINTS = 64
+SPECTRUM_BINS = 32
+SIGNATURE_SIZE = WAVEFORM_POINTS + SPECTRUM_BINS + 2
+
+# Веса частей сигнатуры при сравнении
+WAVEFORM_WEIGHT = 1.0
+SPECTRUM_WEIGHT = 1.0
+SCALE_WEIGHT = 0.5
+
+
+def compute_signature(y_values: Sequence[float]) -> Optional[List[float]]:
+    """
+    Сигнатура траектории фиксированной длины
+
+    Состоит из нормированной формы волны (WAVEFORM_POINTS точек),
+    нормированного амплитудного спектра (SPECTRUM_BINS бинов)
+    и двух масштабных признаков (log-амплитуда и среднее).
+
+    Returns:
+        Список из SIGNATURE_SIZE чисел или None, если данных недостаточно
+    """
+    try:
+        y = np.asarray(y_values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+
+    y = y[np.isfinite(y)] if y.ndim == 1 else None
+    if y is None or len(y) < 2:
+        return None
+
+    # 1. Форма волны: передискретизация на фиксированную сетку + z-нормировка
+    grid = np.linspace(0, len(y) - 1, WAVEFORM_POINTS)
+    waveform = np.interp(grid, np.arange(len(y)), y)
+    mean = float(np.mean(y))
+    std = float(np.std(y))
+    if std > 0:
+        waveform = (waveform - mean) / std
+    else:
+        waveform = np.zeros(WAVEFORM_POINTS)
+    waveform /= np.sqrt(WAVEFORM_POINTS)
+
+    # 2. Спектр: модуль rfft без постоянной составляющей, приведенный к SPECTRUM_BINS
+    spectrum = np.abs(np.fft.rfft(y - mean))[1:]
+    if len(spectrum) >= SPECTRUM_BINS:
+        edges = np.linspace(0, len(spectrum), SPECTRUM_BINS + 1).astype(int)
+        spectrum = np.add.reduceat(spectrum, edges[:-1])
+    else:
+        spectrum = np.pad(spectrum, (0, SPECTRUM_BINS - len(spectrum)))
+    norm = np.linalg.norm(spectrum)
+    if norm > 0:
+        spectrum = spectrum / norm
+
+    # 3. Масштаб: размах и смещение, чтобы отличать одинаковые формы разного размера
+    scale = np.array([np.log1p((np.max(y) - np.min(y)) / 2), np.arcsinh(mean)])
+
+    signature = np.concatenate([
+        WAVEFORM_WEIGHT * waveform,
+        SPECTRUM_WEIGHT * spectrum,
+        SCALE_WEIGHT * scale
+    ])
+    return [float(v) for v in signature]
+
+
+class SimilarityIndex:
+    """
+    Индекс ближайших соседей по сигнатурам траекторий
+
+    Полный перебор матричными операциями NumPy: сигнатуры лежат
+    в непрерывной матрице float32, расстояния до запроса считаются
+    одним умножением матрицы на вектор.
+    """
+
+    def __init__(self, dim: int = SIGNATURE_SIZE, capacity: int = 1024):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._norms = np.zeros(capacity, dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, sim_id):
+        return int(sim_id) in self._rows
+
+    def _grow(self):
+        """Удвоение емкости буферов"""
+        capacity = max(1, len(self._ids)) * 2
+        self._matrix = np.resize(self._matrix, (capacity, self.dim))
+        self._norms = np.resize(self._norms, capacity)
+        self._ids = np.resize(self._ids, capacity)
+
+    def add(self, sim_id: int, signature: Sequence[float]) -> bool:
+        """Добавить (или заменить) сигнатуру симуляции"""
+        vector = np.asarray(signature, dtype=np.float32)
+        if vector.shape != (self.dim,):
+            return False
+
+        sim_id = int(sim_id)
+        with self._lock:
+            row = self._rows.get(sim_id)
+            if row is None:
+                if self._size == len(self._ids):
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._rows[sim_id] = row
+                self._ids[row] = sim_id
+
+            self._matrix[row] = vector
+            self._norms[row] = float(np.dot(vector, vector))
+        return True
+
+    def remove(self, sim_id: int) -> bool:
+        """Удалить сигнатуру (последняя строка переносится на место удаленной)"""
+        sim_id = int(sim_id)
+        with self._lock:
+            row = self._rows.pop(sim_id, None)
+            if row is None:
+                return False
+
+            last = self._size - 1
+            if row != last:
+                moved_id = int(self._ids[last])
+                self._matrix[row] = self._matrix[last]
+                self._norms[row] = self._norms[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._size = last
+        return True
+
+    def get(self, sim_id: int) -> Optional[np.ndarray]:
+        """Сигнатура симуляции из индекса"""
+        with self._lock:
+            row = self._rows.get(int(sim_id))
+            return None if row is None else self._matrix[row].copy()
+
+    def query(self,
+              signature: Sequence[float],
+              k: int = 10,
+              exclude_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        k ближайших соседей по евклидову расстоянию
+
+        Returns:
+            Список {'id', 'distance'} по возрастанию расстояния
+        """
+        q = np.asarray(signature, dtype=np.float32)
+        if q.shape != (self.dim,) or k <= 0:
+            return []
+
+        with self._lock:
+            n = self._size
+            if n == 0:
+                return []
+
+            # ||x - q||² = ||x||² - 2x·q + ||q||²
+            dist = self._norms[:n] - 2.0 * (self._matrix[:n] @ q) + float(np.dot(q, q))
+            ids = self._ids[:n]
+
+            if exclude_id is not None:
+                excluded = self._rows.get(int(exclude_id))
+                if excluded is not None:
+                    dist[excluded] = np.inf
+
+            k = min(k, n)
+            nearest = np.argpartition(dist, k - 1)[:k]
+            nearest = nearest[np.argsort(dist[nearest], kind='stable')]
+
+            return [{'id': int(ids[i]), 'distance': float(np.sqrt(max(dist[i], 0.0)))}
+                    for i in nearest if np.isfinite(dist[i])]
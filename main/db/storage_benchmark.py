@@ -0,0 +1,308 @@
+# main/db/storage_benchmark.py
+"""
+Бенчмарк ODEStorage на реалистичных объемах истории
+
+Запуск:
+    python -m main.db.storage_benchmark --sizes 1000 10000 100000
+    python -m main.db.storage_benchmark --sizes 1000 --save-baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Optional
+
+import numpy as np
+
+from .ode_storage_simple import ODEStorage
+from .preview import build_preview_levels
+from .similarity import compute_signature
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# Длинные траектории (с пирамидой превью) и короткие (по умолчанию в GUI: 0..20 с шагом 0.1).
+# Длинной делается каждая LONG_EVERY-я запись, но всего не больше MAX_LONG_RECORDS:
+# иначе история в 100000 записей заняла бы десятки гигабайт
+DEFAULT_POINTS = 20000
+SHORT_POINTS = 201
+LONG_EVERY = 10
+MAX_LONG_RECORDS = 100
+# Повторов операций чтения: не меньше MIN_P99_SAMPLES, чтобы у них был p99
+DEFAULT_REPEAT = 100
+DEFAULT_BASELINE = str(Path(__file__).parent.parent / "data" / "benchmarks" / "storage_baseline.json")
+
+# Во сколько раз p50 может вырасти относительно базовой линии
+REGRESSION_FACTOR = 1.5
+# Прирост меньше этого порога считается шумом измерения
+REGRESSION_MIN_DELTA_MS = 0.5
+# Меньше замеров - p99 не считается (он совпал бы с максимумом)
+MIN_P99_SAMPLES = 100
+
+EQUATION_TYPES = ('harmonic', 'damped', 'forced', 'custom')
+TAGS = ('test', 'startup', 'chaos', 'resonance', 'report', 'draft')
+
+
+def _synthetic_simulation(sim_id: int, points: int, rng: np.random.Generator, created_at: datetime) -> Dict[str, Any]:
+    """Синтетическая запись в формате ODEStorage"""
+    eq_type = EQUATION_TYPES[sim_id % len(EQUATION_TYPES)]
+    omega = float(rng.uniform(0.5, 3.0))
+    beta = float(rng.uniform(0.0, 0.5))
+    t_max = 0.1 * (points - 1)
+
+    t = np.linspace(0.0, t_max, points)
+    y = np.exp(-beta * t) * np.cos(omega * t) + 0.01 * rng.standard_normal(points)
+
+    t_values = [round(v, 6) for v in t.tolist()]
+    y_values = y.tolist()
+    tags = [tag for tag in TAGS if rng.random() < 0.2]
+
+    return {
+        'id': sim_id,
+        'metadata': {
+            'id': sim_id,
+            'name': f"Bench_{sim_id}",
+            'created_at': created_at.isoformat(),
+            'equation_type': eq_type,
+            'parameters': {'omega': omega, 'beta': beta},
+            'initial_conditions': [1.0, 0.0],
+            't_range': [0.0, t_max],
+            'points_count': points,
+            'amplitude': float((y.max() - y.min()) / 2),
+            'max_value': float(y.max()),
+            'min_value': float(y.min()),
+            'tags': tags,
+            'description': "Синтетическая запись бенчмарка"
+        },
+        'results': {
+            'success': True,
+            't_values': t_values,
+            'y_values': y_values,
+            'equation': f"y''[t] + {omega}*{omega} * y[t] == 0"
+        },
+        'signature': compute_signature(y_values),
+        'previews': build_preview_levels(t_values, y_values),
+        'saved_at': created_at.isoformat()
+    }
+
+
+def long_every(count: int) -> int:
+    """Каждая какая запись истории из count записей длинная"""
+    return max(LONG_EVERY, -(-count // MAX_LONG_RECORDS))
+
+
+def generate_store(db_path: str, count: int, points: int = DEFAULT_POINTS, seed: int = 0) -> int:
+    """
+    Записать синтетическое хранилище напрямую в JSON (без save_simulation)
+
+    Каждая long_every(count)-я запись содержит points точек, остальные - SHORT_POINTS.
+
+    Returns:
+        Размер файла в байтах
+    """
+    rng = np.random.default_rng(seed)
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=365) / max(count, 1)
+
+    every = long_every(count)
+    simulations = [_synthetic_simulation(i + 1, points if (i + 1) % every == 0 else min(points, SHORT_POINTS),
+                                         rng, start + i * step)
+                   for i in range(count)]
+    data = {
+        'simulations': simulations,
+        'metadata': {
+            'created_at': start.isoformat(),
+            'last_id': count,
+            'total_simulations': count,
+            'updated_at': datetime.now().isoformat()
+        }
+    }
+
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    with open(db_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    return os.path.getsize(db_path)
+
+
+def _measure(operation: Callable[[], Any], samples: int) -> Dict[str, float]:
+    """
+    Время операции: пропускная способность и перцентили задержки
+
+    Для операций с малым числом замеров (холодный старт, запись) p99
+    не считается (None): отдаются минимум, медиана и максимум.
+    """
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(samples):
+            started = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - started)
+
+    latencies = np.array(latencies)
+    total = float(latencies.sum())
+    return {
+        'samples': samples,
+        'throughput_ops': samples / total if total > 0 else float('inf'),
+        'min_ms': float(latencies.min() * 1000),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000) if samples >= MIN_P99_SAMPLES else None,
+        'max_ms': float(latencies.max() * 1000)
+    }
+
+
+def run_size(count: int, points: int = DEFAULT_POINTS, repeat: int = DEFAULT_REPEAT, write_repeat: int = 3,
+             workdir: Optional[str] = None) -> Dict[str, Any]:
+    """Бенчмарк всех операций хранилища для одного размера истории"""
+    workdir = workdir or tempfile.mkdtemp(prefix="ode_bench_")
+    db_path = os.path.join(workdir, f"bench_{count}.json")
+    export_path = os.path.join(workdir, "export.json")
+
+    every = long_every(count)
+    print(f"\n⏱️ Размер истории: {count} симуляций, каждая {every}-я по {points} точек, "
+          f"остальные по {min(points, SHORT_POINTS)}")
+    started = time.perf_counter()
+    file_size = generate_store(db_path, count, points)
+    print(f"   Хранилище сгенерировано за {time.perf_counter() - started:.1f} с ({file_size} байт)")
+
+    rng = random.Random(count)
+    results = {'count': count, 'points': points, 'file_size_bytes': file_size, 'operations': {}}
+    ops = results['operations']
+
+    holder = {}
+
+    def cold_start():
+        holder['storage'] = ODEStorage(db_path)
+
+    ops['cold_startup'] = _measure(cold_start, min(write_repeat, repeat))
+    storage = holder['storage']
+
+    ops['get_by_id'] = _measure(lambda: storage.get_simulation(str(rng.randint(1, count))), repeat * 10)
+    ops['list'] = _measure(lambda: storage.list_simulations(limit=50), repeat)
+    ops['search_type'] = _measure(lambda: storage.search_simulations(equation_type='forced'), repeat)
+    ops['search_name'] = _measure(lambda: storage.search_simulations(name_contains='_42'), repeat)
+    ops['search_tags'] = _measure(lambda: storage.search_simulations(tags=['chaos']), repeat)
+    ops['tag_counts'] = _measure(storage.get_all_tags_with_count, repeat)
+    ops['statistics'] = _measure(storage.get_statistics, repeat)
+    ops['find_similar'] = _measure(lambda: storage.find_similar(str(rng.randint(1, count)), 10), repeat)
+    ops['load_preview'] = _measure(lambda: storage.load_preview(str(rng.randint(1, count)), 256), repeat * 10)
+    # Превью длинных траекторий - из пирамиды, без чтения results
+    long_ids = list(range(every, count + 1, every)) or [1]
+    ops['preview_long'] = _measure(lambda: storage.load_preview(str(rng.choice(long_ids)), 2048),
+                                        repeat * 10)
+
+    sample = _synthetic_simulation(0, points, np.random.default_rng(1), datetime.now())
+
+    def save():
+        storage.save_simulation(
+            equation_type=sample['metadata']['equation_type'],
+            equation_params=sample['metadata']['parameters'],
+            initial_conditions=sample['metadata']['initial_conditions'],
+            t_range=tuple(sample['metadata']['t_range']),
+            results=sample['results'],
+            tags=['bench']
+        )
+
+    ops['save'] = _measure(save, write_repeat)
+    ops['export'] = _measure(lambda: storage.export_simulation(str(rng.randint(1, count)), export_path), repeat)
+    ops['import'] = _measure(lambda: storage.import_simulation(export_path), write_repeat)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        storage.close()
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                          factor: float = REGRESSION_FACTOR) -> List[str]:
+    """Список регрессий: операции, чей p50 вырос более чем в factor раз"""
+    regressions = []
+    base_sizes = {str(entry['count']): entry for entry in baseline.get('sizes', [])}
+
+    for entry in report.get('sizes', []):
+        base = base_sizes.get(str(entry['count']))
+        # Другая длина траекторий - несравнимые измерения
+        if not base or base.get('points') != entry.get('points'):
+            continue
+        for name, stats in entry['operations'].items():
+            base_stats = base['operations'].get(name)
+            if not base_stats or base_stats['p50_ms'] <= 0:
+                continue
+            ratio = stats['p50_ms'] / base_stats['p50_ms']
+            delta = stats['p50_ms'] - base_stats['p50_ms']
+            if ratio > factor and delta > REGRESSION_MIN_DELTA_MS:
+                regressions.append(f"{entry['count']}/{name}: p50 {base_stats['p50_ms']:.3f} → "
+                                   f"{stats['p50_ms']:.3f} мс (x{ratio:.2f})")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    """Табличный вывод результатов"""
+    for entry in report['sizes']:
+        print(f"\n📊 {entry['count']} симуляций, файл {entry['file_size_bytes'] / (1024 * 1024):.1f} MB")
+        print(f"   {'операция':<14} {'замеров':>8} {'оп/с':>12} {'min, мс':>10} {'p50, мс':>10} {'p99, мс':>10}")
+        for name, stats in entry['operations'].items():
+            p99 = '—' if stats.get('p99_ms') is None else f"{stats['p99_ms']:.3f}"
+            print(f"   {name:<14} {stats['samples']:>8} {stats['throughput_ops']:>12.1f} "
+                  f"{stats.get('min_ms', stats['p50_ms']):>10.3f} {stats['p50_ms']:>10.3f} {p99:>10}")
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, points: int = DEFAULT_POINTS, repeat: int = DEFAULT_REPEAT,
+                  write_repeat: int = 3, baseline_path: str = DEFAULT_BASELINE,
+                  save_baseline: bool = False) -> Dict[str, Any]:
+    """Запуск бенчмарка для всех размеров и сравнение с базовой линией"""
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'sizes': [run_size(count, points, repeat, write_repeat) for count in sizes]
+    }
+
+    print_report(report)
+
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline)
+        report['regressions'] = regressions
+        if regressions:
+            print("\n❌ Регрессии относительно базовой линии:")
+            for line in regressions:
+                print(f"   • {line}")
+        else:
+            print("\n✅ Регрессий относительно базовой линии нет")
+
+    if save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Базовая линия сохранена: {baseline_path}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк хранилища симуляций")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="размеры истории (число симуляций)")
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help="точек в длинной траектории")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="повторов для операций чтения")
+    parser.add_argument('--write-repeat', type=int, default=3, help="повторов для операций записи")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="файл базовой линии")
+    parser.add_argument('--save-baseline', action='store_true', help="сохранить результаты как базовую линию")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.points, args.repeat, args.write_repeat,
+                           args.baseline, args.save_baseline)
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,8 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 from .ode_storage_simple import ODEStorage
+from .retention import RetentionPolicy, CompactionJob
+from .storage_policy import StoragePolicy
 
 
 class StorageManager:
@@ -32,12 +34,17 @@ class StorageManager:
 
             print(f"📁 Файл данных: {db_path}")
 
-            # Создаем хранилище
-            self.storage = ODEStorage(db_path)
+            # Создаем хранилище: дешевые решения хранятся как рецепт
+            self.storage = ODEStorage(db_path, policy=StoragePolicy('auto', cost_threshold=1.0))
 
             # Запускаем тест
             self._test_storage()
 
+            # Фоновое уплотнение: от тестовых записей запуска остается только последняя
+            self.retention_policy = RetentionPolicy(tag_quotas={'startup': 1})
+            self.compaction_job = CompactionJob(self.storage, self.retention_policy)
+            self.compaction_job.start()
+
             self._initialized = True
             print("✅ StorageManager готов!")
 
@@ -71,6 +78,15 @@ class StorageManager:
         else:
             print("❌ Хранилище не работает!")
 
+    def attach_solver(self, logic):
+        """
+        Подключить решатель для пересчета симуляций, сохраненных как рецепт
+
+        Args:
+            logic: объект ODELogic (пересчет идет через его кэш решений)
+        """
+        self.storage.set_resolver(logic.solve_recipe)
+
     def get_all_tags(self) -> List[Dict[str, Any]]:
         """Получить все теги с количеством"""
         return self.storage.get_all_tags_with_count()  # Используем новый метод
@@ -192,6 +208,14 @@ class StorageManager:
             'results': sim_data['results']
         }
 
+    def load_preview(self, simulation_id: str, max_points: int = 256) -> Optional[Dict[str, Any]]:
+        """Загрузить превью траектории (огибающая не длиннее max_points)"""
+        return self.storage.load_preview(simulation_id, max_points)
+
+    def load_previews(self, simulation_ids: List[str], max_points: int = 256) -> List[Dict[str, Any]]:
+        """Загрузить превью нескольких симуляций для наложения"""
+        return self.storage.load_previews(simulation_ids, max_points)
+
     def get_recent_simulations(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Получить последние симуляции"""
         return self.storage.list_simulations(limit=limit, sort_by='created_at', descending=True)
@@ -207,6 +231,10 @@ class StorageManager:
             tags=tags
         )
 
+    def find_similar(self, simulation_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Найти k симуляций с похожей динамикой"""
+        return self.storage.find_similar(simulation_id, k)
+
     def get_all_tags(self) -> List[str]:
         """Получить все теги"""
         all_tags = set()
@@ -234,6 +262,16 @@ class StorageManager:
         """Удалить симуляцию"""
         return self.storage.delete_simulation(simulation_id)
 
+    def set_retention_policy(self, policy: RetentionPolicy):
+        """Задать правила хранения для фонового уплотнения"""
+        self.retention_policy = policy
+        self.compaction_job.policy = policy
+
+    def compact_now(self) -> Dict[str, Any]:
+        """Немедленно применить правила хранения и уплотнить хранилище"""
+        return self.compaction_job.run_once()
+
     def close(self):
         """Закрыть хранилище"""
+        self.compaction_job.stop()
         self.storage.close()
\ No newline at end of file
@@ -0,0 +1,91 @@
+# main/db/storage_policy.py
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+# Количество контрольных точек в дайджесте
+DIGEST_SAMPLES = 16
+
+# Типы уравнений, которые можно воспроизвести по рецепту
+RECOMPUTABLE_TYPES = ('harmonic', 'damped', 'forced', 'custom')
+
+
+class StoragePolicy:
+    """
+    Политика хранения траекторий
+
+    Режимы:
+        'full'   - всегда хранить y_values/t_values
+        'recipe' - хранить только рецепт и дайджест, если решение воспроизводимо
+        'auto'   - хранить траекторию, только если решение дороже cost_threshold секунд
+    """
+
+    MODES = ('full', 'recipe', 'auto')
+
+    def __init__(self, mode: str = 'auto', cost_threshold: float = 1.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим хранения: {mode}")
+        self.mode = mode
+        self.cost_threshold = cost_threshold
+
+    def store_trajectory(self, results: Dict[str, Any]) -> bool:
+        """Нужно ли сохранять траекторию целиком"""
+        if self.mode == 'full':
+            return True
+
+        recipe = results.get('recipe')
+        if not results.get('success') or not recipe:
+            return True
+        if recipe.get('equation_type') not in RECOMPUTABLE_TYPES:
+            return True
+
+        if self.mode == 'recipe':
+            return False
+
+        solve_time = results.get('solve_time')
+        if solve_time is None:
+            return True
+        return solve_time > self.cost_threshold
+
+
+def compute_digest(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Дайджест траектории для проверки пересчитанного решения"""
+    t = np.asarray(results.get('t_values', []), dtype=np.float64)
+    y = np.asarray(results.get('y_values', []), dtype=np.float64)
+
+    idx = np.unique(np.linspace(0, max(len(y) - 1, 0), DIGEST_SAMPLES).astype(np.int64)) if len(y) else []
+
+    return {
+        'points_count': int(len(y)),
+        't_first': float(t[0]) if len(t) else 0.0,
+        't_last': float(t[-1]) if len(t) else 0.0,
+        'sample_indices': [int(i) for i in idx],
+        'samples': [float(y[i]) for i in idx],
+        'sum': float(np.sum(y)),
+    }
+
+
+def verify_digest(digest: Dict[str, Any],
+                  results: Dict[str, Any],
+                  rtol: float = 1e-6,
+                  atol: float = 1e-9) -> Optional[str]:
+    """
+    Сверить пересчитанное решение с дайджестом
+
+    Returns:
+        None при совпадении, иначе описание расхождения
+    """
+    y = np.asarray(results.get('y_values', []), dtype=np.float64)
+
+    if len(y) != digest.get('points_count'):
+        return f"Число точек {len(y)} вместо {digest.get('points_count')}"
+
+    indices = digest.get('sample_indices', [])
+    if indices and not np.allclose(y[indices], digest.get('samples', []), rtol=rtol, atol=atol):
+        return "Контрольные точки не совпадают"
+
+    scale = max(1.0, float(np.sum(np.abs(y))))
+    if abs(float(np.sum(y)) - digest.get('sum', 0.0)) > rtol * scale + atol:
+        return "Контрольная сумма не совпадает"
+
+    return None
@@ -0,0 +1,88 @@
+# dense_output.py
+import numpy as np
+
+
+class DenseSolution:
+    """
+    Решение с плотным выводом: y и y' в любых точках отрезка
+
+    Строится по узлам шагов интегратора (t, y, y') кубическим
+    сплайном Эрмита, поэтому узлы сгущаются там, где решение быстро
+    меняется, а увеличение не требует повторного интегрирования.
+    Сплайн между узлами грубее интерполяции самого NDSolve, поэтому
+    таблицы решения считает решатель, а этот класс служит только
+    для увеличения и измерений внутри окна.
+    """
+
+    def __init__(self, t, y, yp):
+        from scipy.interpolate import CubicHermiteSpline
+
+        t = np.asarray(t, dtype=np.float64)
+        # Сетка интегратора может содержать повторы (стыки отрезков)
+        t, unique = np.unique(t, return_index=True)
+        self.t = t
+        self.y = np.asarray(y, dtype=np.float64)[unique]
+        self.yp = np.asarray(yp, dtype=np.float64)[unique]
+        self._spline = CubicHermiteSpline(self.t, self.y, self.yp, extrapolate=False)
+        self._derivative = self._spline.derivative()
+
+    @classmethod
+    def from_result(cls, result):
+        """
+        Плотное решение из результата решателя
+
+        Узлы берутся из result['dense'], иначе из таблицы с 'yp_values'.
+        Returns None, если скоростей в результате нет.
+        """
+        if not result or not result.get('success'):
+            return None
+        nodes = result.get('dense')
+        if nodes:
+            t, y, yp = nodes['t'], nodes['y'], nodes['yp']
+        elif result.get('yp_values') is not None:
+            t, y, yp = result['t_values'], result['y_values'], result['yp_values']
+        else:
+            return None
+        if len(t) < 2:
+            return None
+        return cls(t, y, yp)
+
+    @property
+    def t_min(self):
+        return float(self.t[0])
+
+    @property
+    def t_max(self):
+        return float(self.t[-1])
+
+    def __call__(self, t):
+        """y(t) для скаляра или массива t"""
+        return self._spline(self._clip(t))
+
+    def derivative(self, t):
+        """y'(t) для скаляра или массива t"""
+        return self._derivative(self._clip(t))
+
+    def evaluate(self, t):
+        """(y(t), y'(t))"""
+        t = self._clip(t)
+        return self._spline(t), self._derivative(t)
+
+    def _clip(self, t):
+        return np.clip(np.asarray(t, dtype=np.float64), self.t[0], self.t[-1])
+
+    def _window(self, t_range):
+        if t_range is None:
+            return self.t_min, self.t_max
+        return max(float(t_range[0]), self.t_min), min(float(t_range[1]), self.t_max)
+
+    def zoom(self, t_min, t_max, points=2000):
+        """(t, y, y') в окне [t_min, t_max] без повторного интегрирования"""
+        t_min, t_max = self._window((t_min, t_max))
+        t = np.linspace(t_min, t_max, max(int(points), 2))
+        y, yp = self.evaluate(t)
+        return t, y, yp
+
+    def to_dict(self):
+        """Узлы для сохранения в результате ({'t', 'y', 'yp'} списками)"""
+        return {'t': self.t.tolist(), 'y': self.y.tolist(), 'yp': self.yp.tolist()}
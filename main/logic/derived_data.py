@@ -0,0 +1,112 @@
+# derived_data.py
+import numpy as np
+
+from main.logic.events import event_period, event_amplitude
+
+
+class DerivedData:
+    """
+    Производные данные одного решения: скорость, спектр, огибающая, статистика
+
+    Каждая величина считается один раз при первом запросе.
+    Массивы отдаются только для чтения, так как разделяются между видами.
+    """
+
+    def __init__(self, solution):
+        self.solution = solution
+        self._products = {}
+
+    def _get(self, name, compute):
+        if name not in self._products:
+            value = compute()
+            for array in (value if isinstance(value, tuple) else (value,)):
+                if isinstance(array, np.ndarray):
+                    array.flags.writeable = False
+            self._products[name] = value
+        return self._products[name]
+
+    def arrays(self):
+        """(t, y) как numpy-массивы"""
+        return self._get('arrays', lambda: (
+            np.asarray(self.solution['t_values'], dtype=np.float64),
+            np.asarray(self.solution['y_values'], dtype=np.float64)
+        ))
+
+    def dense(self):
+        """Плотное решение (dense_output.DenseSolution) или None"""
+        def compute():
+            from main.logic.dense_output import DenseSolution
+            return DenseSolution.from_result(self.solution)
+        return self._get('dense', compute)
+
+    def velocity(self):
+        """
+        Скорость y'(t): значения решателя ('yp_values'), а для старых
+        результатов без них - численная производная по сетке
+        """
+        def compute():
+            t, y = self.arrays()
+            yp = self.solution.get('yp_values')
+            if yp is not None and len(yp) == len(y):
+                return np.asarray(yp, dtype=np.float64)
+            return np.gradient(y, t[1] - t[0])
+        return self._get('velocity', compute)
+
+    def phase_portrait(self):
+        """(t, y, y') или None, если точек меньше двух"""
+        t, y = self.arrays()
+        if len(y) < 2:
+            return None
+        return t, y, self.velocity()
+
+    def spectrum(self):
+        """Односторонний амплитудный спектр через rfft: (частоты, амплитуды)"""
+        def compute():
+            from scipy.fft import rfft, rfftfreq
+            t, y = self.arrays()
+            n = len(y)
+            amplitudes = 2.0 / n * np.abs(rfft(y))
+            amplitudes[0] /= 2
+            return rfftfreq(n, t[1] - t[0]), amplitudes
+        return self._get('spectrum', compute)
+
+    def envelope(self):
+        """Амплитудная огибающая |y + iH[y]| (преобразование Гильберта)"""
+        def compute():
+            from scipy.signal import hilbert
+            _, y = self.arrays()
+            return np.abs(hilbert(y))
+        return self._get('envelope', compute)
+
+    def analysis(self, estimate_period):
+        """
+        Статистика решения
+
+        Период и амплитуда последнего колебания берутся из событий
+        интегратора ('events'), если они есть; при найденном установившемся
+        режиме добавляется длительность переходного процесса.
+
+        Args:
+            estimate_period: функция (t, y) -> период (для решений без событий)
+        """
+        def compute():
+            t, y = self.arrays()
+            if len(y) == 0:
+                return {'max_value': 0, 'min_value': 0, 'amplitude': 0,
+                        'period_estimate': 0, 'final_time': 0}
+            events = self.solution.get('events')
+            period = event_period(events)
+            analysis = {
+                'max_value': float(y.max()),
+                'min_value': float(y.min()),
+                'amplitude': float((y.max() - y.min()) / 2),
+                'period_estimate': period if period is not None else estimate_period(t, y),
+                'final_time': float(t[-1])
+            }
+            final_amplitude = event_amplitude(events)
+            if final_amplitude is not None:
+                analysis['final_amplitude'] = final_amplitude
+            if events and events.get('transient') is not None:
+                analysis['transient_time'] = float(events['transient'])
+            return analysis
+        return dict(self._get('analysis', compute))
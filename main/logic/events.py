@@ -0,0 +1,29 @@
+# events.py
+import numpy as np
+
+# Сколько последних периодов усредняется при оценке периода
+PERIOD_WINDOW = 10
+
+
+def event_period(events, window=PERIOD_WINDOW):
+    """
+    Период по моментам максимумов, найденным интегратором
+
+    Returns:
+        среднее расстояние между последними window+1 максимумами
+        или None, если максимумов меньше двух
+    """
+    maxima = (events or {}).get('maxima') or []
+    if len(maxima) < 2:
+        return None
+    t = np.asarray([point[0] for point in maxima[-(window + 1):]], dtype=np.float64)
+    return float(np.mean(np.diff(t)))
+
+
+def event_amplitude(events):
+    """Амплитуда последнего колебания: (последний максимум - последний минимум) / 2"""
+    events = events or {}
+    maxima, minima = events.get('maxima') or [], events.get('minima') or []
+    if not maxima or not minima:
+        return None
+    return float((maxima[-1][1] - minima[-1][1]) / 2)
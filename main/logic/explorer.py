@@ -0,0 +1,195 @@
+# explorer.py
+import threading
+
+from main.logic.jobs import PRIORITY_INTERACTIVE, PRIORITY_PREVIEW
+
+# Грубое решение для мгновенного отклика на слайдер
+PREVIEW_STEP = 0.5
+PREVIEW_PRECISION = 4
+PREVIEW_TIME_LIMIT = 0.5
+# Пауза без новых запросов, после которой считается точное решение
+SETTLE_DELAY = 0.3
+
+# Параметры, от которых зависит каждый тип уравнения
+EQUATION_PARAMETERS = {
+    'harmonic': ('omega',),
+    'damped': ('omega', 'beta'),
+    'forced': ('omega', 'beta', 'force', 'frequency'),
+}
+
+
+def explorer_parameters(equation_type, equation=''):
+    """Параметры уравнения, которые имеет смысл менять слайдерами"""
+    if equation_type == 'custom':
+        import re
+        names = ('omega', 'beta', 'force', 'frequency')
+        return tuple(name for name in names if re.search(rf'\b{name}\b', equation or ''))
+    return EQUATION_PARAMETERS.get(equation_type, ())
+
+
+class ProgressiveSolver:
+    """
+    Фоновое решение для интерактивного исследования параметров
+
+    request() только запоминает последние параметры и сразу возвращает
+    управление. Рабочий поток берет самый свежий запрос (промежуточные
+    отбрасываются), считает грубое решение с ограничением по времени,
+    а если за SETTLE_DELAY не пришло новых запросов - точное.
+    Точное решение устаревшего запроса не доставляется; грубое
+    доставляется, если оно новее уже показанного (иначе при
+    непрерывном перетаскивании график бы не обновлялся).
+
+    С суррогатом (surrogate.ParameterSurrogate) запрос сразу получает
+    интерполяцию по сетке ('surrogate', из вызывающего потока), грубое
+    решение не считается, а точное запускается после паузы или commit().
+
+    С планировщиком (jobs.JobScheduler) решения идут заданиями общей
+    очереди сессии: грубые - с приоритетом PRIORITY_PREVIEW, точные -
+    PRIORITY_INTERACTIVE, поэтому предпросмотр не ждет длинных расчетов
+    дольше одной их порции.
+
+    on_result(stage, generation, params, result) вызывается из рабочего
+    потока; stage - 'surrogate', 'preview' или 'full'.
+    """
+
+    def __init__(self, logic, equation_type, initial_conditions, t_range, on_result,
+                 base_params=None, preview_step=PREVIEW_STEP, settle_delay=SETTLE_DELAY,
+                 surrogate=None, scheduler=None):
+        self.logic = logic
+        self.equation_type = equation_type
+        self.initial_conditions = list(initial_conditions)
+        self.t_range = tuple(t_range)
+        self.on_result = on_result
+        self.base_params = dict(base_params or {})
+        self.preview_step = preview_step
+        self.settle_delay = settle_delay
+        self.surrogate = surrogate
+        self.scheduler = scheduler
+
+        self.generation = 0
+        self.delivered = 0
+        self._pending = None
+        self._commit = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, params):
+        """Запросить решение для новых параметров (не блокирует)"""
+        params = {**self.base_params, **params}
+        approximation = self._approximate(params)
+
+        with self._condition:
+            self.generation += 1
+            generation = self.generation
+            self._pending = (generation, params)
+            # commit() относится к прежним параметрам
+            self._commit = False
+            if approximation is not None:
+                # Грубое решение для этого запроса уже не нужно
+                self.delivered = generation
+            self._condition.notify()
+
+        if approximation is not None:
+            self._notify('surrogate', generation, params, approximation)
+        return generation
+
+    def commit(self):
+        """Параметры зафиксированы (слайдер отпущен): точное решение без ожидания паузы"""
+        with self._condition:
+            self._commit = True
+            self._condition.notify()
+
+    def _approximate(self, params):
+        """Решение, интерполированное по сетке суррогата (или None)"""
+        if self.surrogate is None:
+            return None
+        approximation = self.surrogate.interpolate(params)
+        if approximation is None:
+            return None
+        t_values, y_values = approximation
+        return {'success': True, 't_values': t_values, 'y_values': y_values, 'surrogate': True}
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _take(self, timeout=None):
+        """Забрать самый свежий запрос (None - закрыт, истек timeout или commit())"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._pending is not None or self._closed or (timeout and self._commit),
+                timeout
+            )
+            if self._closed:
+                return None
+            if timeout:
+                # commit() действует на одно ожидание паузы
+                self._commit = False
+            if self._pending is None:
+                return None
+            request, self._pending = self._pending, None
+            return request
+
+    def _solve(self, params, full):
+        if full:
+            def compute():
+                return self.logic.compute_solution(self.equation_type, params,
+                                                   self.initial_conditions, self.t_range)
+        else:
+            def compute():
+                return self.logic.compute_solution(self.equation_type, params,
+                                                   self.initial_conditions, self.t_range,
+                                                   step=self.preview_step, time_limit=PREVIEW_TIME_LIMIT,
+                                                   precision_goal=PREVIEW_PRECISION, use_cache=False)
+        if self.scheduler is None:
+            return compute()
+
+        job_id = self.scheduler.submit_call(
+            compute, name=f"{self.equation_type}: {'точное' if full else 'предпросмотр'}",
+            priority=PRIORITY_INTERACTIVE if full else PRIORITY_PREVIEW
+        )
+        job = self.scheduler.wait(job_id)
+        self.scheduler.forget(job_id)
+        if job.state == 'done':
+            return job.result
+        return {'success': False, 'error': job.error or 'Решение отменено'}
+
+    def _deliver(self, stage, generation, params, result):
+        with self._condition:
+            fresh = self.is_current(generation) if stage == 'full' else generation > self.delivered
+            if fresh:
+                self.delivered = generation
+        if fresh:
+            self._notify(stage, generation, params, result)
+
+    def _notify(self, stage, generation, params, result):
+        try:
+            self.on_result(stage, generation, params, result)
+        except Exception as e:
+            print(f"Ошибка доставки результата: {e}")
+
+    def _run(self):
+        request = None
+        while not self._closed:
+            if request is None:
+                request = self._take()
+                if request is None:
+                    break
+
+            generation, params = request
+            if generation > self.delivered:
+                self._deliver('preview', generation, params, self._solve(params, full=False))
+
+            # Дебаунс: точное решение - только если параметры перестали меняться
+            request = self._take(self.settle_delay)
+            if request is not None or self._closed:
+                continue
+
+            if self.is_current(generation):
+                self._deliver('full', generation, params, self._solve(params, full=True))
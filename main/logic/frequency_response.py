@@ -0,0 +1,213 @@
+# frequency_response.py
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from main.logic.dense_output import DenseSolution
+
+RESPONSE_DIR = str(Path(__file__).parent.parent / "data" / "frequency_response")
+
+# Частот на кривой по умолчанию
+DEFAULT_POINTS = 60
+# Допуск установившегося режима и число периодов, по которым меряется амплитуда
+STEADY_TOL = 1e-4
+STEADY_PERIODS = 5
+# Предел одного решения в периодах вынуждающей силы
+MAX_PERIODS = 400
+# Точек на период при измерении амплитуды по плотному решению
+SAMPLES_PER_PERIOD = 64
+
+DIRECTIONS = ('up', 'down')
+
+
+class FrequencyResponse:
+    """
+    Резонансная кривая: амплитуда установившихся вынужденных колебаний от Ω
+
+    Частота проходится вверх и вниз: у нелинейных уравнений (Даффинг)
+    ветви расходятся - гистерезис. На каждой частоте решение идет до
+    установившегося режима (steady_tol, см. WolframSolver), а его конечное
+    состояние - начальные условия следующей частоты (продолжение по
+    параметру). Решение останавливается на стробоскопическом моменте kT,
+    поэтому фаза силы в начале следующего решения та же.
+
+    Проходы вверх и вниз независимы и считаются одновременно на двух
+    ядрах (WolframSolver.solve_chains). Кривая хранится одним npz на
+    семейство (как surrogate.ParameterSurrogate) вместе с конечными
+    состояниями, поэтому недосчитанный проход продолжается с места остановки.
+    """
+
+    def __init__(self, equation_type, base_params, frequency_range, points=DEFAULT_POINTS,
+                 initial_conditions=(0.0, 0.0), steady_tol=STEADY_TOL, steady_periods=STEADY_PERIODS,
+                 max_periods=MAX_PERIODS, cache_dir=RESPONSE_DIR):
+        self.equation_type = equation_type
+        self.base_params = {k: v for k, v in base_params.items() if k != 'frequency'}
+        self.initial_conditions = [float(v) for v in initial_conditions]
+        self.steady_tol = float(steady_tol)
+        self.steady_periods = int(steady_periods)
+        self.max_periods = int(max_periods)
+        self.frequencies = np.linspace(float(frequency_range[0]), float(frequency_range[1]), int(points))
+
+        n = len(self.frequencies)
+        self.amplitude = {d: np.full(n, np.nan) for d in DIRECTIONS}
+        self.transient = {d: np.full(n, np.nan) for d in DIRECTIONS}
+        self.state = {d: np.zeros((n, 2)) for d in DIRECTIONS}
+        self.steady = {d: np.zeros(n, dtype=bool) for d in DIRECTIONS}
+        self.filled = {d: np.zeros(n, dtype=bool) for d in DIRECTIONS}
+
+        self.path = os.path.join(cache_dir, f"{equation_type}_{self.family_key()}.npz")
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.load()
+
+    def spec(self):
+        """Все, от чего зависит кривая"""
+        return {
+            'equation_type': self.equation_type,
+            'base_params': self.base_params,
+            'frequencies': [float(self.frequencies[0]), float(self.frequencies[-1]), len(self.frequencies)],
+            'initial_conditions': self.initial_conditions,
+            'steady_tol': self.steady_tol,
+            'steady_periods': self.steady_periods,
+            'max_periods': self.max_periods
+        }
+
+    def family_key(self):
+        text = json.dumps(self.spec(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def progress(self):
+        """(посчитано точек, всего) по обоим проходам"""
+        with self._lock:
+            done = sum(int(self.filled[d].sum()) for d in DIRECTIONS)
+        return done, len(DIRECTIONS) * len(self.frequencies)
+
+    @property
+    def ready(self):
+        done, total = self.progress
+        return done == total
+
+    def curve(self):
+        """
+        Копия кривой для построения
+
+        Returns:
+            {'frequency', 'up', 'down'} - амплитуды, NaN для непосчитанных точек
+        """
+        with self._lock:
+            return {'frequency': self.frequencies.copy(),
+                    **{d: self.amplitude[d].copy() for d in DIRECTIONS}}
+
+    def load(self):
+        """Загрузить кривую с диска (в том числе недосчитанную)"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                if data['frequencies'].shape != self.frequencies.shape:
+                    return False
+                for d in DIRECTIONS:
+                    self.amplitude[d] = data[f'amplitude_{d}']
+                    self.transient[d] = data[f'transient_{d}']
+                    self.state[d] = data[f'state_{d}']
+                    self.steady[d] = data[f'steady_{d}']
+                    self.filled[d] = data[f'filled_{d}']
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Не удалось загрузить резонансную кривую {self.path}: {e}")
+            return False
+        return True
+
+    def save(self):
+        """Атомарная запись кривой в npz (с описанием семейства в 'spec')"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp.npz"
+        with self._lock:
+            arrays = {}
+            for d in DIRECTIONS:
+                arrays.update({f'amplitude_{d}': self.amplitude[d], f'transient_{d}': self.transient[d],
+                               f'state_{d}': self.state[d], f'steady_{d}': self.steady[d],
+                               f'filled_{d}': self.filled[d]})
+            np.savez_compressed(temp_path, frequencies=self.frequencies,
+                                spec=np.array(json.dumps(self.spec(), ensure_ascii=False)), **arrays)
+        os.replace(temp_path, self.path)
+
+    def build(self, logic, max_kernels=2, on_point=None):
+        """
+        Досчитать кривую в фоновом потоке
+
+        Args:
+            logic: ODELogic (уравнения строятся его _build_equation)
+            on_point: функция (проход, индекс частоты), вызывается из рабочего потока
+        """
+        if self.ready or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._build, args=(logic, max_kernels, on_point),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _build(self, logic, max_kernels, on_point):
+        chains = [self._chain(logic, d, on_point) for d in DIRECTIONS]
+        try:
+            logic.solver.solve_chains(chains, max_kernels=max_kernels)
+        except Exception as e:
+            print(f"❌ Ошибка расчета резонансной кривой: {e}")
+
+    def _chain(self, logic, direction, on_point):
+        """Проход по частотам с продолжением: генератор запросов для solve_chains"""
+        indices = range(len(self.frequencies))
+        if direction == 'down':
+            indices = reversed(indices)
+
+        state = self.initial_conditions
+        for i in indices:
+            if self.filled[direction][i]:
+                state = [float(v) for v in self.state[direction][i]]
+                continue
+            if self._stop.is_set():
+                return
+
+            frequency = float(self.frequencies[i])
+            period = 2 * np.pi / frequency
+            params = dict(self.base_params, frequency=frequency)
+            result = yield {
+                'equation_str': logic._build_equation(self.equation_type, params),
+                'initial_conditions': state,
+                't_range': (0.0, self.max_periods * period),
+                'steady_tol': self.steady_tol,
+                'steady_period': period,
+                'steady_periods': self.steady_periods
+            }
+            if not result['success']:
+                print(f"⚠️ Ω = {frequency:g} ({direction}): {result['error']}")
+                continue
+
+            amplitude, end_state = self._measure(result, period)
+            transient = result['events']['transient']
+            with self._lock:
+                self.amplitude[direction][i] = amplitude
+                self.transient[direction][i] = np.nan if transient is None else transient
+                self.state[direction][i] = end_state
+                self.steady[direction][i] = transient is not None
+                self.filled[direction][i] = True
+            self.save()
+            if on_point:
+                on_point(direction, i)
+            state = [float(v) for v in end_state]
+
+    def _measure(self, result, period):
+        """Амплитуда за последние steady_periods периодов и конечное состояние (y, y')"""
+        dense = DenseSolution.from_result(result)
+        t_start = max(dense.t_min, dense.t_max - self.steady_periods * period)
+        _, y, yp = dense.zoom(t_start, dense.t_max, SAMPLES_PER_PERIOD * self.steady_periods)
+        return float((y.max() - y.min()) / 2), (float(y[-1]), float(yp[-1]))
@@ -0,0 +1,256 @@
+# jobs.py
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+# Приоритеты заданий: меньшее значение выполняется раньше
+# (пакетные расчеты - сетка суррогата, резонансная кривая - идут на своем
+# пуле ядер и в очередь сессии не попадают)
+PRIORITY_PREVIEW = 0
+PRIORITY_INTERACTIVE = 10
+
+# Ограничение времени решения по умолчанию, с
+DEFAULT_TIMEOUT = 600.0
+
+FINAL_STATES = ('done', 'error', 'cancelled', 'timeout')
+
+
+class SolveJob:
+    """
+    Задание решения: ID, состояние, прогресс, ограничение времени, приоритет
+
+    Состояния: 'queued', 'running', 'done', 'error', 'cancelled', 'timeout'.
+    Задание выполняется порциями (генератор порций как у
+    ODELogic.solve_equation_stream); отмена и проверка времени - на
+    границах порций.
+    """
+
+    def __init__(self, job_id, name, chunks, priority, timeout, on_progress, on_done):
+        self.job_id = job_id
+        self.name = name
+        self.priority = priority
+        self.timeout = timeout
+        self.state = 'queued'
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.elapsed = 0.0
+        self.cancel_requested = False
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self._chunks = chunks
+        self._finished = threading.Event()
+
+    @property
+    def finished(self):
+        return self.state in FINAL_STATES
+
+    def expired(self):
+        return self.timeout is not None and self.elapsed > self.timeout
+
+    def info(self):
+        return {
+            'job_id': self.job_id,
+            'name': self.name,
+            'state': self.state,
+            'progress': self.progress,
+            'priority': self.priority,
+            'elapsed': self.elapsed,
+            'error': self.error
+        }
+
+
+class JobScheduler:
+    """
+    Планировщик заданий решения
+
+    Один рабочий поток (сессия Wolfram все равно выполняет одно
+    вычисление за раз) каждый раз берет задание с наивысшим приоритетом
+    и выполняет у него одну порцию, после чего задание встает в очередь
+    за остальными заданиями того же приоритета. Поэтому несколько
+    расчетов идут одновременно, а срочное задание начинается на
+    ближайшей границе порции.
+
+    Прогресс и завершение доставляются в GUI через poll():
+    on_progress(job, порция), on_done(job).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._jobs = {}
+        self._events = queue.Queue()
+        self._ids = itertools.count(1)
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="solve-jobs", daemon=True)
+        self._thread.start()
+
+    def submit(self, chunks, name='', priority=PRIORITY_INTERACTIVE, timeout=DEFAULT_TIMEOUT,
+               on_progress=None, on_done=None):
+        """
+        Поставить задание в очередь
+
+        Args:
+            chunks: генератор порций {'success', 'progress', 'done', 'result'?, 'error'?}
+            timeout: ограничение собственного времени вычисления задания в секундах
+                (None - без ограничения)
+
+        Returns:
+            ID задания
+        """
+        with self._condition:
+            job = SolveJob(next(self._ids), name, chunks, priority, timeout, on_progress, on_done)
+            self._jobs[job.job_id] = job
+            heapq.heappush(self._heap, (priority, next(self._order), job.job_id))
+            self._condition.notify()
+        return job.job_id
+
+    def submit_solve(self, logic, equation_type, params, initial_conditions, t_range,
+                     priority=PRIORITY_INTERACTIVE, timeout=DEFAULT_TIMEOUT,
+                     on_progress=None, on_done=None, name=None, **options):
+        """
+        Задание потокового решения уравнения (результат в job.result, current_solution не меняется)
+
+        options - настройки решения ODELogic.solve_equation_stream (условия остановки и т.п.)
+        """
+        chunks = logic.solve_equation_stream(equation_type, params, initial_conditions, t_range,
+                                             time_limit=timeout, make_current=False, **options)
+        if name is None:
+            name = f"{equation_type} [{t_range[0]:g}, {t_range[1]:g}]"
+        return self.submit(chunks, name, priority, timeout, on_progress, on_done)
+
+    def submit_call(self, compute, name='', priority=PRIORITY_INTERACTIVE, timeout=None):
+        """
+        Задание из одного вызова compute() -> результат решателя
+
+        Результат - в job.result (неуспешный - в job.error), дождаться - wait().
+        """
+        def chunks():
+            result = compute()
+            if not result.get('success'):
+                yield {'success': False, 'error': result.get('error', 'Ошибка решения')}
+                return
+            yield {'success': True, 'progress': 1.0, 'done': True, 'result': result}
+        return self.submit(chunks(), name, priority, timeout)
+
+    def wait(self, job_id, timeout=None):
+        """Дождаться завершения задания (из любого потока, кроме рабочего); возвращает задание"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job._finished.wait(timeout)
+        return job
+
+    def cancel(self, job_id):
+        """Отменить задание (ожидающее - сразу, идущее - на границе порции)"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job.cancel_requested = True
+            if job.state == 'queued':
+                self._finish(job, 'cancelled')
+            self._condition.notify()
+        return True
+
+    def job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Все задания в порядке поступления"""
+        return [self._jobs[job_id] for job_id in sorted(self._jobs)]
+
+    def active_jobs(self):
+        """ID незавершенных заданий"""
+        return [job.job_id for job in self.jobs() if not job.finished]
+
+    def forget(self, job_id):
+        """Убрать завершенное задание из списка"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished:
+                del self._jobs[job_id]
+
+    def poll(self):
+        """Доставить прогресс и результаты (вызывать из потока GUI)"""
+        while True:
+            try:
+                kind, job, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            callback = job.on_progress if kind == 'progress' else job.on_done
+            if callback:
+                try:
+                    callback(job, payload) if kind == 'progress' else callback(job)
+                except Exception as e:
+                    print(f"Ошибка обработчика задания {job.job_id}: {e}")
+
+    def shutdown(self):
+        """Отменить все задания и остановить рабочий поток"""
+        with self._condition:
+            for job in self._jobs.values():
+                job.cancel_requested = True
+            self._closed = True
+            self._condition.notify()
+
+    def _next_job(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._heap or self._closed)
+            if self._closed:
+                return None
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if job is not None and not job.finished:
+                job.state = 'running'
+            return job
+
+    def _finish(self, job, state, result=None, error=None):
+        job.state = state
+        job.result = result
+        job.error = error
+        job._chunks.close()
+        job._finished.set()
+        self._events.put(('done', job, None))
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if self._closed:
+                # Незавершенные задания отменяются, чтобы wait() не ждал вечно
+                with self._condition:
+                    for job in self._jobs.values():
+                        if not job.finished:
+                            self._finish(job, 'cancelled')
+                return
+            if job is None or job.finished:
+                continue
+            if job.cancel_requested:
+                self._finish(job, 'cancelled')
+                continue
+
+            started = time.perf_counter()
+            try:
+                chunk = next(job._chunks)
+            except StopIteration:
+                chunk = {'success': False, 'error': 'Решение завершилось без результата'}
+            except Exception as e:
+                chunk = {'success': False, 'error': str(e)}
+            job.elapsed += time.perf_counter() - started
+
+            if not chunk['success']:
+                state = 'timeout' if chunk.get('timeout') or job.expired() else 'error'
+                self._finish(job, state, error=chunk['error'])
+            elif chunk['done']:
+                job.progress = 1.0
+                self._finish(job, 'done', result=chunk['result'])
+            elif job.cancel_requested:
+                self._finish(job, 'cancelled')
+            elif job.expired():
+                self._finish(job, 'timeout', error=f'Превышено время решения ({job.timeout:g} с)')
+            else:
+                job.progress = chunk['progress']
+                self._events.put(('progress', job, chunk))
+                with self._condition:
+                    heapq.heappush(self._heap, (job.priority, next(self._order), job.job_id))
@@ -1,12 +1,43 @@
 # logic.py
+import re
+import time
+
 import numpy as np
-from main.wolfram.wolfram import WolframSolver
+from main.logic.solution import Solution
+from main.logic.solution_cache import SolutionCache
+from main.wolfram.wolfram import WolframSolver, DEFAULT_STEP, CHUNK_POINTS, STEADY_PERIODS
+
+# Настройки решения, которые записываются в рецепт (ключи compute_solution)
+SOLVE_OPTIONS = ('stop_after_periods', 'stop_amplitude', 'steady_tol', 'steady_periods')
 
 
 class ODELogic:
     def __init__(self):
         self.solver = WolframSolver()
-        self.current_solution = None
+        self._current_solution = None
+        self.cache = SolutionCache()
+
+    @property
+    def current_solution(self):
+        return self._current_solution
+
+    @current_solution.setter
+    def current_solution(self, solution):
+        # Словари прежнего вида (например, из хранилища) переводятся в Solution
+        self._current_solution = Solution.from_dict(solution)
+
+    def derived(self):
+        """Кэш производных данных текущего решения (None, если решения нет)"""
+        if not isinstance(self._current_solution, Solution):
+            return None
+        return self._current_solution.derived()
+
+    def dense_solution(self):
+        """Плотное решение текущего результата (None, если его нельзя построить)"""
+        derived = self.derived()
+        if derived is None:
+            return None
+        return derived.dense()
 
     def solve_equation(self, equation_type, params, initial_conditions, t_range):
         """
@@ -18,17 +49,214 @@ class ODELogic:
             initial_conditions: начальные условия
             t_range: диапазон времени
         """
+        if not self._build_equation(equation_type, params):
+            return {'success': False, 'error': 'Неизвестный тип уравнения'}
+
+        result = self.compute_solution(equation_type, params, initial_conditions, t_range)
+        self.current_solution = result
+        return result
+
+    def solve_equation_stream(self, equation_type, params, initial_conditions, t_range,
+                              chunk_points=CHUNK_POINTS, time_limit=None, make_current=True,
+                              stop_after_periods=None, stop_amplitude=None,
+                              steady_tol=None, steady_periods=None):
+        """
+        Потоковое решение: порции (t, y, y') по мере интегрирования
+
+        Args:
+            time_limit: ограничение времени одной порции (см. WolframSolver.solve_chunks)
+            make_current: сделать полное решение текущим (current_solution)
+            stop_after_periods, stop_amplitude: терминальные события (как у compute_solution)
+            steady_tol, steady_periods: поиск установившегося режима (как у compute_solution)
+
+        Yields:
+            порции WolframSolver.solve_chunks; последняя ('done': True)
+            содержит 'result' - полное решение (Solution) с событиями всех
+            порций в 'events', как у compute_solution. При найденном
+            установившемся режиме в результате только его окно, хотя порции
+            переходного процесса уже выданы. Полное решение кэшируется.
+        """
         equation_str = self._build_equation(equation_type, params)
+        if not equation_str:
+            yield {'success': False, 'error': 'Неизвестный тип уравнения'}
+            return
 
-        if equation_str:
-            result = self.solver.solve_second_order_ode(
-                equation_str, initial_conditions, t_range
-            )
-            self.current_solution = result
-            return result
-        else:
+        stop = {name: value for name, value in (('stop_after_periods', stop_after_periods),
+                                                 ('stop_amplitude', stop_amplitude),
+                                                 ('steady_tol', steady_tol))
+                if value is not None}
+        if steady_tol is not None:
+            stop['steady_periods'] = int(steady_periods or STEADY_PERIODS)
+        solver_options = dict(stop)
+        if steady_tol is not None:
+            solver_options['steady_period'] = self._forcing_period(equation_type, params)
+        # Потоковое решение строится иначе, чем compute_solution (порции
+        # с перезапуском NDSolve), поэтому ключ кэша у него свой
+        key = self.cache.make_key(equation_type, params, initial_conditions, t_range, DEFAULT_STEP,
+                                  dict(stop, path='stream', chunk_points=int(chunk_points)))
+        cached = self.cache.get(key)
+        if cached is not None:
+            if make_current:
+                self.current_solution = cached
+            yield {'success': True, 't_values': [], 'y_values': [], 'yp_values': [],
+                   'progress': 1.0, 'done': True, 'result': cached}
+            return
+
+        started = time.perf_counter()
+        pieces = []
+        events = {'zero_crossings': [], 'maxima': [], 'minima': []}
+        for chunk in self.solver.solve_chunks(equation_str, initial_conditions, t_range,
+                                              chunk_points=chunk_points, time_limit=time_limit,
+                                              **solver_options):
+            if not chunk['success']:
+                yield chunk
+                return
+
+            pieces.append([np.asarray(chunk[name], dtype=np.float64)
+                           for name in ('t_values', 'y_values', 'yp_values')])
+            for name, found in events.items():
+                found.extend(chunk['events'][name])
+
+            if chunk['done']:
+                t_values, y_values, yp_values = (np.concatenate(arrays) for arrays in zip(*pieces))
+                events.update((name, chunk['events'][name]) for name in ('stop_time', 'steady_time', 'transient'))
+                if events['steady_time'] is not None:
+                    # Только окно установившегося режима (как у compute_solution)
+                    begin = np.searchsorted(t_values, events['steady_time'])
+                    t_values, y_values, yp_values = t_values[begin:], y_values[begin:], yp_values[begin:]
+                recipe = self._recipe(equation_type, params, initial_conditions, t_range)
+                recipe.update(stop, chunk_points=int(chunk_points))
+                result = Solution(
+                    t_values, y_values, yp_values,
+                    equation=equation_str,
+                    recipe=recipe,
+                    solve_time=time.perf_counter() - started,
+                    events=events
+                )
+                self.cache.put(key, result)
+                if make_current:
+                    self.current_solution = result
+                chunk = dict(chunk, result=result)
+            yield chunk
+
+    def compute_solution(self, equation_type, params, initial_conditions, t_range,
+                         step=DEFAULT_STEP, time_limit=None, precision_goal=None, use_cache=True,
+                         stop_after_periods=None, stop_amplitude=None,
+                         steady_tol=None, steady_periods=None):
+        """
+        Решение без изменения current_solution (через кэш решений)
+
+        Успешный результат - Solution: таблица t/y/y' с шагом step,
+        вычисленная NDSolve по своей интерполяции, узлы шагов интегратора
+        'dense' (для увеличения без пересчета), 'recipe' (по нему
+        решение можно воспроизвести), 'solve_time' в секундах и 'events' -
+        нули и экстремумы, найденные интегратором.
+
+        С steady_tol интегрирование идет до установившегося режима и еще
+        steady_periods периодов; таблица содержит только это окно, длительность
+        переходного процесса - в events['transient'].
+
+        Args:
+            step: шаг таблицы решения
+            time_limit, precision_goal: для быстрых грубых решений (см. WolframSolver)
+            use_cache: искать и сохранять решение в кэше
+            stop_after_periods, stop_amplitude: терминальные события (остановить
+                после N периодов / когда амплитуда меньше заданной)
+            steady_tol, steady_periods: поиск установившегося режима (см.
+                WolframSolver.solve_second_order_ode); для 'forced' состояния
+                сравниваются стробоскопически с периодом вынуждающей силы
+        """
+        equation_str = self._build_equation(equation_type, params)
+        if not equation_str:
             return {'success': False, 'error': 'Неизвестный тип уравнения'}
 
+        stop = {name: value for name, value in (('stop_after_periods', stop_after_periods),
+                                                 ('stop_amplitude', stop_amplitude),
+                                                 ('steady_tol', steady_tol))
+                if value is not None}
+        if steady_tol is not None:
+            stop['steady_periods'] = int(steady_periods or STEADY_PERIODS)
+        key = self.cache.make_key(equation_type, params, initial_conditions, t_range, step,
+                                  dict(stop, path='compute'))
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        solver_options = dict(stop)
+        if steady_tol is not None:
+            solver_options['steady_period'] = self._forcing_period(equation_type, params)
+
+        started = time.perf_counter()
+        result = self.solver.solve_second_order_ode(
+            equation_str, initial_conditions, t_range,
+            time_limit=time_limit, precision_goal=precision_goal, step=step, **solver_options
+        )
+
+        if result['success']:
+            # Таблицу с шагом step (при установившемся режиме - только его окно)
+            # считает сам NDSolve: сплайн по узлам грубее его интерполяции
+            recipe = self._recipe(equation_type, params, initial_conditions, t_range)
+            if step != DEFAULT_STEP:
+                recipe['step'] = float(step)
+            recipe.update(stop)
+            result = Solution(
+                result['t_values'], result['y_values'], result['yp_values'],
+                equation=equation_str,
+                recipe=recipe,
+                solve_time=time.perf_counter() - started,
+                dense=result['dense'],
+                events=result.get('events')
+            )
+            if use_cache:
+                self.cache.put(key, result)
+
+        return result
+
+    def solve_recipe(self, recipe):
+        """
+        Решение по рецепту (через кэш), с записанными в нем настройками
+
+        Решение, полученное потоково (в рецепте есть 'chunk_points'),
+        воспроизводится тем же путем - с той же разбивкой на порции,
+        поэтому совпадает с сохраненным дайджестом.
+        """
+        options = {name: recipe[name] for name in SOLVE_OPTIONS if name in recipe}
+        if 'chunk_points' in recipe:
+            for chunk in self.solve_equation_stream(recipe['equation_type'], recipe['parameters'],
+                                                    recipe['initial_conditions'], tuple(recipe['t_range']),
+                                                    chunk_points=recipe['chunk_points'], make_current=False,
+                                                    **options):
+                if not chunk['success'] or chunk['done']:
+                    return chunk.get('result', chunk)
+            return {'success': False, 'error': 'Решение завершилось без результата'}
+
+        return self.compute_solution(
+            recipe['equation_type'],
+            recipe['parameters'],
+            recipe['initial_conditions'],
+            tuple(recipe['t_range']),
+            step=recipe.get('step', DEFAULT_STEP),
+            **options
+        )
+
+    @staticmethod
+    def _forcing_period(equation_type, params):
+        """Период вынуждающей силы 2π/Ω (None для автономных уравнений)"""
+        if equation_type != 'forced':
+            return None
+        return 2 * np.pi / params.get('frequency', 0.5)
+
+    @staticmethod
+    def _recipe(equation_type, params, initial_conditions, t_range):
+        """Рецепт, по которому решение можно воспроизвести"""
+        return {
+            'equation_type': equation_type,
+            'parameters': dict(params),
+            'initial_conditions': [float(v) for v in initial_conditions],
+            't_range': [float(v) for v in t_range]
+        }
+
     def _build_equation(self, equation_type, params):
         """Построение строки уравнения"""
         if equation_type == 'harmonic':
@@ -51,60 +279,42 @@ class ODELogic:
             return f"y''[t] + 2*{β}*y'[t] + {ω}*{ω} * y[t] == {F}*Cos[{Ω}*t]"
 
         elif equation_type == 'custom':
-            # Пользовательское уравнение
-            return params.get('equation', "y''[t] + y[t] == 0")
+            # Пользовательское уравнение; числовые параметры (omega, beta, ...)
+            # подставляются вместо одноименных символов
+            equation = params.get('equation', "y''[t] + y[t] == 0")
+            for name, value in params.items():
+                if name != 'equation' and isinstance(value, (int, float)):
+                    equation = re.sub(rf'\b{re.escape(name)}\b', f'({value})', equation)
+            return equation
 
         return None
 
     def get_phase_portrait(self):
-        """Получение данных для фазового портрета"""
-        if not self.current_solution or not self.current_solution['success']:
+        """Получение данных для фазового портрета (из кэша производных данных)"""
+        derived = self.derived()
+        if derived is None:
             return None
-
-        t = self.current_solution['t_values']
-        y = self.current_solution['y_values']
-
-        # Простая численная производная для скорости
-        if len(y) > 1:
-            # Конвертируем в numpy для gradient
-            t_np = np.array(t)
-            y_np = np.array(y)
-            dt = t_np[1] - t_np[0]
-            y_prime = np.gradient(y_np, dt)
-            return t_np, y_np, y_prime  # Возвращаем numpy arrays
-
-        return None
+        return derived.phase_portrait()
 
     def analyze_solution(self):
         """Анализ решения"""
-        if not self.current_solution or not self.current_solution['success']:
+        derived = self.derived()
+        if derived is None:
             return None
-
-        t = self.current_solution['t_values']
-        y = self.current_solution['y_values']
-
-        analysis = {
-            'max_value': max(y) if y else 0,
-            'min_value': min(y) if y else 0,
-            'amplitude': (max(y) - min(y)) / 2 if y else 0,
-            'period_estimate': self._estimate_period(t, y),
-            'final_time': t[-1] if t else 0
-        }
-
-        return analysis
+        return derived.analysis(self._estimate_period)
 
     def _estimate_period(self, t, y):
         """Оценка периода колебаний"""
         if len(y) < 10:
             return 0
 
-        # Конвертируем в numpy arrays для работы с find_peaks
-        t_np = np.array(t)
-        y_np = np.array(y)
+        # Массивы Solution передаются без копирования
+        t_np = np.asarray(t)
+        y_np = np.asarray(y)
 
-        # Находим нули производной (экстремумы)
+        # Максимумы y (не |y|: иначе каждые полпериода)
         from scipy.signal import find_peaks
-        peaks, _ = find_peaks(np.abs(y_np))
+        peaks, _ = find_peaks(y_np)
 
         if len(peaks) >= 2:
             periods = np.diff(t_np[peaks])  # Теперь работает, т.к. t_np - numpy array
@@ -0,0 +1,135 @@
+# solution.py
+from collections.abc import Mapping
+
+import numpy as np
+
+# Ключи прежнего словаря результата -> поля Solution
+ARRAY_KEYS = {'t_values': 't', 'y_values': 'y', 'yp_values': 'yp'}
+FIELD_KEYS = ('equation', 'recipe', 'solve_time', 'events')
+
+
+def _frozen(values):
+    """Непрерывный массив float64 только для чтения (без копии, если уже такой)"""
+    array = np.ascontiguousarray(values, dtype=np.float64)
+    if array.flags.writeable:
+        if array is values:
+            array = array.view()
+        array.flags.writeable = False
+    return array
+
+
+class Solution(Mapping):
+    """
+    Успешное решение ОДУ на непрерывных массивах float64
+
+    t, y, yp - массивы только для чтения: их разделяют кэш решений и все
+    виды, срезы - представления без копирования. Производные величины
+    (скорость, спектр, огибающая, статистика) считаются лениво и
+    кэшируются на самом решении (derived()).
+
+    Для постепенного перехода объект читается как прежний словарь
+    результата: sol['success'], sol['y_values'], sol.get('recipe');
+    to_dict() / from_dict() переводят в словарь списков (JSON-хранилище,
+    без узлов 'dense') и обратно. Неуспешные результаты остаются
+    словарями {'success': False, 'error'}.
+    """
+
+    __slots__ = ('t', 'y', 'yp', 'equation', 'recipe', 'solve_time', 'events', 'dense', 'extra', '_derived')
+
+    def __init__(self, t, y, yp=None, equation=None, recipe=None, solve_time=None,
+                 dense=None, events=None, extra=None):
+        self.t = _frozen(t)
+        self.y = _frozen(y)
+        self.yp = None if yp is None else _frozen(yp)
+        self.equation = equation
+        self.recipe = recipe
+        self.solve_time = solve_time
+        # События интегратора (нули, экстремумы, остановка), см. WolframSolver
+        self.events = events
+        # Узлы плотного решения (см. dense_output): {'t', 'y', 'yp'}
+        self.dense = None if dense is None else {key: _frozen(dense[key]) for key in ('t', 'y', 'yp')}
+        self.extra = dict(extra or {})
+        self._derived = None
+
+    @classmethod
+    def from_dict(cls, result):
+        """Solution из словаря результата (неуспешный результат и Solution - как есть)"""
+        if isinstance(result, cls) or not result or not result.get('success'):
+            return result
+        known = {'success', 'dense', *ARRAY_KEYS, *FIELD_KEYS}
+        return cls(result['t_values'], result['y_values'], result.get('yp_values'),
+                   equation=result.get('equation'), recipe=result.get('recipe'),
+                   solve_time=result.get('solve_time'), dense=result.get('dense'),
+                   events=result.get('events'),
+                   extra={key: value for key, value in result.items() if key not in known})
+
+    def to_dict(self):
+        """
+        Словарь результата прежнего вида со списками (для JSON)
+
+        Узлы плотного решения не сохраняются: это второй набор массивов
+        того же размера, что и таблица, а увеличить сохраненное решение
+        можно и по таблице с 'yp_values'.
+        """
+        return {key: value.tolist() if isinstance(value, np.ndarray) else value
+                for key, value in self.items() if key != 'dense'}
+
+    def derived(self):
+        """Кэш производных данных (derived_data.DerivedData)"""
+        if self._derived is None:
+            from main.logic.derived_data import DerivedData
+            self._derived = DerivedData(self)
+        return self._derived
+
+    @property
+    def nbytes(self):
+        """Объем массивов решения в байтах"""
+        arrays = [self.t, self.y, self.yp] + list((self.dense or {}).values())
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    # Чтение как словаря результата
+
+    def _keys(self):
+        keys = ['success', 't_values', 'y_values']
+        if self.yp is not None:
+            keys.append('yp_values')
+        keys.extend(key for key in FIELD_KEYS if getattr(self, key) is not None)
+        if self.dense is not None:
+            keys.append('dense')
+        keys.extend(self.extra)
+        return keys
+
+    def __getitem__(self, key):
+        if key == 'success':
+            return True
+        if key in ARRAY_KEYS:
+            value = getattr(self, ARRAY_KEYS[key])
+        elif key in FIELD_KEYS or key == 'dense':
+            value = getattr(self, key)
+        else:
+            return self.extra[key]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in ARRAY_KEYS:
+            setattr(self, ARRAY_KEYS[key], _frozen(value))
+            self._derived = None
+        elif key in FIELD_KEYS:
+            setattr(self, key, value)
+        elif key != 'success':
+            self.extra[key] = value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    # Сравнение и хэш - по объекту (массивы не сравниваются поэлементно)
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return f"Solution(points={len(self.t)}, equation={self.equation!r})"
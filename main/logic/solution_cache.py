@@ -0,0 +1,48 @@
+# solution_cache.py
+import json
+import threading
+from collections import OrderedDict
+
+
+class SolutionCache:
+    """LRU-кэш решений по рецепту (тип уравнения, параметры, НУ, диапазон)"""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(equation_type, params, initial_conditions, t_range, step=0.1, options=None):
+        """Ключ кэша: канонический JSON рецепта (options - путь решения и прочие настройки)"""
+        recipe = {
+            'equation_type': equation_type,
+            'params': params,
+            'initial_conditions': [float(v) for v in initial_conditions],
+            't_range': [float(v) for v in t_range],
+            'step': float(step)
+        }
+        if options:
+            recipe['options'] = options
+        return json.dumps(recipe, sort_keys=True, ensure_ascii=False)
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,206 @@
+# surrogate.py
+import hashlib
+import itertools
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+SURROGATE_DIR = str(Path(__file__).parent.parent / "data" / "surrogates")
+
+# Общее число решений на сетке и пределы точек по одной оси
+MAX_GRID_SOLVES = 625
+MIN_AXIS_POINTS = 3
+MAX_AXIS_POINTS = 33
+# Решений в одной порции пула (после каждой сетка сохраняется на диск)
+BATCH_SIZE = 64
+# Точек на траекторию узла: при длинном диапазоне времени шаг таблицы
+# увеличивается, иначе сетка занимала бы гигабайты (625 узлов x длина)
+MAX_NODE_POINTS = 2048
+
+
+def axis_points(n_params, budget=MAX_GRID_SOLVES):
+    """Точек на ось, чтобы вся сетка укладывалась в budget решений"""
+    if n_params == 0:
+        return 1
+    points = int(np.floor(budget ** (1.0 / n_params) + 1e-9))
+    return int(np.clip(points, MIN_AXIS_POINTS, MAX_AXIS_POINTS))
+
+
+class ParameterSurrogate:
+    """
+    Сетка заранее посчитанных решений по параметрам слайдеров
+
+    Между узлами решение восстанавливается мультилинейной интерполяцией
+    по 2^k соседним узлам. Сетка считается в фоне пулом ядер Wolfram и
+    хранится в npz (float32) отдельно для каждого семейства уравнений:
+    тип, фиксированные параметры, НУ, диапазон времени и границы сетки.
+
+    Траектория узла - не больше MAX_NODE_POINTS точек: решатель выдает
+    таблицу с шагом не меньше (t_max - t_min) / (MAX_NODE_POINTS - 1),
+    поэтому объем сетки ограничен при любом диапазоне времени.
+    """
+
+    def __init__(self, equation_type, param_ranges, base_params, initial_conditions, t_range,
+                 step=0.1, cache_dir=SURROGATE_DIR):
+        self.equation_type = equation_type
+        self.names = tuple(sorted(param_ranges))
+        self.base_params = {k: v for k, v in base_params.items() if k not in self.names}
+        self.initial_conditions = [float(v) for v in initial_conditions]
+        self.t_range = [float(v) for v in t_range]
+        self.step = max(float(step), (self.t_range[1] - self.t_range[0]) / (MAX_NODE_POINTS - 1))
+
+        n = axis_points(len(self.names))
+        self.axes = [np.linspace(param_ranges[name][0], param_ranges[name][1], n) for name in self.names]
+        self.shape = tuple(len(axis) for axis in self.axes)
+
+        self.t_values = None
+        self.values = None
+        self.filled = np.zeros(self.shape, dtype=bool)
+
+        self.path = os.path.join(cache_dir, f"{equation_type}_{self.family_key()}.npz")
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.progress = (0, int(np.prod(self.shape)))
+
+        self.load()
+
+    def family_key(self):
+        """Хэш семейства: все, кроме параметров слайдеров"""
+        spec = {
+            'equation_type': self.equation_type,
+            'base_params': self.base_params,
+            'initial_conditions': self.initial_conditions,
+            't_range': self.t_range,
+            'step': self.step,
+            'axes': {name: [float(axis[0]), float(axis[-1]), len(axis)]
+                     for name, axis in zip(self.names, self.axes)}
+        }
+        text = json.dumps(spec, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def ready(self):
+        return bool(self.filled.all())
+
+    def load(self):
+        """Загрузить сетку с диска (в том числе недосчитанную)"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                if tuple(data['filled'].shape) != self.shape:
+                    return False
+                self.t_values = data['t_values']
+                self.values = data['values']
+                self.filled = data['filled']
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Не удалось загрузить сетку {self.path}: {e}")
+            return False
+        self.progress = (int(self.filled.sum()), self.filled.size)
+        return True
+
+    def save(self):
+        """Атомарная запись сетки в npz"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp.npz"
+        with self._lock:
+            np.savez_compressed(temp_path, t_values=self.t_values, values=self.values, filled=self.filled,
+                                **{f"axis_{name}": axis for name, axis in zip(self.names, self.axes)})
+        os.replace(temp_path, self.path)
+
+    def build(self, logic, max_kernels=4, on_progress=None):
+        """
+        Досчитать недостающие узлы в фоновом потоке
+
+        Args:
+            logic: ODELogic (уравнения строятся его _build_equation)
+            on_progress: функция (готово, всего)
+        """
+        if self.ready or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._build, args=(logic, max_kernels, on_progress),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _build(self, logic, max_kernels, on_progress):
+        missing = [idx for idx in itertools.product(*(range(n) for n in self.shape)) if not self.filled[idx]]
+        batches = [missing[start:start + BATCH_SIZE] for start in range(0, len(missing), BATCH_SIZE)]
+
+        def equations():
+            # Порции по одной: остановка - просто конец генератора
+            for batch in batches:
+                if self._stop.is_set():
+                    return
+                yield [logic._build_equation(self.equation_type, self._node_params(idx)) for idx in batch]
+
+        def store(number, results):
+            with self._lock:
+                for idx, result in zip(batches[number], results):
+                    if not result or not result.get('success'):
+                        continue
+                    y = np.asarray(result['y_values'], dtype=np.float32)
+                    if self.values is None:
+                        self.t_values = np.asarray(result['t_values'], dtype=np.float64)
+                        self.values = np.full(self.shape + (len(y),), np.nan, dtype=np.float32)
+                    if len(y) == self.values.shape[-1]:
+                        self.values[idx] = y
+                        self.filled[idx] = True
+                self.progress = (int(self.filled.sum()), self.filled.size)
+
+            if self.values is not None:
+                self.save()
+            if on_progress:
+                on_progress(*self.progress)
+
+        # Один пул ядер на всю сетку (запуск ядер дороже порции решений)
+        try:
+            logic.solver.solve_batches(equations(), self.initial_conditions, self.t_range,
+                                       step=self.step, max_kernels=max_kernels, on_batch=store)
+        except Exception as e:
+            print(f"❌ Ошибка расчета сетки: {e}")
+
+    def _node_params(self, idx):
+        params = dict(self.base_params)
+        for name, axis, i in zip(self.names, self.axes, idx):
+            params[name] = float(axis[i])
+        return params
+
+    def interpolate(self, params):
+        """
+        Мультилинейная интерполяция решения между узлами сетки
+
+        Returns:
+            (t_values, y_values) или None, если нужные узлы еще не посчитаны
+        """
+        if self.values is None:
+            return None
+
+        lower, weights = [], []
+        for name, axis in zip(self.names, self.axes):
+            value = float(np.clip(params.get(name, axis[0]), axis[0], axis[-1]))
+            i = int(np.clip(np.searchsorted(axis, value, 'right') - 1, 0, len(axis) - 2))
+            lower.append(i)
+            weights.append((value - axis[i]) / (axis[i + 1] - axis[i]))
+
+        with self._lock:
+            y = np.zeros(self.values.shape[-1], dtype=np.float64)
+            for corner in itertools.product((0, 1), repeat=len(self.names)):
+                weight = 1.0
+                for bit, w in zip(corner, weights):
+                    weight *= w if bit else 1.0 - w
+                if weight == 0.0:
+                    continue
+                idx = tuple(i + bit for i, bit in zip(lower, corner))
+                if not self.filled[idx]:
+                    return None
+                y += weight * self.values[idx]
+
+        return self.t_values, y
@@ -0,0 +1,203 @@
+# animation_export.py
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Поддерживаемые анимации и число рядов данных для каждой
+EXPORT_KINDS = {
+    'spring': 1,      # y(t)
+    'pendulum': 1,    # θ(t)
+    'rlc': 2,         # q(t), I(t)
+}
+
+
+class ExportCancelled(Exception):
+    """Экспорт отменен пользователем"""
+
+
+def _make_writer(path, fps):
+    """Кодировщик по расширению файла: GIF через pillow, видео через ffmpeg"""
+    from matplotlib import animation
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.gif':
+        return animation.PillowWriter(fps=fps)
+    if animation.writers.is_available('ffmpeg'):
+        return animation.FFMpegWriter(fps=fps, bitrate=2400)
+    raise RuntimeError("ffmpeg не найден: сохраните анимацию в формате .gif")
+
+
+def _render_animation(job_id, kind, t_values, series, path, fps, speed, progress_queue, cancel_event):
+    """Отрисовка анимации в отдельном процессе (без Tk, backend Agg)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from main.visuals.visual_physics import PhysicsVisualizer
+
+    viz = PhysicsVisualizer(None, fps=fps, speed=speed)
+    if kind == 'spring':
+        fig = viz.create_spring_animation(t_values, series[0])
+    elif kind == 'pendulum':
+        fig = viz.create_pendulum_animation(t_values, series[0])
+    else:
+        fig = viz.create_electric_circuit_animation(t_values, series[0], series[1])
+
+    def progress(frame, total):
+        if cancel_event.is_set():
+            raise ExportCancelled()
+        progress_queue.put((job_id, frame + 1, total))
+
+    def cancelled():
+        if os.path.exists(path):
+            os.remove(path)
+        return {'job_id': job_id, 'state': 'cancelled', 'path': path}
+
+    try:
+        # Отмена до первого кадра: PillowWriter.finish() без кадров падает
+        if cancel_event.is_set():
+            return cancelled()
+        writer = _make_writer(path, max(1, round(1000 / viz.frame_interval)))
+        try:
+            viz.animation.save(path, writer=writer, progress_callback=progress)
+        except ExportCancelled:
+            return cancelled()
+        except Exception:
+            # Ошибка завершения записи после отмены (finish() скрывает ExportCancelled)
+            if cancel_event.is_set():
+                return cancelled()
+            raise
+        return {'job_id': job_id, 'state': 'done', 'path': path}
+    finally:
+        plt.close(fig)
+
+
+class AnimationExporter:
+    """
+    Фоновый экспорт физических анимаций в GIF/видео
+
+    Каждая анимация рисуется в отдельном процессе (пул на все ядра),
+    GUI только опрашивает очередь прогресса через poll().
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._manager = None
+        self._progress = None
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _ensure_pool(self):
+        if self._executor is None:
+            # spawn: дочерние процессы не наследуют состояние Tk
+            context = multiprocessing.get_context('spawn')
+            self._manager = context.Manager()
+            self._progress = self._manager.Queue()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def submit(self, kind, t_values, series, path, fps=30, speed=1.0,
+               on_progress=None, on_done=None):
+        """
+        Поставить экспорт в очередь
+
+        Args:
+            kind: 'spring', 'pendulum' или 'rlc'
+            t_values: время
+            series: список рядов данных (см. EXPORT_KINDS)
+            path: файл .gif или видео (.mp4 и т.п., нужен ffmpeg)
+            on_progress: функция (job_id, кадр, всего кадров)
+            on_done: функция (результат {'job_id', 'state', 'path', 'error'?})
+
+        Returns:
+            ID задания
+        """
+        if kind not in EXPORT_KINDS:
+            raise ValueError(f"Неизвестный тип анимации: {kind}")
+        if len(series) != EXPORT_KINDS[kind]:
+            raise ValueError(f"Для '{kind}' нужно рядов данных: {EXPORT_KINDS[kind]}")
+
+        with self._lock:
+            self._ensure_pool()
+            job_id = next(self._ids)
+            cancel_event = self._manager.Event()
+
+            future = self._executor.submit(
+                _render_animation, job_id, kind,
+                np.asarray(t_values, dtype=float), [np.asarray(values, dtype=float) for values in series],
+                path, fps, speed, self._progress, cancel_event
+            )
+            self._jobs[job_id] = {
+                'future': future,
+                'cancel': cancel_event,
+                'state': 'queued',
+                'path': path,
+                'on_progress': on_progress,
+                'on_done': on_done,
+            }
+        return job_id
+
+    def cancel(self, job_id):
+        """Отменить экспорт (ожидающий снимается сразу, идущий - на следующем кадре)"""
+        job = self._jobs.get(job_id)
+        if not job:
+            return False
+        if job['future'].cancel():
+            job['state'] = 'cancelled'
+        else:
+            job['cancel'].set()
+        return True
+
+    def poll(self):
+        """Доставить прогресс и результаты (вызывать из потока GUI)"""
+        if self._progress is None:
+            return
+
+        while True:
+            try:
+                job_id, frame, total = self._progress.get_nowait()
+            except (queue.Empty, EOFError, OSError):
+                break
+            job = self._jobs.get(job_id)
+            if job:
+                job['state'] = 'running'
+                if job['on_progress']:
+                    job['on_progress'](job_id, frame, total)
+
+        for job_id, job in list(self._jobs.items()):
+            future = job['future']
+            if not future.done():
+                continue
+
+            if future.cancelled():
+                result = {'job_id': job_id, 'state': 'cancelled', 'path': job['path']}
+            else:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'job_id': job_id, 'state': 'error', 'path': job['path'], 'error': str(e)}
+
+            del self._jobs[job_id]
+            if job['on_done']:
+                job['on_done'](result)
+
+    def active_jobs(self):
+        """ID незавершенных заданий"""
+        return list(self._jobs)
+
+    def shutdown(self):
+        """Отменить все задания и остановить процессы"""
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+            self._progress = None
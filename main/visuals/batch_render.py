@@ -0,0 +1,275 @@
+# main/visuals/batch_render.py
+"""
+Пакетная отрисовка графиков сохраненных симуляций без Tk
+
+Запуск:
+    python -m main.visuals.batch_render --tags report --out figures
+    python -m main.visuals.batch_render --ids 12 15 --kinds solution phase --formats png svg
+    python -m main.visuals.batch_render --type forced --workers 4
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+FIGURE_KINDS = ('solution', 'phase', 'spectrum', '3d')
+FIGURE_FORMATS = ('png', 'svg')
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_DB = str(Path(__file__).parent.parent / "data" / "simulations.json")
+
+# Меняется при изменении оформления: все графики перерисуются
+RENDER_VERSION = 1
+
+
+def figure_hash(kind: str, fmt: str, t: np.ndarray, y: np.ndarray, yp: np.ndarray,
+                title: str, dpi: int) -> str:
+    """Хэш содержимого графика: данные + тип + оформление"""
+    h = hashlib.sha256()
+    h.update(json.dumps([RENDER_VERSION, kind, fmt, title, dpi]).encode('utf-8'))
+    for values in (t, y, yp):
+        h.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def solution_velocity(results: Dict[str, Any], t: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """y' решателя, а для старых результатов без 'yp_values' - численная производная"""
+    yp = results.get('yp_values')
+    if yp is not None and len(yp) == len(y):
+        return np.asarray(yp, dtype=np.float64)
+    return np.gradient(y, t)
+
+
+def _draw(kind, fig, t, y, yp, title):
+    """Один график на фигуре (backend Agg)"""
+    from main.visuals.decimation import curve_indices, minmax_indices
+    from main.visuals.phase_density import use_density, render_phase_density
+
+    if kind == '3d':
+        from main.visuals.path3d import TimeColoredPath3D
+        ax = fig.add_subplot(111, projection='3d')
+        path = TimeColoredPath3D(ax, t, y, yp, linewidth=1.5)
+        fig.colorbar(path.collection, ax=ax, label='Время')
+        ax.set_xlabel('Время (t)')
+        ax.set_ylabel('Положение (y)')
+        ax.set_zlabel("Скорость (y')")
+        ax.set_title(f'3D фазовое пространство: {title}')
+        return
+
+    ax = fig.add_subplot(111)
+    if kind == 'solution':
+        idx = minmax_indices(y, 2000)
+        ax.plot(t[idx], y[idx], 'b-', linewidth=1.5)
+        ax.set_xlabel('Время t')
+        ax.set_ylabel('y(t)')
+        ax.set_title(f'Решение: {title}')
+    elif kind == 'phase':
+        if use_density('auto', len(y)):
+            image = render_phase_density(ax, y, yp)
+            fig.colorbar(image, ax=ax, label='log(1 + N)')
+        else:
+            idx = curve_indices(t, y, yp)
+            ax.plot(y[idx], yp[idx], 'r-', linewidth=1)
+        ax.set_xlabel('y')
+        ax.set_ylabel("y'")
+        ax.set_title(f'Фазовый портрет: {title}')
+    elif kind == 'spectrum':
+        from scipy.fft import rfft, rfftfreq
+        amplitudes = 2.0 / len(y) * np.abs(rfft(y))
+        amplitudes[0] /= 2
+        frequencies = rfftfreq(len(y), t[1] - t[0])
+        idx = minmax_indices(amplitudes, 2000)
+        ax.plot(frequencies[idx], amplitudes[idx], 'g-', linewidth=1)
+        ax.set_xlabel('Частота')
+        ax.set_ylabel('Амплитуда')
+        ax.set_title(f'Частотный спектр: {title}')
+    ax.grid(True, alpha=0.3)
+
+
+def _render_simulation(t, y, yp, title, jobs, dpi):
+    """
+    Отрисовка графиков одной симуляции в процессе пула
+
+    Args:
+        jobs: список (kind, fmt, path)
+
+    Returns:
+        список (path, ошибка или None)
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    done = []
+    for kind, fmt, path in jobs:
+        try:
+            fig = Figure(figsize=(10, 6))
+            FigureCanvasAgg(fig)
+            _draw(kind, fig, t, y, yp, title)
+            fig.tight_layout()
+            tmp_path = f"{path}.tmp.{fmt}"
+            fig.savefig(tmp_path, format=fmt, dpi=dpi)
+            os.replace(tmp_path, path)
+            done.append((path, None))
+        except Exception as e:
+            done.append((path, str(e)))
+    return done
+
+
+class BatchRenderer:
+    """
+    Отрисовка графиков симуляций из хранилища в PNG/SVG пулом процессов
+
+    В каталоге вывода ведется manifest.json с хэшем содержимого каждого
+    файла: при повторном запуске неизмененные графики пропускаются.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB, out_dir: str = "figures",
+                 max_workers: Optional[int] = None, dpi: int = 120, recompute: bool = False):
+        from main.db.ode_storage_simple import ODEStorage
+
+        # Рендер только читает: запись снимка затерла бы то, что GUI сохранил за это время
+        self.storage = ODEStorage(db_path, read_only=True)
+        self.out_dir = out_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+
+        if recompute:
+            self._attach_solver()
+
+    def _attach_solver(self):
+        """Пересчет симуляций-рецептов через Wolfram (нужен Wolfram Engine)"""
+        from main.logic.logic import ODELogic
+
+        logic = ODELogic()
+        self.storage.set_resolver(logic.solve_recipe)
+
+    def query(self, ids: Optional[List[str]] = None, tags: Optional[List[str]] = None,
+              equation_type: Optional[str] = None) -> List[str]:
+        """ID симуляций по запросу (без фильтров - все)"""
+        if ids:
+            return [str(sim_id) for sim_id in ids]
+        found = self.storage.search_simulations(equation_type=equation_type, tags=tags)
+        return [str(sim['id']) for sim in found]
+
+    def _load_manifest(self) -> Dict[str, str]:
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+        return {}
+
+    def _save_manifest(self, manifest: Dict[str, str]):
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def render(self, simulation_ids: List[str], kinds=FIGURE_KINDS, formats=('png',),
+               force: bool = False) -> Dict[str, Any]:
+        """
+        Отрисовать графики симуляций
+
+        Returns:
+            {'rendered', 'skipped', 'failed': [(файл, ошибка)], 'missing': [ID]}
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        report = {'rendered': 0, 'skipped': 0, 'failed': [], 'missing': []}
+
+        tasks = []
+        pending_hashes = {}
+        for sim_id in simulation_ids:
+            sim = self.storage.get_simulation(sim_id)
+            results = sim.get('results', {}) if sim else {}
+            if not results.get('success') or len(results.get('y_values', [])) < 2:
+                report['missing'].append(sim_id)
+                continue
+
+            t = np.asarray(results['t_values'], dtype=np.float64)
+            y = np.asarray(results['y_values'], dtype=np.float64)
+            yp = solution_velocity(results, t, y)
+            title = sim['metadata'].get('name', f"Sim_{sim_id}")
+
+            jobs = []
+            for kind in kinds:
+                for fmt in formats:
+                    name = f"sim_{sim_id}_{kind}.{fmt}"
+                    path = os.path.join(self.out_dir, name)
+                    digest = figure_hash(kind, fmt, t, y, yp, title, self.dpi)
+                    if not force and manifest.get(name) == digest and os.path.exists(path):
+                        report['skipped'] += 1
+                        continue
+                    pending_hashes[path] = (name, digest)
+                    jobs.append((kind, fmt, path))
+
+            if jobs:
+                tasks.append((t, y, yp, title, jobs))
+
+        if tasks:
+            # spawn: рабочие процессы не наследуют состояние вызывающего (в т.ч. Tk)
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks)),
+                                     mp_context=context) as executor:
+                futures = [executor.submit(_render_simulation, t, y, yp, title, jobs, self.dpi)
+                           for t, y, yp, title, jobs in tasks]
+                for future in as_completed(futures):
+                    for path, error in future.result():
+                        name, digest = pending_hashes[path]
+                        if error:
+                            report['failed'].append((name, error))
+                            manifest.pop(name, None)
+                        else:
+                            report['rendered'] += 1
+                            manifest[name] = digest
+
+        self._save_manifest(manifest)
+        return report
+
+    def close(self):
+        self.storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная отрисовка графиков симуляций")
+    parser.add_argument('--db', default=DEFAULT_DB, help="файл хранилища")
+    parser.add_argument('--out', default="figures", help="каталог для графиков")
+    parser.add_argument('--ids', nargs='+', help="ID симуляций")
+    parser.add_argument('--tags', nargs='+', help="теги (любой из)")
+    parser.add_argument('--type', dest='equation_type', help="тип уравнения")
+    parser.add_argument('--kinds', nargs='+', choices=FIGURE_KINDS, default=list(FIGURE_KINDS))
+    parser.add_argument('--formats', nargs='+', choices=FIGURE_FORMATS, default=['png'])
+    parser.add_argument('--workers', type=int, default=None, help="число процессов")
+    parser.add_argument('--dpi', type=int, default=120)
+    parser.add_argument('--force', action='store_true', help="перерисовать без проверки хэшей")
+    parser.add_argument('--recompute', action='store_true',
+                        help="пересчитывать симуляции, сохраненные как рецепт (нужен Wolfram)")
+    args = parser.parse_args()
+
+    renderer = BatchRenderer(args.db, args.out, args.workers, args.dpi, args.recompute)
+    try:
+        ids = renderer.query(args.ids, args.tags, args.equation_type)
+        print(f"🖼️ Симуляций к отрисовке: {len(ids)}")
+        report = renderer.render(ids, args.kinds, args.formats, args.force)
+    finally:
+        renderer.close()
+
+    print(f"✅ Отрисовано: {report['rendered']}, пропущено без изменений: {report['skipped']}")
+    if report['missing']:
+        print(f"⚠️ Нет данных для: {', '.join(report['missing'])}")
+    for name, error in report['failed']:
+        print(f"❌ {name}: {error}")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
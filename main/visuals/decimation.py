@@ -0,0 +1,286 @@
+# decimation.py
+from contextlib import contextmanager
+
+import numpy as np
+
+# Пределы числа вершин, отдаваемых matplotlib
+MIN_POINTS = 200
+MAX_POINTS = 4000
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Индексы минимума и максимума в каждой из n_buckets корзин
+
+    Сохраняет экстремумы сигнала: при отрисовке по столбцу пикселей
+    на корзину картинка совпадает с полной.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return np.arange(n)
+
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    pad = n_buckets * size - n
+
+    low = np.concatenate([y, np.full(pad, np.inf)]).reshape(n_buckets, size)
+    high = np.concatenate([y, np.full(pad, -np.inf)]).reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+
+    idx = np.concatenate([
+        [0, n - 1],
+        offsets + np.argmin(low, axis=1),
+        offsets + np.argmax(high, axis=1)
+    ])
+    return np.unique(idx)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: индексы n_out наиболее значимых точек
+
+    Внутри корзины площади треугольников считаются векторно,
+    цикл идет только по корзинам (n_out итераций).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Внутренние точки 1..n-2 делятся на n_out-2 корзины
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+
+    # Опорная точка корзины i - среднее корзины i+1, для последней - последняя точка
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax_, ay = x[a], y[a]
+        area = np.abs((ax_ - next_x[i]) * (y[lo:hi] - ay) - (ax_ - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def decimate_indices(x, y, n_points, method='minmax'):
+    """Индексы прореженного ряда не длиннее ~n_points"""
+    if method == 'lttb':
+        return lttb_indices(x, y, n_points)
+    return minmax_indices(y, max(1, n_points // 2))
+
+
+def curve_indices(t, *series, n_points=MAX_POINTS):
+    """
+    Индексы прореживания кривой, заданной несколькими рядами от t
+
+    Для фазовых и 3D-траекторий: объединение LTTB-индексов каждого ряда.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    if len(t) <= n_points or not series:
+        return np.arange(len(t))
+
+    per_series = max(3, n_points // len(series))
+    idx = lttb_indices(t, series[0], per_series)
+    for values in series[1:]:
+        idx = np.union1d(idx, lttb_indices(t, values, per_series))
+    return idx
+
+
+def pixel_budget(ax, per_pixel=2, min_points=MIN_POINTS, max_points=MAX_POINTS):
+    """Бюджет вершин по ширине осей в пикселях"""
+    try:
+        width = ax.get_window_extent().width
+    except Exception:
+        width = 0
+    return int(np.clip(width * per_pixel, min_points, max_points))
+
+
+class AppendBuffer:
+    """
+    Столбцы float64, дописываемые порциями (потоковое решение)
+
+    Емкость удваивается, поэтому дописывание N точек порциями стоит O(N);
+    columns() возвращает представления без копирования.
+    """
+
+    def __init__(self, n_columns, capacity=1024):
+        self._data = np.empty((n_columns, capacity), dtype=np.float64)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, *columns):
+        n = len(columns[0])
+        if self.size + n > self._data.shape[1]:
+            capacity = max(2 * self._data.shape[1], self.size + n)
+            data = np.empty((self._data.shape[0], capacity), dtype=np.float64)
+            data[:, :self.size] = self._data[:, :self.size]
+            self._data = data
+        for row, values in zip(self._data, columns):
+            row[self.size:self.size + n] = values
+        self.size += n
+
+    def columns(self, start=0):
+        return tuple(self._data[:, start:self.size])
+
+
+class DecimatedLine:
+    """
+    Линия, хранящая полные массивы и рисующая прореженную копию
+
+    При изменении пределов осей (масштаб, сдвиг) видимый участок
+    заново прореживается из полных данных под ширину холста. Если
+    задан resample(x_min, x_max, n) -> (x, y) (плотное решение), то при
+    сильном увеличении, когда точек таблицы в окне меньше бюджета,
+    окно заново выбирается из него.
+
+    append() дописывает порцию потокового решения: прореживается только
+    порция и уже нарисованные вершины (не все данные), поэтому каждое
+    обновление стоит O(порция + бюджет).
+
+    Args:
+        line: объект Line2D
+        method: 'minmax' (по столбцам пикселей) или 'lttb'
+        parametric: кривая x(t), y(t) (фазовый портрет): x не монотонен
+    """
+
+    def __init__(self, line, method='minmax', parametric=False, max_points=MAX_POINTS):
+        self.line = line
+        self.ax = line.axes
+        self.method = method
+        self.parametric = parametric
+        self.max_points = max_points
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.t = np.empty(0)
+        self.resample = None
+        self._refreshing = False
+        # Данные потокового решения и нарисованные вершины (см. append)
+        self._buffer = None
+        self._shown = None
+
+        self.ax.callbacks.connect('xlim_changed', self._on_limits)
+        if parametric:
+            self.ax.callbacks.connect('ylim_changed', self._on_limits)
+
+    def set_data(self, x, y, t=None):
+        """Задать полные данные и нарисовать их целиком (для автомасштаба)"""
+        self._buffer = None
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.t = np.arange(len(self.x), dtype=np.float64) if t is None else np.asarray(t, dtype=np.float64)
+        self.refresh(full=True)
+
+    def append(self, x, y, t=None):
+        """Дописать порцию в конец (данные - в AppendBuffer, прореживается только новое)"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        start = len(self.x)
+        t = np.arange(start, start + len(x), dtype=np.float64) if t is None else np.asarray(t, dtype=np.float64)
+        if self._buffer is None:
+            self._buffer = AppendBuffer(3)
+            self._buffer.append(self.x, self.y, self.t)
+        self._buffer.append(x, y, t)
+        self.x, self.y, self.t = self._buffer.columns()
+
+        budget = pixel_budget(self.ax, max_points=self.max_points)
+        if self._shown is None:
+            # Первая порция после set_data/масштабирования: все прежние данные
+            x, y, t = self.x, self.y, self.t
+        else:
+            x, y, t = (np.concatenate(pair) for pair in zip(self._shown, (x, y, t)))
+
+        # Нарисованное уже прорежено: прореживается оно вместе с порцией
+        if len(x) > 2 * budget:
+            if self.parametric:
+                idx = curve_indices(t, x, y, n_points=budget)
+            else:
+                idx = decimate_indices(x, y, budget, self.method)
+            x, y, t = x[idx], y[idx], t[idx]
+        self._shown = (x, y, t)
+        self.line.set_data(x, y)
+
+    @contextmanager
+    def hold(self):
+        """Не перепрореживать при изменении пределов (автомасштаб после append)"""
+        refreshing, self._refreshing = self._refreshing, True
+        try:
+            yield
+        finally:
+            self._refreshing = refreshing
+
+    def refresh(self, full=False):
+        """Перепроредить видимый участок"""
+        if self._refreshing:
+            return
+        self._refreshing = True
+        self._shown = None
+        try:
+            if len(self.x) == 0:
+                self.line.set_data([], [])
+                return
+
+            budget = pixel_budget(self.ax, max_points=self.max_points)
+            if self.parametric:
+                x, y = self._parametric(budget, full)
+            else:
+                x, y = self._series(budget, full)
+            self.line.set_data(x, y)
+        finally:
+            self._refreshing = False
+
+    def _series(self, budget, full):
+        n = len(self.x)
+        lo, hi = 0, n
+        if not full:
+            xmin, xmax = sorted(self.ax.get_xlim())
+            lo = max(int(np.searchsorted(self.x, xmin, 'left')) - 1, 0)
+            hi = min(int(np.searchsorted(self.x, xmax, 'right')) + 1, n)
+            if self.resample is not None and hi - lo < budget // 2:
+                return self.resample(xmin, xmax, budget)
+
+        idx = lo + decimate_indices(self.x[lo:hi], self.y[lo:hi], budget, self.method)
+        return self.x[idx], self.y[idx]
+
+    def _parametric(self, budget, full):
+        if full:
+            visible = np.arange(len(self.x))
+        else:
+            xmin, xmax = sorted(self.ax.get_xlim())
+            ymin, ymax = sorted(self.ax.get_ylim())
+            inside = (self.x >= xmin) & (self.x <= xmax) & (self.y >= ymin) & (self.y <= ymax)
+            # Соседи видимых точек нужны, чтобы отрезки доходили до края осей
+            mask = inside.copy()
+            mask[1:] |= inside[:-1]
+            mask[:-1] |= inside[1:]
+            visible = np.flatnonzero(mask)
+
+        selected = visible[curve_indices(self.t[visible], self.x[visible], self.y[visible], n_points=budget)]
+
+        if len(selected) == 0:
+            return np.empty(0), np.empty(0)
+
+        # Разрывы между непрерывными видимыми участками рисуем как NaN
+        runs = np.concatenate([[0], np.cumsum(np.diff(visible) > 1)])
+        sel_runs = runs[np.searchsorted(visible, selected)]
+        breaks = np.flatnonzero(np.diff(sel_runs)) + 1
+
+        x = np.insert(self.x[selected], breaks, np.nan)
+        y = np.insert(self.y[selected], breaks, np.nan)
+        return x, y
+
+    def _on_limits(self, ax):
+        self.refresh()
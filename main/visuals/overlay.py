@@ -0,0 +1,47 @@
+# overlay.py
+import numpy as np
+from matplotlib.collections import LineCollection
+
+# Корзин превью на одну траекторию в зависимости от числа наложений
+OVERLAY_MAX_POINTS = 256
+OVERLAY_VERTEX_BUDGET = 200000
+
+
+def overlay_points(n_runs):
+    """Число корзин превью на траекторию, чтобы общий объем вершин был ограничен"""
+    per_run = OVERLAY_VERTEX_BUDGET // max(n_runs, 1) // 2
+    return int(np.clip(per_run, 32, OVERLAY_MAX_POINTS))
+
+
+def preview_polyline(preview):
+    """
+    Ломаная (N, 2) из превью хранилища
+
+    Огибающая min/max рисуется поочередно min, max в каждой корзине -
+    так же, как прореживание minmax на основных графиках.
+    """
+    t = np.asarray(preview['t'], dtype=np.float64)
+    y_min = np.asarray(preview['y_min'], dtype=np.float64)
+    if preview.get('exact'):
+        return np.column_stack([t, y_min])
+
+    y_max = np.asarray(preview['y_max'], dtype=np.float64)
+    return np.column_stack([np.repeat(t, 2), np.column_stack([y_min, y_max]).ravel()])
+
+
+def overlay_previews(ax, previews, cmap='viridis', linewidth=1.0, alpha=0.6):
+    """
+    Все траектории одной LineCollection с цветом на траекторию
+
+    Args:
+        previews: список превью ODEStorage.load_previews
+
+    Returns:
+        LineCollection (массив значений - порядковый номер траектории)
+    """
+    lines = [preview_polyline(preview) for preview in previews]
+    collection = LineCollection(lines, cmap=cmap, linewidths=linewidth, alpha=alpha)
+    collection.set_array(np.arange(len(lines), dtype=np.float64))
+    ax.add_collection(collection, autolim=True)
+    ax.autoscale_view()
+    return collection
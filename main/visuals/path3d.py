@@ -0,0 +1,244 @@
+# path3d.py
+import numpy as np
+from matplotlib.ticker import NullFormatter
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+from main.visuals.decimation import curve_indices
+
+# Вершин при вращении и в покое
+ROTATE_POINTS = 400
+DETAIL_POINTS = 100000
+# Траектории сравнения: вершин на все траектории и наименьшее число
+# на одну в покое и при вращении
+MULTI_DETAIL_POINTS = 4000
+MIN_DETAIL_PATH_POINTS = 500
+MIN_ROTATE_PATH_POINTS = 50
+# Число градаций цвета: столько ломаных получает коллекция. При вращении
+# кусков мало; длинный кусок Agg обводит дольше, поэтому вершин тоже меньше
+COLOR_STEPS = 256
+ROTATE_COLOR_STEPS = 16
+
+
+def path_segments(x, y, z, n_pieces=COLOR_STEPS):
+    """
+    Ломаная, разбитая на n_pieces кусков для Line3DCollection
+
+    Каждый кусок - отдельный путь одного цвета; соседние куски
+    делят граничную вершину. Matplotlib создает объект Path на
+    каждый кусок при каждой проекции, поэтому кусков немного.
+
+    Returns:
+        (массив (n_pieces, piece + 1, 3), индексы середин кусков)
+    """
+    points = np.column_stack([x, y, z]).astype(np.float64)
+    n = len(points)
+    piece = max(1, -(-(n - 1) // n_pieces))
+    starts = np.arange(0, n - 1, piece)
+    idx = np.minimum(starts[:, None] + np.arange(piece + 1), n - 1)
+    return points[idx], np.minimum(starts + piece // 2, n - 1)
+
+
+def set_limits_3d(ax, *ranges):
+    """Пределы осей по массивам x, y, z (коллекции не участвуют в автомасштабе)"""
+    setters = (ax.set_xlim, ax.set_ylim, ax.set_zlim)
+    for setter, values in zip(setters, ranges):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            continue
+        low, high = float(values.min()), float(values.max())
+        pad = (high - low) * 0.02 or 0.5
+        setter(low - pad, high + pad)
+
+
+def _set_tick_labels(ax, visible):
+    """
+    Скрыть или вернуть подписи делений 3D-осей
+
+    Текст подписей - самая дорогая часть кадра пустых 3D-осей, поэтому
+    при вращении они скрываются. Исходные форматтеры хранятся на самих
+    осях: несколько траекторий на одних осях скрывают и возвращают их один раз.
+    """
+    axes = (ax.xaxis, ax.yaxis, ax.zaxis)
+    saved = getattr(ax, '_rotate_formatters', None)
+    if not visible and saved is None:
+        ax._rotate_formatters = [axis.get_major_formatter() for axis in axes]
+        for axis in axes:
+            axis.set_major_formatter(NullFormatter())
+    elif visible and saved is not None:
+        for axis, formatter in zip(axes, saved):
+            axis.set_major_formatter(formatter)
+        ax._rotate_formatters = None
+
+
+class RotatingCollection3D:
+    """
+    Line3DCollection с облегченным уровнем на время вращения
+
+    Пока пользователь вращает оси (кнопка мыши нажата), коллекция
+    получает уровень 'rotate' (меньше вершин, без сглаживания), а у осей
+    скрываются подписи делений; после отпускания - полная детализация.
+    Уровни - {'rotate'|'detail': (segments, colors или None)}, считаются один раз.
+    """
+
+    def __init__(self, ax, collection, levels):
+        self.ax = ax
+        self.collection = collection
+        self.levels = levels
+        self.level = 'detail'
+        # Замыкания (не bound-методы): matplotlib держит их сильной ссылкой,
+        # поэтому объект живет столько же, сколько фигура
+        canvas = ax.figure.canvas
+        self._cids = [
+            canvas.mpl_connect('button_press_event', lambda event: self._on_press(event)),
+            canvas.mpl_connect('button_release_event', lambda event: self._on_release(event)),
+        ]
+
+    def set_level(self, level):
+        """Переключить детализацию ('rotate' или 'detail')"""
+        if level == self.level:
+            return
+        segments, colors = self.levels[level]
+        self.collection.set_segments(segments)
+        if colors is not None:
+            self.collection.set_array(colors)
+        self.collection.set_antialiased(level == 'detail')
+        _set_tick_labels(self.ax, level == 'detail')
+        self.level = level
+
+    def _on_press(self, event):
+        if event.inaxes is self.ax:
+            self.set_level('rotate')
+
+    def _on_release(self, event):
+        if self.level != 'detail':
+            self.set_level('detail')
+            self.ax.figure.canvas.draw_idle()
+
+    def disconnect(self):
+        for cid in self._cids:
+            self.ax.figure.canvas.mpl_disconnect(cid)
+        self._cids = []
+
+
+class TimeColoredPath3D(RotatingCollection3D):
+    """
+    3D-траектория одним Line3DCollection с окраской по времени
+
+    При вращении рисуется прореженная копия на ROTATE_POINTS вершин
+    и ROTATE_COLOR_STEPS градаций цвета (см. RotatingCollection3D).
+    """
+
+    def __init__(self, ax, t, x, y, z=None, cmap='viridis', linewidth=1.5,
+                 rotate_points=ROTATE_POINTS, detail_points=DETAIL_POINTS, **kwargs):
+        # Траектория (t, x, y) или параметрическая (x, y, z) с цветом по t
+        if z is None:
+            x, y, z = t, x, y
+        t, x, y, z = (np.asarray(v, dtype=np.float64) for v in (t, x, y, z))
+
+        levels = {
+            'rotate': self._level(t, x, y, z, rotate_points, ROTATE_COLOR_STEPS),
+            'detail': self._level(t, x, y, z, detail_points, COLOR_STEPS),
+        }
+
+        segments, colors = levels['detail']
+        collection = Line3DCollection(segments, cmap=cmap, linewidths=linewidth, **kwargs)
+        collection.set_array(colors)
+        if len(t):
+            collection.set_clim(t[0], t[-1])
+        ax.add_collection3d(collection)
+        set_limits_3d(ax, x, y, z)
+
+        super().__init__(ax, collection, levels)
+
+    @staticmethod
+    def _level(t, x, y, z, n_points, n_pieces):
+        idx = curve_indices(t, x, y, z, n_points=n_points)
+        if len(idx) < 2:
+            return np.empty((0, 2, 3)), np.empty(0)
+        # Цвет куска - время его середины
+        segments, middles = path_segments(x[idx], y[idx], z[idx], n_pieces)
+        return segments, t[idx][middles]
+
+
+class MultiPath3D(RotatingCollection3D):
+    """
+    Несколько 3D-траекторий одной коллекцией, цвет на траекторию
+
+    Бюджет вершин уровня делится между траекториями; при вращении
+    (см. RotatingCollection3D) он тот же, что у одной траектории.
+    """
+
+    def __init__(self, ax, paths, colors, linewidth=2,
+                 rotate_points=ROTATE_POINTS, detail_points=MULTI_DETAIL_POINTS):
+        paths = [tuple(np.asarray(v, dtype=np.float64) for v in path) for path in paths]
+        levels = {
+            'rotate': (self._level(paths, rotate_points, MIN_ROTATE_PATH_POINTS), None),
+            'detail': (self._level(paths, detail_points, MIN_DETAIL_PATH_POINTS), None),
+        }
+
+        collection = Line3DCollection(levels['detail'][0], colors=colors, linewidths=linewidth)
+        ax.add_collection3d(collection)
+        if paths:
+            set_limits_3d(ax, *(np.concatenate(values) for values in zip(*paths)))
+
+        super().__init__(ax, collection, levels)
+
+    @staticmethod
+    def _level(paths, n_points, min_points):
+        per_path = max(min_points, n_points // max(len(paths), 1))
+        segments = []
+        for x, y, z in paths:
+            idx = curve_indices(x, y, z, n_points=per_path)
+            segments.append(np.column_stack([x[idx], y[idx], z[idx]]))
+        return segments
+
+
+def measure_rotation_latency(samples=100000, steps=20):
+    """
+    Задержка одного кадра вращения 3D-траектории (backend Agg)
+
+    Returns:
+        (медиана в мс при вращении, время полной перерисовки в мс,
+         медиана для пустых осей с подписями - для сравнения на этой машине)
+    """
+    import time
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    def rotate_frames(canvas, ax):
+        frames = []
+        for i in range(steps):
+            ax.view_init(elev=30, azim=-60 + 3 * i)
+            started = time.perf_counter()
+            canvas.draw()
+            frames.append((time.perf_counter() - started) * 1000)
+        return float(np.median(frames))
+
+    empty = Figure(figsize=(10, 8))
+    empty_ms = rotate_frames(FigureCanvasAgg(empty), empty.add_subplot(111, projection='3d'))
+
+    fig = Figure(figsize=(10, 8))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+
+    t = np.linspace(0, 1000, samples)
+    y = np.sin(t) + 0.5 * np.sin(2.2 * t)
+    yp = np.cos(t) + 1.1 * np.cos(2.2 * t)
+    path = TimeColoredPath3D(ax, t, y, yp)
+
+    started = time.perf_counter()
+    canvas.draw()
+    detail_ms = (time.perf_counter() - started) * 1000
+
+    path.set_level('rotate')
+    rotate_ms = rotate_frames(canvas, ax)
+
+    ok = rotate_ms < 50
+    print(f"{'✅' if ok else '❌'} {samples} точек: кадр вращения {rotate_ms:.1f} мс "
+          f"(пустые оси {empty_ms:.1f} мс), полная перерисовка {detail_ms:.1f} мс")
+    return rotate_ms, detail_ms, empty_ms
+
+
+if __name__ == "__main__":
+    measure_rotation_latency()
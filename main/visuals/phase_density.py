@@ -0,0 +1,108 @@
+# phase_density.py
+import numpy as np
+
+# С какого числа отсчетов режим 'auto' рисует плотность вместо линии
+DENSITY_THRESHOLD = 20000
+DEFAULT_BINS = 400
+CHUNK_SIZE = 100000
+
+PHASE_MODES = ('auto', 'line', 'density')
+
+
+def use_density(mode, n_samples):
+    """Рисовать ли фазовый портрет картой плотности"""
+    if mode == 'density':
+        return True
+    if mode == 'line':
+        return False
+    return n_samples > DENSITY_THRESHOLD
+
+
+class PhaseDensityAccumulator:
+    """
+    Двумерная гистограмма (y, y'), накапливаемая порциями
+
+    Стоимость отрисовки зависит только от размера сетки, а не от числа отсчетов.
+    """
+
+    def __init__(self, x_range, y_range, bins=DEFAULT_BINS):
+        self.nx, self.ny = (bins, bins) if np.isscalar(bins) else bins
+        self.x_range = (float(x_range[0]), float(x_range[1]))
+        self.y_range = (float(y_range[0]), float(y_range[1]))
+        self.counts = np.zeros((self.ny, self.nx), dtype=np.int64)
+
+    def add(self, x, y):
+        """Добавить порцию точек (точки вне диапазона отбрасываются)"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+
+        x0, x1 = self.x_range
+        y0, y1 = self.y_range
+        ix = np.floor((x - x0) / (x1 - x0) * self.nx)
+        iy = np.floor((y - y0) / (y1 - y0) * self.ny)
+
+        ok = np.isfinite(ix) & np.isfinite(iy)
+        ix, iy = ix[ok].astype(np.int64), iy[ok].astype(np.int64)
+        # Правая граница диапазона попадает в последнюю ячейку
+        ix[ix == self.nx] = self.nx - 1
+        iy[iy == self.ny] = self.ny - 1
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+
+        flat = iy[inside] * self.nx + ix[inside]
+        self.counts += np.bincount(flat, minlength=self.nx * self.ny).reshape(self.ny, self.nx)
+
+    def image(self, log=True):
+        """Массив для imshow: пустые ячейки маскируются"""
+        values = np.log1p(self.counts) if log else self.counts.astype(np.float64)
+        return np.ma.masked_equal(values, 0)
+
+    @property
+    def extent(self):
+        return (*self.x_range, *self.y_range)
+
+
+def _padded_range(values, padding=0.02):
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return -1.0, 1.0
+    low, high = float(np.min(finite)), float(np.max(finite))
+    pad = (high - low) * padding or 0.5
+    return low - pad, high + pad
+
+
+def accumulate_phase_density(y, y_prime, bins=DEFAULT_BINS, chunk_size=CHUNK_SIZE):
+    """Гистограмма фазовой траектории, построенная порциями по chunk_size"""
+    y = np.asarray(y, dtype=np.float64)
+    y_prime = np.asarray(y_prime, dtype=np.float64)
+
+    accumulator = PhaseDensityAccumulator(_padded_range(y), _padded_range(y_prime), bins)
+    for start in range(0, len(y), chunk_size):
+        accumulator.add(y[start:start + chunk_size], y_prime[start:start + chunk_size])
+    return accumulator
+
+
+def render_phase_density(ax, y, y_prime, bins=DEFAULT_BINS, log=True, cmap='magma', image=None):
+    """
+    Нарисовать карту плотности фазового портрета
+
+    Args:
+        image: существующий AxesImage для обновления (иначе создается новый)
+
+    Returns:
+        AxesImage
+    """
+    accumulator = accumulate_phase_density(y, y_prime, bins)
+    data = accumulator.image(log)
+
+    if image is None:
+        image = ax.imshow(data, origin='lower', extent=accumulator.extent,
+                          aspect='auto', cmap=cmap, interpolation='nearest')
+    else:
+        image.set_data(data)
+        image.set_extent(accumulator.extent)
+        image.set_clim(0, max(float(data.max()) if data.count() else 1.0, 1e-12))
+        image.set_visible(True)
+
+    ax.set_xlim(accumulator.x_range)
+    ax.set_ylim(accumulator.y_range)
+    return image
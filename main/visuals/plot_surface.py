@@ -0,0 +1,168 @@
+# plot_surface.py
+import gc
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from main.visuals.decimation import DecimatedLine
+from main.visuals.phase_density import use_density, render_phase_density
+
+
+class SolutionPlotSurface:
+    """
+    Постоянная поверхность основных графиков (решение + фазовый портрет)
+
+    Фигура, оси и линии создаются один раз; при новом решении
+    обновляются только данные линий. Фигура создается через
+    matplotlib.figure.Figure, поэтому pyplot ее не удерживает.
+    Линии рисуют прореженные данные (см. decimation.DecimatedLine).
+    Длинные фазовые траектории рисуются картой плотности
+    (phase_mode: 'auto', 'line' или 'density').
+    """
+
+    def __init__(self, parent=None, figsize=(10, 8), phase_mode='auto'):
+        self.phase_mode = phase_mode
+        self.fig = Figure(figsize=figsize)
+        self.ax1, self.ax2 = self.fig.subplots(2, 1)
+        self.fig.subplots_adjust(hspace=0.4)
+
+        # График решения
+        self.solution_line, = self.ax1.plot([], [], 'b-', linewidth=2, label='y(t)')
+        self.ax1.set_xlabel('Время t')
+        self.ax1.set_ylabel('y(t)')
+        self.ax1.set_title('Решение ОДУ')
+        self.ax1.grid(True, alpha=0.3)
+        self.ax1.legend()
+
+        # Фазовый портрет
+        self.phase_line, = self.ax2.plot([], [], 'r-', linewidth=1, label='Фазовый портрет')
+        self.ax2.set_xlabel('y')
+        self.ax2.set_ylabel("y'")
+        self.ax2.set_title('Фазовый портрет')
+        self.ax2.grid(True, alpha=0.3)
+        self.ax2.legend()
+        self.phase_placeholder = self.ax2.text(0.5, 0.5, 'Недостаточно данных\nдля фазового портрета',
+                                               ha='center', va='center', transform=self.ax2.transAxes,
+                                               visible=False)
+        # Карта плотности создается при первом использовании и затем переиспользуется
+        self.phase_image = None
+
+        # Прореживание под ширину холста, с пересчетом при масштабировании
+        self.solution_data = DecimatedLine(self.solution_line, method='minmax')
+        self.phase_data = DecimatedLine(self.phase_line, method='lttb', parametric=True)
+
+        if parent is not None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.fig, parent)
+        else:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.canvas = FigureCanvasAgg(self.fig)
+
+        self.visible = False
+
+    def update(self, t, y, phase_data=None, dense=None):
+        """
+        Обновить данные линий и перерисовать
+
+        Args:
+            dense: плотное решение (dense_output.DenseSolution): при
+                увеличении y(t) выбирается из него без пересчета
+        """
+        self.solution_data.resample = None if dense is None else (
+            lambda t_min, t_max, n: dense.zoom(t_min, t_max, n)[:2])
+        self.solution_data.set_data(t, y)
+        self._autoscale(self.ax1)
+
+        if phase_data and use_density(self.phase_mode, len(phase_data[1])):
+            _, y_phase, y_prime = phase_data
+            self.phase_data.set_data([], [])
+            self.phase_line.set_visible(False)
+            self.phase_image = render_phase_density(self.ax2, y_phase, y_prime, image=self.phase_image)
+            self.phase_placeholder.set_visible(False)
+        else:
+            self.phase_line.set_visible(True)
+            if self.phase_image is not None:
+                self.phase_image.set_visible(False)
+            if phase_data:
+                t_phase, y_phase, y_prime = phase_data
+                self.phase_data.set_data(y_phase, y_prime, t_phase)
+                self.phase_placeholder.set_visible(False)
+            else:
+                self.phase_data.set_data([], [])
+                self.phase_placeholder.set_visible(True)
+            self._autoscale(self.ax2)
+
+        self.canvas.draw_idle()
+
+    def append(self, t, y, yp):
+        """
+        Дописать порцию потокового решения (y(t) и фазовый портрет)
+
+        Прореживается только порция вместе с уже нарисованным; фазовый
+        портрет при потоке рисуется линией, карта плотности - по
+        окончательному решению (update).
+        """
+        self.solution_data.resample = None
+        self.solution_data.append(t, y)
+        if self.phase_image is not None:
+            self.phase_image.set_visible(False)
+        self.phase_line.set_visible(True)
+        self.phase_data.append(y, yp, t)
+        self.phase_placeholder.set_visible(len(self.phase_data.x) < 2)
+
+        with self.solution_data.hold(), self.phase_data.hold():
+            self._autoscale(self.ax1)
+            self._autoscale(self.ax2)
+        self.canvas.draw_idle()
+
+    def _autoscale(self, ax):
+        ax.relim(visible_only=True)
+        ax.autoscale_view()
+
+    def show(self):
+        """Показать холст в родительском фрейме"""
+        if not self.visible and hasattr(self.canvas, 'get_tk_widget'):
+            self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        self.visible = True
+
+    def hide(self):
+        """Скрыть холст, сохранив фигуру и линии"""
+        if self.visible and hasattr(self.canvas, 'get_tk_widget'):
+            self.canvas.get_tk_widget().pack_forget()
+        self.visible = False
+
+
+def check_plot_surface_leaks(iterations=300, points=2000):
+    """
+    Проверка утечек: сотни обновлений не должны создавать фигуры и линии
+
+    Returns:
+        True, если число фигур и линий не изменилось
+    """
+    import matplotlib.pyplot as plt
+
+    surface = SolutionPlotSurface()
+    figures_before = len(plt.get_fignums())
+    gc.collect()
+    tracked_before = sum(1 for obj in gc.get_objects() if isinstance(obj, Figure))
+
+    t = np.linspace(0, 20, points)
+    for i in range(iterations):
+        y = np.cos((1 + i / iterations) * t)
+        yp = np.gradient(y, t)
+        surface.update(t, y, (t, y, yp))
+        surface.canvas.draw()
+
+    gc.collect()
+    tracked_after = sum(1 for obj in gc.get_objects() if isinstance(obj, Figure))
+    figures_after = len(plt.get_fignums())
+    lines = len(surface.ax1.lines) + len(surface.ax2.lines)
+
+    ok = figures_after == figures_before and tracked_after == tracked_before and lines == 2
+    print(f"{'✅' if ok else '❌'} Фигур pyplot: {figures_before} → {figures_after}, "
+          f"объектов Figure: {tracked_before} → {tracked_after}, линий: {lines}")
+    return ok
+
+
+if __name__ == "__main__":
+    check_plot_surface_leaks()
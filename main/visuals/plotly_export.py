@@ -0,0 +1,149 @@
+# plotly_export.py
+import base64
+import json
+import os
+
+import numpy as np
+
+from main.db.preview import build_preview_levels, select_preview
+from main.visuals.decimation import curve_indices
+from main.visuals.overlay import preview_polyline
+
+# Вершин в трассе при первой отрисовке HTML и в статическом изображении
+INITIAL_POINTS = 2048
+STATIC_POINTS = 16384
+
+STATIC_FORMATS = ('.png', '.svg', '.pdf', '.jpg', '.jpeg', '.webp')
+
+# После первой отрисовки грубого уровня полные данные подставляются в трассы
+_FULL_DATA_SCRIPT = """
+(function() {
+    var gd = document.getElementById('{plot_id}');
+    var full = %s;
+    function decode(b64) {
+        var s = atob(b64), bytes = new Uint8Array(s.length);
+        for (var i = 0; i < s.length; i++) bytes[i] = s.charCodeAt(i);
+        return new Float32Array(bytes.buffer);
+    }
+    setTimeout(function() {
+        full.forEach(function(f) {
+            Plotly.restyle(gd, {x: [decode(f.x)], y: [decode(f.y)]}, [f.trace]);
+        });
+    }, 0);
+})();
+"""
+
+
+def is_static(path):
+    """Статическое изображение (kaleido) или HTML"""
+    return os.path.splitext(path)[1].lower() in STATIC_FORMATS
+
+
+def _plotly():
+    try:
+        import plotly.graph_objects as go
+    except ImportError as e:
+        raise RuntimeError("Для экспорта нужен пакет plotly (см. requirements.txt)") from e
+    return go
+
+
+def _encode(values):
+    return base64.b64encode(np.asarray(values, dtype=np.float32).tobytes()).decode('ascii')
+
+
+def _envelope_line(t, y, max_points):
+    """Уровень пирамиды превью в виде ломаной (или сами данные, если они короче)"""
+    preview = select_preview(build_preview_levels(t, y), max_points)
+    if preview is None:
+        return np.asarray(t, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    line = preview_polyline(preview)
+    return line[:, 0], line[:, 1]
+
+
+class PlotlyExport:
+    """
+    Фигура Plotly с трассами Scattergl и полными данными для догрузки
+
+    В HTML сначала рисуется грубый уровень (INITIAL_POINTS), затем
+    скрипт подставляет полные данные - WebGL рисует их сам.
+    """
+
+    def __init__(self, figure, full_data=None):
+        self.figure = figure
+        # (номер трассы, x, y) полных данных
+        self.full_data = full_data or []
+
+    def write_html(self, path, include_plotlyjs=True):
+        """Автономный HTML-файл (plotly.js встраивается в файл)"""
+        post_script = None
+        if self.full_data:
+            payload = [{'trace': trace, 'x': _encode(x), 'y': _encode(y)}
+                       for trace, x, y in self.full_data]
+            post_script = _FULL_DATA_SCRIPT % json.dumps(payload)
+
+        self.figure.write_html(path, include_plotlyjs=include_plotlyjs,
+                               post_script=post_script, full_html=True)
+        return path
+
+    def write_image(self, path, width=1400, height=900, scale=1):
+        """Статическое изображение через kaleido (формат по расширению)"""
+        try:
+            self.figure.write_image(path, width=width, height=height, scale=scale)
+        except (ImportError, ValueError) as e:
+            raise RuntimeError(f"Не удалось сохранить изображение (нужен kaleido): {e}") from e
+        return path
+
+    def save(self, path):
+        """HTML или изображение в зависимости от расширения файла"""
+        if is_static(path):
+            return self.write_image(path)
+        return self.write_html(path)
+
+
+def solution_export(t, y, title='Решение ОДУ', static=False):
+    """Экспорт y(t): огибающая для первой отрисовки, полные данные - следом"""
+    go = _plotly()
+    t = np.asarray(t, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    x0, y0 = _envelope_line(t, y, STATIC_POINTS if static else INITIAL_POINTS)
+    fig = go.Figure(go.Scattergl(x=x0, y=y0, mode='lines', name='y(t)', line=dict(width=1.5)))
+    fig.update_layout(title=title, xaxis_title='Время t', yaxis_title='y(t)', template='plotly_white')
+
+    full_data = [] if static or len(x0) == len(t) else [(0, t, y)]
+    return PlotlyExport(fig, full_data)
+
+
+def phase_export(t, y, y_prime, title='Фазовый портрет', static=False):
+    """Экспорт фазового портрета (LTTB-прореживание для первой отрисовки)"""
+    go = _plotly()
+    t, y, y_prime = (np.asarray(v, dtype=np.float64) for v in (t, y, y_prime))
+
+    idx = curve_indices(t, y, y_prime, n_points=STATIC_POINTS if static else INITIAL_POINTS)
+    fig = go.Figure(go.Scattergl(x=y[idx], y=y_prime[idx], mode='lines', name='Фазовый портрет',
+                                 line=dict(width=1, color='firebrick')))
+    fig.update_layout(title=title, xaxis_title='y', yaxis_title="y'", template='plotly_white')
+
+    full_data = [] if static or len(idx) == len(t) else [(0, y, y_prime)]
+    return PlotlyExport(fig, full_data)
+
+
+def overlay_export(previews, labels=None, title=None):
+    """
+    Экспорт наложения сохраненных симуляций
+
+    Args:
+        previews: список превью StorageManager.load_previews
+        labels: подписи по ID
+    """
+    go = _plotly()
+    labels = labels or {}
+
+    fig = go.Figure()
+    for preview in previews:
+        line = preview_polyline(preview)
+        fig.add_trace(go.Scattergl(x=line[:, 0], y=line[:, 1], mode='lines', line=dict(width=1),
+                                   name=labels.get(str(preview['id']), f"#{preview['id']}")))
+    fig.update_layout(title=title or f'Наложение {len(previews)} симуляций',
+                      xaxis_title='Время t', yaxis_title='y(t)', template='plotly_white')
+    return PlotlyExport(fig)
@@ -1,6 +1,5 @@
 # visual.py
 import sys
-import threading
 import tkinter as tk
 import traceback
 from datetime import datetime
@@ -10,8 +9,35 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 from main.db.storage_manager import StorageManager
+from main.logic.jobs import JobScheduler
+from main.visuals.decimation import AppendBuffer
+from main.visuals.overlay import overlay_points
+from main.visuals.phase_density import PHASE_MODES
 from main.visuals.visual_integrated import IntegratedVisualizations
 
+# Наибольший диапазон времени (решение считается и рисуется порциями)
+MAX_TIME_RANGE = 100000
+# Период опроса заданий расчета (прогресс и порции решения), мс
+JOB_POLL_MS = 50
+# Допуск установившегося режима для расчета "до установившегося режима"
+STEADY_TOL = 1e-4
+
+# Физические системы анимации (animation_export.EXPORT_KINDS)
+PHYSICS_SYSTEMS = {
+    'Пружинный маятник': 'spring',
+    'Математический маятник': 'pendulum',
+    'RLC-цепь': 'rlc',
+}
+
+JOB_STATE_NAMES = {
+    'queued': 'в очереди',
+    'running': 'идет',
+    'done': 'готово',
+    'error': 'ошибка',
+    'cancelled': 'отменено',
+    'timeout': 'превышено время',
+}
+
 
 class ODEVisualizer:
     def __init__(self, root, logic):
@@ -20,14 +46,24 @@ class ODEVisualizer:
 
         try:
             self.storage_manager = StorageManager()
+            self.storage_manager.attach_solver(self.logic)
             print(f"StorageManager initialized. DB path: {self.storage_manager.storage.db_path}")
         except Exception as e:
             print(f"Error initializing StorageManager: {e}")
             self.storage_manager = None
 
+        # Задания расчета (несколько расчетов одновременно, с отменой)
+        self.job_scheduler = JobScheduler()
+        self._job_data = {}
+        self._shown_job = None
+        self._jobs_changed = False
+        # Сколько точек показанного задания уже нарисовано (None - перерисовать)
+        self._stream_drawn = None
+
         self.setup_ui()
         self.viz_manager = IntegratedVisualizations(self.logic, self.plot_frame)
         plt.rcParams.update({'font.size': 10})
+        self._poll_jobs()
 
     def setup_storage_ui(self, control_frame):
         """Добавление UI для работы с хранилищем"""
@@ -50,6 +86,9 @@ class ODEVisualizer:
         ttk.Button(storage_frame, text="🔄 Импорт/Экспорт",
                    command=self.show_import_export_dialog).grid(row=4, column=0, sticky=tk.W + tk.E, pady=2)
 
+        ttk.Button(storage_frame, text="🧹 Уплотнить хранилище",
+                   command=self.compact_storage).grid(row=5, column=0, sticky=tk.W + tk.E, pady=2)
+
         storage_frame.columnconfigure(0, weight=1)
 
     def save_current_solution(self):
@@ -123,7 +162,7 @@ class ODEVisualizer:
 
     def show_simulation_history(self):
         """Показать историю симуляций"""
-        simulations = self.storage_manager.get_recent_simulations(limit=50)
+        simulations = self.storage_manager.get_recent_simulations(limit=1000)
 
         if not simulations:
             messagebox.showinfo("История", "Нет сохраненных симуляций")
@@ -172,6 +211,12 @@ class ODEVisualizer:
                    command=lambda: self.delete_selected_simulation(tree)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Экспорт",
                    command=lambda: self.export_selected_simulation(tree)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Похожие",
+                   command=lambda: self.show_similar_simulations(tree)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Наложить выбранные",
+                   command=lambda: self.overlay_selected_simulations(tree)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Наложение в HTML",
+                   command=lambda: self.export_overlay_plotly(tree)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Закрыть",
                    command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
         button_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -192,6 +237,97 @@ class ODEVisualizer:
         else:
             messagebox.showerror("Ошибка", "Не удалось загрузить симуляцию")
 
+    def overlay_selected_simulations(self, tree):
+        """Наложить выбранные в истории симуляции на один график"""
+        selected = tree.selection()
+        if not selected:
+            messagebox.showwarning("Предупреждение", "Выберите одну или несколько симуляций")
+            return
+
+        labels = {}
+        for item_id in selected:
+            values = tree.item(item_id)['values']
+            labels[str(values[0])] = str(values[1])
+
+        ids = list(labels)
+        previews = self.storage_manager.load_previews(ids, max_points=overlay_points(len(ids)))
+        if not previews:
+            messagebox.showerror("Ошибка", "Не удалось загрузить траектории")
+            return
+
+        self.viz_manager.show_overlay_in_main(previews, labels)
+
+    def export_overlay_plotly(self, tree):
+        """Экспорт наложения выбранных симуляций в HTML (Plotly WebGL)"""
+        selected = tree.selection()
+        if not selected:
+            messagebox.showwarning("Предупреждение", "Выберите одну или несколько симуляций")
+            return
+
+        from tkinter import filedialog
+        from main.visuals.plotly_export import overlay_export
+
+        filepath = filedialog.asksaveasfilename(
+            title="Экспорт наложения",
+            defaultextension=".html",
+            initialfile=f"overlay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+            filetypes=[("HTML", "*.html"), ("PNG", "*.png"), ("SVG", "*.svg"), ("All files", "*.*")]
+        )
+        if not filepath:
+            return
+
+        labels = {str(tree.item(item_id)['values'][0]): str(tree.item(item_id)['values'][1])
+                  for item_id in selected}
+        previews = self.storage_manager.load_previews(list(labels), max_points=2048)
+
+        try:
+            overlay_export(previews, labels).save(filepath)
+            messagebox.showinfo("Успех", f"Наложение сохранено:\n{filepath}")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось экспортировать наложение: {e}")
+
+    def show_similar_simulations(self, tree):
+        """Показать симуляции, похожие на выбранную"""
+        selected = tree.selection()
+        if not selected:
+            messagebox.showwarning("Предупреждение", "Выберите симуляцию")
+            return
+
+        item = tree.item(selected[0])
+        sim_id = item['values'][0]
+
+        similar = self.storage_manager.find_similar(str(sim_id), k=10)
+        if not similar:
+            messagebox.showinfo("Похожие симуляции", "Похожие симуляции не найдены")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Похожие на симуляцию {sim_id}")
+        dialog.geometry("700x350")
+
+        columns = ('ID', 'Название', 'Тип', 'Расстояние')
+        result_tree = ttk.Treeview(dialog, columns=columns, show='headings', height=10)
+        for col in columns:
+            result_tree.heading(col, text=col)
+            result_tree.column(col, width=120)
+
+        for sim in similar:
+            result_tree.insert('', tk.END, values=(
+                sim['id'],
+                sim['name'][:30],
+                sim.get('equation_type', ''),
+                f"{sim['distance']:.4f}"
+            ))
+
+        result_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        button_frame = ttk.Frame(dialog)
+        ttk.Button(button_frame, text="Загрузить",
+                   command=lambda: self.load_selected_simulation(result_tree)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Закрыть",
+                   command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+
     def _load_simulation_into_ui(self, sim_data):
         """Загрузка симуляции в UI"""
         metadata = sim_data['metadata']
@@ -236,11 +372,16 @@ class ODEVisualizer:
             self.t_min.set(metadata['t_range'][0])
             self.t_max.set(metadata['t_range'][1])
 
+        # Решение, сохраненное как рецепт, могло не пересчитаться
+        if not results.get('success'):
+            messagebox.showwarning("Предупреждение",
+                                   f"Решение не восстановлено: {results.get('error', 'нет данных')}")
+
         # Устанавливаем решение
         self.logic.current_solution = results
 
         # Обновляем графики
-        self.plot_solution(results)
+        self.plot_solution(self.logic.current_solution)
         self.show_analysis()
 
     def show_storage_stats(self):
@@ -258,6 +399,7 @@ class ODEVisualizer:
 
     📁 Общая информация:
     • Всего симуляций: {stats.get('total_simulations', 0)}
+    • Хранятся как рецепт: {stats.get('recipe_only_simulations', 0)}
     • Последний ID: {stats.get('last_id', 0)}
     • Создано: {stats.get('created_at', 'N/A')}
     • Обновлено: {stats.get('updated_at', 'N/A')}
@@ -293,6 +435,18 @@ class ODEVisualizer:
             traceback.print_exc()
             messagebox.showerror("Ошибка", f"Не удалось получить статистику: {e}")
 
+    def compact_storage(self):
+        """Применить правила хранения и уплотнить хранилище"""
+        if not self.storage_manager:
+            messagebox.showwarning("Предупреждение", "Хранилище недоступно")
+            return
+
+        report = self.storage_manager.compact_now()
+        messagebox.showinfo("Уплотнение хранилища",
+                            f"Удалено симуляций: {report['removed']}\n"
+                            f"Осталось: {report['remaining']}\n"
+                            f"Освобождено: {report['bytes_freed']} байт")
+
     def show_search_dialog(self):
         """Диалог поиска симуляций"""
         if not self.storage_manager:
@@ -522,6 +676,34 @@ class ODEVisualizer:
         ttk.Button(viz_control_frame, text="📊 Сравнительный анализ",
                    command=self.show_comparison_viz).pack(fill=tk.X, pady=2)
 
+        system_frame = ttk.Frame(viz_control_frame)
+        system_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(system_frame, text="Система анимации:").pack(side=tk.LEFT)
+        self.physics_system_var = tk.StringVar(value=next(iter(PHYSICS_SYSTEMS)))
+        ttk.Combobox(system_frame, textvariable=self.physics_system_var, width=22,
+                     values=list(PHYSICS_SYSTEMS), state="readonly").pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(viz_control_frame, text="🎞 Экспорт анимации",
+                   command=self.export_physics_animation).pack(fill=tk.X, pady=2)
+
+        ttk.Button(viz_control_frame, text="🎚 Исследование параметров",
+                   command=self.show_interactive_explorer).pack(fill=tk.X, pady=2)
+
+        ttk.Button(viz_control_frame, text="📉 Резонансная кривая",
+                   command=self.show_frequency_response).pack(fill=tk.X, pady=2)
+
+        ttk.Button(viz_control_frame, text="🌐 Экспорт Plotly (HTML/PNG)",
+                   command=self.export_plotly).pack(fill=tk.X, pady=2)
+
+        phase_frame = ttk.Frame(viz_control_frame)
+        phase_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(phase_frame, text="Фазовый портрет:").pack(side=tk.LEFT)
+        self.phase_mode_var = tk.StringVar(value='auto')
+        phase_combo = ttk.Combobox(phase_frame, textvariable=self.phase_mode_var, width=10,
+                                   values=PHASE_MODES, state="readonly")
+        phase_combo.pack(side=tk.LEFT, padx=5)
+        phase_combo.bind('<<ComboboxSelected>>', self.on_phase_mode_changed)
+
         ttk.Button(viz_control_frame, text="❌ Очистить визуализации",
                    command=self.clear_visualizations).pack(fill=tk.X, pady=2)
 
@@ -532,6 +714,12 @@ class ODEVisualizer:
             return
         self.plot_solution(self.logic.current_solution)
 
+    def on_phase_mode_changed(self, event=None):
+        """Смена режима фазового портрета: линия или карта плотности"""
+        self.viz_manager.set_phase_mode(self.phase_mode_var.get())
+        if self.logic.current_solution and self.logic.current_solution['success']:
+            self.plot_solution(self.logic.current_solution)
+
     def show_physics_viz(self):
         """Физическая визуализация"""
         if not self.logic.current_solution or not self.logic.current_solution['success']:
@@ -611,6 +799,12 @@ class ODEVisualizer:
         self.t_max = tk.DoubleVar(value=20.0)
         ttk.Entry(time_frame, textvariable=self.t_max, width=8).grid(row=0, column=3, padx=5)
 
+        # Остановка на установившемся режиме: показывается только его окно,
+        # длительность переходного процесса - в анализе решения
+        self.until_steady = tk.BooleanVar(value=False)
+        ttk.Checkbutton(time_frame, text="До установившегося режима",
+                        variable=self.until_steady).grid(row=1, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+
         # Кнопки
         button_frame = ttk.Frame(parent)
         button_frame.grid(row=20, column=0, sticky=tk.W + tk.E, pady=20)
@@ -619,11 +813,35 @@ class ODEVisualizer:
                    command=self.calculate).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(button_frame, text="Очистить",
                    command=self.clear_plots).pack(side=tk.LEFT)
+        self.progress_label = ttk.Label(button_frame, text="")
+        self.progress_label.pack(side=tk.LEFT, padx=10)
 
         # Информация
         self.info_text = tk.Text(parent, height=8, width=35)
         self.info_text.grid(row=21, column=0, sticky=tk.W + tk.E, pady=10)
 
+        # Задания расчета
+        jobs_frame = ttk.LabelFrame(parent, text="Расчеты", padding=5)
+        jobs_frame.grid(row=22, column=0, sticky=tk.W + tk.E, pady=5)
+
+        self.jobs_tree = ttk.Treeview(jobs_frame, columns=('name', 'state', 'progress'),
+                                      show='headings', height=4)
+        self.jobs_tree.heading('name', text='Расчет')
+        self.jobs_tree.heading('state', text='Состояние')
+        self.jobs_tree.heading('progress', text='%')
+        self.jobs_tree.column('name', width=140)
+        self.jobs_tree.column('state', width=100)
+        self.jobs_tree.column('progress', width=45, anchor=tk.E)
+        self.jobs_tree.pack(fill=tk.X)
+        self.jobs_tree.bind('<Double-1>', self.show_selected_job)
+
+        ttk.Button(jobs_frame, text="Отменить",
+                   command=self.cancel_selected_jobs).pack(side=tk.LEFT, pady=(5, 0))
+        ttk.Button(jobs_frame, text="Показать",
+                   command=self.show_selected_job).pack(side=tk.LEFT, padx=5, pady=(5, 0))
+        ttk.Button(jobs_frame, text="Убрать завершенные",
+                   command=self.clear_finished_jobs).pack(side=tk.LEFT, pady=(5, 0))
+
     def show_physics_animation(self):
         """Показ физической анимации"""
         if not self.logic.current_solution or not self.logic.current_solution['success']:
@@ -636,14 +854,15 @@ class ODEVisualizer:
             y = self.logic.current_solution['y_values']
 
             physics_viz = PhysicsVisualizer(self.logic)
-            eq_type = self.eq_type.get()
+            kind = PHYSICS_SYSTEMS[self.physics_system_var.get()]
 
-            if eq_type in ['harmonic', 'damped', 'forced']:
-                fig = physics_viz.create_spring_animation(t, y)
-            elif 'pendulum' in eq_type:  # если будешь добавлять маятник
+            if kind == 'pendulum':
                 fig = physics_viz.create_pendulum_animation(t, y)
+            elif kind == 'rlc':
+                # Заряд q = y, ток I = y'
+                fig = physics_viz.create_electric_circuit_animation(t, y, self.logic.derived().velocity())
             else:
-                fig = physics_viz.create_spring_animation(t, y)  # по умолчанию
+                fig = physics_viz.create_spring_animation(t, y)
 
             plt.show()
 
@@ -652,6 +871,111 @@ class ODEVisualizer:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка при создании анимации: {e}")
 
+    def export_physics_animation(self):
+        """Экспорт физической анимации в GIF/видео в фоновом процессе"""
+        if not self.logic.current_solution or not self.logic.current_solution['success']:
+            messagebox.showwarning("Предупреждение", "Сначала рассчитайте решение")
+            return
+
+        from tkinter import filedialog
+        from main.visuals.animation_export import AnimationExporter
+
+        filepath = filedialog.asksaveasfilename(
+            title="Экспорт анимации",
+            defaultextension=".gif",
+            initialfile=f"animation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.gif",
+            filetypes=[("GIF", "*.gif"), ("MP4 (ffmpeg)", "*.mp4"), ("All files", "*.*")]
+        )
+        if not filepath:
+            return
+
+        if not getattr(self, 'animation_exporter', None):
+            self.animation_exporter = AnimationExporter()
+            self._poll_animation_exports()
+
+        t = self.logic.current_solution['t_values']
+        y = self.logic.current_solution['y_values']
+        kind = PHYSICS_SYSTEMS[self.physics_system_var.get()]
+        # Для RLC-цепи: заряд q = y, ток I = y'
+        series = [y, self.logic.derived().velocity()] if kind == 'rlc' else [y]
+
+        # Окно прогресса с кнопкой отмены
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Экспорт анимации")
+        dialog.geometry("400x130")
+        ttk.Label(dialog, text=filepath).pack(pady=(10, 5))
+        progress = ttk.Progressbar(dialog, length=350, mode='determinate')
+        progress.pack(pady=5)
+
+        def on_progress(job_id, frame, total):
+            if dialog.winfo_exists():
+                progress.configure(maximum=total, value=frame)
+
+        def on_done(result):
+            if dialog.winfo_exists():
+                dialog.destroy()
+            if result['state'] == 'done':
+                messagebox.showinfo("Успех", f"Анимация сохранена:\n{result['path']}")
+            elif result['state'] == 'error':
+                messagebox.showerror("Ошибка", f"Не удалось экспортировать анимацию: {result['error']}")
+
+        job_id = self.animation_exporter.submit(kind, t, series, filepath,
+                                                on_progress=on_progress, on_done=on_done)
+
+        ttk.Button(dialog, text="Отмена",
+                   command=lambda: self.animation_exporter.cancel(job_id)).pack(pady=5)
+
+    def export_plotly(self):
+        """Экспорт решения или фазового портрета в HTML (Scattergl) или изображение"""
+        if not self.logic.current_solution or not self.logic.current_solution['success']:
+            messagebox.showwarning("Предупреждение", "Сначала рассчитайте решение")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Экспорт Plotly")
+        dialog.geometry("320x120")
+
+        kinds = {'Решение y(t)': 'solution', 'Фазовый портрет': 'phase'}
+        kind_var = tk.StringVar(value='Решение y(t)')
+        ttk.Label(dialog, text="Что экспортировать:").pack(pady=(10, 2))
+        ttk.Combobox(dialog, textvariable=kind_var, values=list(kinds), state="readonly").pack(pady=2)
+
+        def save():
+            from tkinter import filedialog
+            from main.visuals.plotly_export import solution_export, phase_export, is_static
+
+            kind = kinds[kind_var.get()]
+            filepath = filedialog.asksaveasfilename(
+                title="Экспорт Plotly",
+                defaultextension=".html",
+                initialfile=f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+                filetypes=[("HTML", "*.html"), ("PNG", "*.png"), ("SVG", "*.svg"),
+                           ("PDF", "*.pdf"), ("All files", "*.*")]
+            )
+            if not filepath:
+                return
+            dialog.destroy()
+
+            try:
+                if kind == 'phase':
+                    t, y, y_prime = self.logic.get_phase_portrait()
+                    export = phase_export(t, y, y_prime, static=is_static(filepath))
+                else:
+                    t, y = self.logic.derived().arrays()
+                    export = solution_export(t, y, static=is_static(filepath))
+                export.save(filepath)
+                messagebox.showinfo("Успех", f"Файл сохранен:\n{filepath}")
+            except Exception as e:
+                messagebox.showerror("Ошибка", f"Не удалось выполнить экспорт: {e}")
+
+        ttk.Button(dialog, text="Сохранить...", command=save).pack(pady=10)
+
+    def _poll_animation_exports(self):
+        """Периодическая доставка прогресса экспорта в GUI"""
+        if getattr(self, 'animation_exporter', None):
+            self.animation_exporter.poll()
+            self.root.after(100, self._poll_animation_exports)
+
     def show_3d_phase(self):
         """3D визуализация фазового пространства"""
         if not self.logic.current_solution or not self.logic.current_solution['success']:
@@ -688,10 +1012,18 @@ class ODEVisualizer:
                 'frequency': (0.1, 3.0, 0.5)
             }
 
-            viz_interactive = InteractiveVisualizer(self.logic)
-            fig = viz_interactive.create_parameter_explorer(
-                self._build_current_equation(),
-                param_ranges
+            eq_type = self.eq_type.get()
+            params = self._collect_parameters(eq_type)
+
+            # Визуализатор хранит решатель и слайдеры, пока окно открыто
+            self.viz_interactive = InteractiveVisualizer(self.logic, scheduler=self.job_scheduler)
+            fig = self.viz_interactive.create_parameter_explorer(
+                params.get('equation', self._build_current_equation()),
+                param_ranges,
+                equation_type=eq_type,
+                base_params=params,
+                initial_conditions=(self.y0.get(), self.yp0.get()),
+                t_range=(self.t_min.get(), self.t_max.get())
             )
             plt.show()
 
@@ -700,6 +1032,31 @@ class ODEVisualizer:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка при создании интерактивного исследователя: {e}")
 
+    def show_frequency_response(self):
+        """Резонансная кривая вынужденных колебаний"""
+        eq_type = self.eq_type.get()
+        params = self._collect_parameters(eq_type)
+        if eq_type != 'forced' and 'frequency' not in params.get('equation', ''):
+            messagebox.showwarning("Предупреждение",
+                                   "Резонансная кривая строится для вынужденных колебаний "
+                                   "(или пользовательского уравнения с параметром frequency)")
+            return
+
+        try:
+            from main.visuals.visual_interactive import InteractiveVisualizer
+
+            self.viz_response = InteractiveVisualizer(self.logic)
+            fig = self.viz_response.create_frequency_response(
+                eq_type, params, (0.1, 3.0),
+                initial_conditions=(self.y0.get(), self.yp0.get())
+            )
+            plt.show()
+
+        except ImportError as e:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить модуль резонансной кривой: {e}")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Ошибка при построении резонансной кривой: {e}")
+
     def show_bifurcation(self):
         """Бифуркационная диаграмма"""
         try:
@@ -1077,7 +1434,7 @@ class ODEVisualizer:
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
     def calculate(self):
-        """Расчет и визуализация в отдельном потоке"""
+        """Расчет и визуализация в фоновом задании"""
         try:
             # Собираем параметры
             eq_type = self.eq_type.get()
@@ -1091,78 +1448,128 @@ class ODEVisualizer:
                 messagebox.showerror("Ошибка ввода", validation_error)
                 return
 
-            # Блокируем кнопки на время расчета
-            self._set_ui_state(False)
-
-            # Запускаем расчет в отдельном потоке
-            thread = threading.Thread(
-                target=self._calculate_thread,
-                args=(eq_type, params, initial_conditions, t_range)
+            # Расчет - задание планировщика: порции решения рисуются по мере
+            # готовности, остальной интерфейс (и другие расчеты) не блокируется
+            options = {'steady_tol': STEADY_TOL} if self.until_steady.get() else {}
+            job_id = self.job_scheduler.submit_solve(
+                self.logic, eq_type, params, initial_conditions, t_range,
+                on_progress=self._on_job_progress, on_done=self._on_job_done, **options
             )
-            thread.daemon = True
-            thread.start()
+            self._job_data[job_id] = AppendBuffer(3)
+            self._shown_job = job_id
+            self._stream_drawn = None
+            self.progress_label.configure(text="Расчет: 0%")
+            self._refresh_job_list()
 
         except Exception as e:
             self._handle_error(f"Ошибка при запуске расчета: {str(e)}")
-            self._set_ui_state(True)
 
-    def _calculate_thread(self, eq_type, params, initial_conditions, t_range):
-        """Поток для расчета"""
-        try:
-            # Вычисляем
-            result = self.logic.solve_equation(eq_type, params, initial_conditions, t_range)
+    def _poll_jobs(self):
+        """Периодическая доставка прогресса заданий расчета в GUI"""
+        self.job_scheduler.poll()
 
-            # Обновляем GUI в главном потоке
-            self.root.after(0, self._handle_calculation_result, result)
+        data = self._job_data.get(self._shown_job)
+        if data is not None and len(data) != self._stream_drawn:
+            # Промежуточная картина: дорисовывается только новая часть решения
+            try:
+                appended = (self._stream_drawn is not None and
+                            self.viz_manager.append_solution_in_main(*data.columns(self._stream_drawn)) is not None)
+                if not appended:
+                    t_values, y_values, yp_values = data.columns()
+                    self.viz_manager.show_solution_in_main(t_values, y_values, (t_values, y_values, yp_values))
+                self._stream_drawn = len(data)
+            except Exception as e:
+                print(f"Ошибка при построении графиков: {e}")
+        if self._jobs_changed:
+            self._refresh_job_list()
+        self._jobs_changed = False
+
+        self.root.after(JOB_POLL_MS, self._poll_jobs)
+
+    def _on_job_progress(self, job, chunk):
+        """Порция решения задания (главный поток)"""
+        data = self._job_data.get(job.job_id)
+        if data is not None:
+            data.append(chunk['t_values'], chunk['y_values'], chunk['yp_values'])
+        if job.job_id == self._shown_job:
+            self.progress_label.configure(text=f"Расчет: {job.progress * 100:.0f}%")
+        self._jobs_changed = True
+
+    def _on_job_done(self, job):
+        """Завершение задания (главный поток)"""
+        self._job_data.pop(job.job_id, None)
+        self._jobs_changed = True
+        if job.job_id != self._shown_job:
+            return
 
-        except Exception as e:
-            self.root.after(0, self._handle_error, f"Ошибка в потоке расчета: {str(e)}")
+        self._shown_job = None
+        self.progress_label.configure(text="")
+        if job.state == 'done':
+            self.logic.current_solution = job.result
+            self._handle_calculation_result(job.result)
+        elif job.state == 'timeout':
+            messagebox.showwarning("Расчет остановлен", job.error)
+        elif job.state == 'error':
+            self._handle_calculation_result({'success': False, 'error': job.error})
+
+    def _refresh_job_list(self):
+        """Обновить список заданий расчета"""
+        tree = self.jobs_tree
+        jobs = self.job_scheduler.jobs()
+        known = set(tree.get_children())
+        for job in jobs:
+            iid = str(job.job_id)
+            values = (job.name, JOB_STATE_NAMES.get(job.state, job.state), f"{job.progress * 100:.0f}%")
+            if iid in known:
+                tree.item(iid, values=values)
+                known.discard(iid)
+            else:
+                tree.insert('', 0, iid=iid, values=values)
+        for iid in known:
+            tree.delete(iid)
+
+    def cancel_selected_jobs(self):
+        """Отменить выбранные задания"""
+        for iid in self.jobs_tree.selection():
+            self.job_scheduler.cancel(int(iid))
+        self._refresh_job_list()
+
+    def show_selected_job(self, event=None):
+        """Показать результат выбранного завершенного задания (или следить за идущим)"""
+        selection = self.jobs_tree.selection()
+        if not selection:
+            return
+        job = self.job_scheduler.job(int(selection[0]))
+        if job is None:
+            return
+        if job.state == 'done':
+            self._shown_job = None
+            self.progress_label.configure(text="")
+            self.logic.current_solution = job.result
+            self._handle_calculation_result(job.result)
+        elif not job.finished:
+            self._shown_job = job.job_id
+            self.progress_label.configure(text=f"Расчет: {job.progress * 100:.0f}%")
+            self._stream_drawn = None
+
+    def clear_finished_jobs(self):
+        """Убрать завершенные задания из списка"""
+        for job in self.job_scheduler.jobs():
+            if job.finished:
+                self.job_scheduler.forget(job.job_id)
+        self._refresh_job_list()
 
     def _handle_calculation_result(self, result):
         """Обработка результата расчета в главном потоке"""
-        try:
-            if result['success']:
-                self.plot_solution(result)
-                self.show_analysis()
-            else:
-                messagebox.showerror("Ошибка решения", f"Не удалось решить уравнение: {result['error']}")
-        finally:
-            # Разблокируем UI
-            self._set_ui_state(True)
+        if result['success']:
+            self.plot_solution(result)
+            self.show_analysis()
+        else:
+            messagebox.showerror("Ошибка решения", f"Не удалось решить уравнение: {result['error']}")
 
     def _handle_error(self, error_msg):
         """Обработка ошибки в главном потоке"""
         messagebox.showerror("Ошибка", error_msg)
-        self._set_ui_state(True)
-
-    def _set_ui_state(self, enabled):
-        """Блокировка/разблокировка UI"""
-        state = 'normal' if enabled else 'disabled'
-
-        # Блокируем все основные элементы управления
-        for widget in self.find_all_widgets(self.root):
-            if isinstance(widget, (ttk.Button, ttk.Entry, ttk.Combobox)):
-                try:
-                    # Не блокируем кнопку закрытия
-                    if hasattr(widget, 'winfo_class') and widget.winfo_class() == 'TButton':
-                        if 'рассчет' not in str(widget.cget('text')).lower():
-                            widget.configure(state=state)
-                except:
-                    pass
-
-        # Показываем/скрываем индикатор прогресса
-        if hasattr(self, 'progress_label'):
-            if enabled:
-                self.progress_label.pack_forget()
-            else:
-                self.progress_label.pack(pady=10)
-
-    def find_all_widgets(self, widget):
-        """Рекурсивно находит все виджеты"""
-        widgets = [widget]
-        for child in widget.winfo_children():
-            widgets.extend(self.find_all_widgets(child))
-        return widgets
 
     def _validate_inputs(self, params, initial_conditions, t_range):
         """Проверка корректности введенных данных"""
@@ -1172,8 +1579,8 @@ class ODEVisualizer:
         t_min, t_max = t_range
         if t_min >= t_max:
             errors.append("Начальное время должно быть меньше конечного")
-        if t_max - t_min > 1000:
-            errors.append("Слишком большой диапазон времени. Рекомендуется до 1000 единиц")
+        if t_max - t_min > MAX_TIME_RANGE:
+            errors.append(f"Слишком большой диапазон времени. Рекомендуется до {MAX_TIME_RANGE} единиц")
 
         # Проверка начальных условий
         y0, yp0 = initial_conditions
@@ -1340,41 +1747,13 @@ class ODEVisualizer:
             return
 
         try:
-            # Очищаем предыдущие визуализации
-            self.viz_manager._clear_visualization()
-
             t = result['t_values']
             y = result['y_values']
             phase_data = self.logic.get_phase_portrait()
 
-            # Создаем фигуру с двумя subplots
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
-            fig.subplots_adjust(hspace=0.4)
-
-            # График решения
-            ax1.plot(t, y, 'b-', linewidth=2, label='y(t)')
-            ax1.set_xlabel('Время t')
-            ax1.set_ylabel('y(t)')
-            ax1.set_title('Решение ОДУ')
-            ax1.grid(True, alpha=0.3)
-            ax1.legend()
-
-            # Фазовый портрет
-            if phase_data:
-                t_phase, y_phase, y_prime = phase_data
-                ax2.plot(y_phase.tolist(), y_prime.tolist(), 'r-', linewidth=1, label='Фазовый портрет')
-                ax2.set_xlabel('y')
-                ax2.set_ylabel("y'")
-                ax2.set_title('Фазовый портрет')
-                ax2.grid(True, alpha=0.3)
-                ax2.legend()
-            else:
-                ax2.text(0.5, 0.5, 'Недостаточно данных\nдля фазового портрета',
-                         ha='center', va='center', transform=ax2.transAxes)
-                ax2.set_title('Фазовый портрет')
-
-            # Встраиваем в интерфейс
-            self.viz_manager._embed_figure(fig)
+            # Фигура и линии переиспользуются, обновляются только данные;
+            # при увеличении y(t) выбирается из плотного решения
+            self.viz_manager.show_solution_in_main(t, y, phase_data, self.logic.dense_solution())
 
         except Exception as e:
             print(f"Ошибка при построении графиков: {e}")
@@ -1392,6 +1771,10 @@ class ODEVisualizer:
 Оценка периода: {analysis['period_estimate']:.4f}
 Время моделирования: {analysis['final_time']:.1f}
 """
+            if 'final_amplitude' in analysis:
+                info_text += f"Амплитуда последнего колебания: {analysis['final_amplitude']:.4f}\n"
+            if 'transient_time' in analysis:
+                info_text += f"Переходный процесс: {analysis['transient_time']:.2f}\n"
             self.info_text.delete(1.0, tk.END)
             self.info_text.insert(1.0, info_text)
 
@@ -1402,6 +1785,10 @@ class ODEVisualizer:
 
     def close(self):
         """Закрытие приложения"""
+        self.job_scheduler.shutdown()
+        if getattr(self, 'animation_exporter', None):
+            self.animation_exporter.shutdown()
+            self.animation_exporter = None
         self.logic.close()
         plt.close('all')
 
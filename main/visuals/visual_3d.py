@@ -3,6 +3,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
 
+from main.visuals.path3d import MultiPath3D, TimeColoredPath3D
+
 
 class ThreeDVisualizer:
     def __init__(self, logic):
@@ -13,8 +15,11 @@ class ThreeDVisualizer:
         fig = plt.figure(figsize=(10, 8))
         ax = fig.add_subplot(111, projection='3d')
 
-        # Создаем 3D траекторию
-        ax.plot(t_values, y_values, y_prime_values, 'b-', alpha=0.7, linewidth=2)
+        # 3D траектория одной коллекцией; при вращении рисуется прореженная копия
+        t_values = np.asarray(t_values, dtype=float)
+        y_values = np.asarray(y_values, dtype=float)
+        y_prime_values = np.asarray(y_prime_values, dtype=float)
+        TimeColoredPath3D(ax, t_values, y_values, y_prime_values, cmap='viridis', alpha=0.7, linewidth=2)
         ax.scatter(t_values[0], y_values[0], y_prime_values[0],
                    color='green', s=100, label='Начало')
         ax.scatter(t_values[-1], y_values[-1], y_prime_values[-1],
@@ -35,16 +40,14 @@ class ThreeDVisualizer:
 
         # Цветовая схема по времени
         colors = np.linspace(0, 1, len(x_values))
-
-        scatter = ax.scatter(x_values, y_values, z_values,
-                             c=colors, cmap='viridis', alpha=0.7)
+        path = TimeColoredPath3D(ax, colors, x_values, y_values, z_values, cmap='viridis', alpha=0.7)
 
         ax.set_xlabel('X')
         ax.set_ylabel('Y')
         ax.set_zlabel('Z')
         ax.set_title('Параметрическое движение в 3D')
 
-        plt.colorbar(scatter, label='Время')
+        fig.colorbar(path.collection, ax=ax, label='Время')
         return fig
 
     def plot_multiple_trajectories(self, trajectories):
@@ -54,9 +57,11 @@ class ThreeDVisualizer:
 
         colors = plt.cm.tab10(np.linspace(0, 1, len(trajectories)))
 
-        for i, (t, y, yp) in enumerate(trajectories):
-            ax.plot(t, y, yp, color=colors[i], linewidth=2,
-                    label=f'Траектория {i + 1}')
+        # Все траектории - одна коллекция с цветом на траекторию,
+        # при вращении - облегченный уровень
+        MultiPath3D(ax, trajectories, colors)
+        for i, color in enumerate(colors):
+            ax.plot([], [], [], color=color, linewidth=2, label=f'Траектория {i + 1}')
 
         ax.set_xlabel('Время')
         ax.set_ylabel('Положение')
@@ -4,6 +4,11 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 from main.visuals.visual_physics import PhysicsVisualizer
 from main.visuals.visual_3d import ThreeDVisualizer
+from main.visuals.plot_surface import SolutionPlotSurface
+from main.visuals.decimation import DecimatedLine
+from main.visuals.path3d import TimeColoredPath3D
+from main.visuals.overlay import overlay_previews
+from main.visuals.phase_density import use_density, render_phase_density
 import tkinter as tk
 from tkinter import ttk
 
@@ -12,6 +17,43 @@ class IntegratedVisualizations:
         self.logic = logic
         self.parent_frame = parent_frame
         self.current_visualization = None
+        self.solution_surface = None
+        # Прореживатели линий текущей фигуры (callbacks matplotlib держат слабые ссылки)
+        self._decimated_lines = []
+        # Режим фазового портрета: 'auto', 'line' или 'density'
+        self.phase_mode = 'auto'
+
+    def set_phase_mode(self, mode):
+        """Сменить режим фазового портрета"""
+        self.phase_mode = mode
+        if self.solution_surface is not None:
+            self.solution_surface.phase_mode = mode
+
+    def show_solution_in_main(self, t, y, phase_data=None, dense=None):
+        """Основные графики на постоянной поверхности (без пересоздания фигуры)"""
+        if self.solution_surface is None:
+            self.solution_surface = SolutionPlotSurface(self.parent_frame, phase_mode=self.phase_mode)
+
+        if self.current_visualization is not self.solution_surface.canvas:
+            self._clear_visualization()
+
+        self.solution_surface.update(t, y, phase_data, dense)
+        self.solution_surface.show()
+        self.current_visualization = self.solution_surface.canvas
+        return self.solution_surface.canvas
+
+    def append_solution_in_main(self, t, y, yp):
+        """
+        Дописать порцию потокового решения на основные графики
+
+        Returns:
+            холст или None, если основные графики сейчас не показаны
+            (тогда нужно show_solution_in_main со всеми данными)
+        """
+        if self.solution_surface is None or self.current_visualization is not self.solution_surface.canvas:
+            return None
+        self.solution_surface.append(t, y, yp)
+        return self.solution_surface.canvas
 
     def show_physics_in_main(self):
         """Показ физической анимации в основном окне"""
@@ -35,7 +77,7 @@ class IntegratedVisualizations:
             ax1.grid(True, alpha=0.3)
 
             # Рисуем начальное положение
-            y_current = y[0] if y else 0
+            y_current = y[0] if len(y) else 0
             ax1.plot([0, 0], [0, y_current], 'b-', linewidth=3, label='Пружина')
             mass = plt.Rectangle((-0.25, y_current - 0.25), 0.5, 0.5, color='red')
             ax1.add_patch(mass)
@@ -75,16 +117,15 @@ class IntegratedVisualizations:
             fig = plt.figure(figsize=(10, 8))
             ax = fig.add_subplot(111, projection='3d')
 
-            # Цветовая схема по времени
-            colors = np.linspace(0, 1, len(t))
-            scatter = ax.scatter(t, y, yp, c=colors, cmap='viridis', s=20)
+            # Одна коллекция с цветом по времени; при вращении - прореженная копия
+            path = TimeColoredPath3D(ax, t, y, yp, cmap='viridis', linewidth=2)
 
             ax.set_xlabel('Время (t)')
             ax.set_ylabel('Положение (y)')
             ax.set_zlabel('Скорость (y\')')
             ax.set_title('3D Фазовое пространство')
 
-            plt.colorbar(scatter, ax=ax, label='Время')
+            fig.colorbar(path.collection, ax=ax, label='Время')
             plt.tight_layout()
 
             return self._embed_figure(fig)
@@ -97,18 +138,19 @@ class IntegratedVisualizations:
         """Сравнительная визуализация в основном окне"""
         self._clear_visualization()
 
-        if not self.logic.current_solution:
+        derived = self.logic.derived()
+        if derived is None:
             return None
 
         try:
-            t = self.logic.current_solution['t_values']
-            y = self.logic.current_solution['y_values']
-            phase_data = self.logic.get_phase_portrait()
+            # Спектр, огибающая и скорость считаются один раз на решение
+            t, y = derived.arrays()
+            phase_data = derived.phase_portrait()
 
             fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 10))
 
             # 1. Основной график
-            ax1.plot(t, y, 'b-', linewidth=2)
+            self._decimated(ax1.plot([], [], 'b-', linewidth=2)[0], t, y)
             ax1.set_title('Решение y(t)')
             ax1.set_xlabel('Время')
             ax1.set_ylabel('y(t)')
@@ -117,16 +159,21 @@ class IntegratedVisualizations:
             # 2. Фазовый портрет
             if phase_data:
                 t_phase, y_phase, y_prime = phase_data
-                ax2.plot(y_phase, y_prime, 'r-')
+                if use_density(self.phase_mode, len(y_phase)):
+                    image = render_phase_density(ax2, y_phase, y_prime)
+                    fig.colorbar(image, ax=ax2, label='log(1 + N)')
+                else:
+                    self._decimated(ax2.plot([], [], 'r-')[0], y_phase, y_prime,
+                                    method='lttb', parametric=True, t=t_phase)
                 ax2.set_title('Фазовый портрет')
                 ax2.set_xlabel('y')
                 ax2.set_ylabel("y'")
                 ax2.grid(True, alpha=0.3)
 
             # 3. Амплитудный анализ
-            envelope = np.abs(y)
-            ax3.plot(t, envelope, 'g-', alpha=0.7, label='Огибающая')
-            ax3.plot(t, y, 'b-', alpha=0.3, label='Сигнал')
+            envelope = derived.envelope()
+            self._decimated(ax3.plot([], [], 'g-', alpha=0.7, label='Огибающая')[0], t, envelope)
+            self._decimated(ax3.plot([], [], 'b-', alpha=0.3, label='Сигнал')[0], t, y)
             ax3.set_title('Амплитудная огибающая')
             ax3.set_xlabel('Время')
             ax3.legend()
@@ -134,12 +181,8 @@ class IntegratedVisualizations:
 
             # 4. Частотный анализ (спектр)
             if len(y) > 1:
-                from scipy.fft import fft, fftfreq
-                N = len(y)
-                T = t[1] - t[0]
-                yf = fft(y)
-                xf = fftfreq(N, T)[:N // 2]
-                ax4.plot(xf, 2.0 / N * np.abs(yf[0:N // 2]))
+                frequencies, amplitudes = derived.spectrum()
+                self._decimated(ax4.plot([], [])[0], frequencies, amplitudes)
                 ax4.set_title('Частотный спектр')
                 ax4.set_xlabel('Частота')
                 ax4.set_ylabel('Амплитуда')
@@ -152,6 +195,53 @@ class IntegratedVisualizations:
             print(f"Ошибка сравнительной визуализации: {e}")
             return None
 
+    def show_overlay_in_main(self, previews, labels=None):
+        """
+        Наложение сохраненных траекторий (по превью из хранилища)
+
+        Args:
+            previews: список превью StorageManager.load_previews
+            labels: подписи траекторий по ID (для легенды при малом числе)
+        """
+        self._clear_visualization()
+
+        if not previews:
+            return None
+
+        try:
+            fig, ax = plt.subplots(figsize=(12, 8))
+            collection = overlay_previews(ax, previews, cmap='tab10' if len(previews) <= 10 else 'viridis')
+
+            if len(previews) <= 10:
+                labels = labels or {}
+                for i, preview in enumerate(previews):
+                    ax.plot([], [], color=collection.cmap(collection.norm(i)),
+                            label=labels.get(str(preview['id']), f"#{preview['id']}"))
+                ax.legend()
+            else:
+                fig.colorbar(collection, ax=ax, label='Номер симуляции в выборке')
+
+            ax.set_title(f'Наложение {len(previews)} симуляций')
+            ax.set_xlabel('Время t')
+            ax.set_ylabel('y(t)')
+            ax.grid(True, alpha=0.3)
+
+            plt.tight_layout()
+            return self._embed_figure(fig)
+
+        except Exception as e:
+            print(f"Ошибка наложения траекторий: {e}")
+            return None
+
+    def _decimated(self, line, x, y, method='minmax', parametric=False, t=None):
+        """Задать данные линии через прореживатель и автомасштабировать оси"""
+        decimated = DecimatedLine(line, method=method, parametric=parametric)
+        decimated.set_data(x, y, t)
+        self._decimated_lines.append(decimated)
+        line.axes.relim()
+        line.axes.autoscale_view()
+        return decimated
+
     def _embed_figure(self, fig):
         """Встраивает фигуру в интерфейс"""
         canvas = FigureCanvasTkAgg(fig, self.parent_frame)
@@ -163,5 +253,12 @@ class IntegratedVisualizations:
     def _clear_visualization(self):
         """Очищает текущую визуализацию"""
         if self.current_visualization:
-            self.current_visualization.get_tk_widget().destroy()
+            if self.solution_surface and self.current_visualization is self.solution_surface.canvas:
+                # Постоянную поверхность только скрываем
+                self.solution_surface.hide()
+            else:
+                self.current_visualization.get_tk_widget().destroy()
+                # Закрываем фигуру, иначе pyplot удерживает ее навсегда
+                plt.close(self.current_visualization.figure)
+                self._decimated_lines = []
             self.current_visualization = None
\ No newline at end of file
@@ -5,76 +5,218 @@ import numpy as np
 
 
 class InteractiveVisualizer:
-    def __init__(self, logic):
+    def __init__(self, logic, scheduler=None):
         self.logic = logic
+        # Планировщик заданий решения (jobs.JobScheduler) общий с главным окном
+        self.scheduler = scheduler
         self.fig = None
         self.current_solution = None
 
-    def create_parameter_explorer(self, base_equation, param_ranges):
-        """Интерактивное исследование параметров"""
+    def create_parameter_explorer(self, base_equation, param_ranges, equation_type='forced',
+                                  base_params=None, initial_conditions=(1.0, 0.0), t_range=(0, 10),
+                                  use_surrogate=True):
+        """
+        Интерактивное исследование параметров на реальном решателе
+
+        Движение слайдера только ставит запрос: грубое решение приходит
+        сразу, точное - после паузы (см. logic.explorer.ProgressiveSolver).
+        С use_surrogate в фоне считается сетка решений по параметрам
+        слайдеров; когда она готова, при перетаскивании показывается
+        интерполяция по сетке, а при отпускании - точное решение.
+
+        Args:
+            base_equation: уравнение (для 'custom' - строка с символами omega, beta, ...)
+            param_ranges: {имя: (min, max, начальное значение)}
+            equation_type: тип уравнения
+            base_params: остальные параметры уравнения
+        """
+        import queue
+        from main.logic.explorer import ProgressiveSolver, explorer_parameters
+        from main.logic.surrogate import ParameterSurrogate
+
+        base_params = dict(base_params or {})
+        if equation_type == 'custom':
+            base_params['equation'] = base_equation
+
+        # Слайдеры только для параметров, от которых зависит уравнение
+        names = explorer_parameters(equation_type, base_equation)
+        param_ranges = {name: param_ranges[name] for name in names if name in param_ranges}
+
         fig, ax = plt.subplots(figsize=(10, 7))
         plt.subplots_adjust(bottom=0.4)
+        self.fig = fig
 
         # Создаем слайдеры для каждого параметра
         sliders = []
-        slider_axes = []
-
         for i, (param_name, (min_val, max_val, init_val)) in enumerate(param_ranges.items()):
             slider_ax = plt.axes([0.25, 0.3 - i * 0.05, 0.65, 0.03])
+            init_val = base_params.get(param_name, init_val)
             slider = Slider(slider_ax, param_name, min_val, max_val, valinit=init_val)
             sliders.append((param_name, slider))
-            slider_axes.append(slider_ax)
 
         # Кнопка сброса
         reset_ax = plt.axes([0.8, 0.1, 0.1, 0.04])
         reset_button = Button(reset_ax, 'Сброс')
 
         # Начальный график
-        t_initial = np.linspace(0, 10, 100)
-        line, = ax.plot(t_initial, np.zeros_like(t_initial), 'r-', linewidth=2)
+        line, = ax.plot([], [], 'r-', linewidth=2)
         ax.set_xlabel('Время')
         ax.set_ylabel('y(t)')
         ax.set_title('Интерактивное исследование параметров')
         ax.grid(True, alpha=0.3)
 
-        def update(val=None):
-            # Собираем текущие значения параметров
-            params = {name: slider.val for name, slider in sliders}
-
-            # Решаем уравнение с новыми параметрами
-            # (здесь нужно интегрировать с логикой решения)
-            try:
-                # Временная заглушка - в реальности здесь вызов solver
-                t = np.linspace(0, 10, 100)
-                y = self._simulate_equation(params, t)
-                line.set_ydata(y)
+        # Сетка решений для мгновенного отклика (кэшируется на диске по семейству)
+        surrogate = None
+        if use_surrogate and param_ranges:
+            surrogate = ParameterSurrogate(
+                equation_type, {name: (low, high) for name, (low, high, _) in param_ranges.items()},
+                base_params, initial_conditions, t_range
+            )
+            surrogate.build(self.logic)
+        status = fig.text(0.02, 0.02, '', fontsize=9, color='gray')
+
+        # Результаты приходят из рабочего потока, рисуются по таймеру в потоке GUI
+        results = queue.Queue()
+        solver = ProgressiveSolver(
+            self.logic, equation_type, initial_conditions, t_range,
+            on_result=lambda *item: results.put(item), base_params=base_params,
+            surrogate=surrogate, scheduler=self.scheduler
+        )
+        titles = {
+            'surrogate': 'Интерполяция по сетке решений',
+            'preview': 'Предпросмотр (грубое решение)',
+            'full': 'Точное решение',
+        }
+
+        def poll():
+            if surrogate is not None and not surrogate.ready:
+                done, total = surrogate.progress
+                status.set_text(f'Сетка решений: {done}/{total}')
                 fig.canvas.draw_idle()
-            except Exception as e:
-                print(f"Ошибка: {e}")
+            elif status.get_text():
+                status.set_text('')
+                fig.canvas.draw_idle()
+
+            latest = None
+            while True:
+                try:
+                    latest = results.get_nowait()
+                except queue.Empty:
+                    break
+            if latest is None:
+                return
+
+            stage, generation, params, result = latest
+            if not result.get('success'):
+                ax.set_title(f"Ошибка решения: {result.get('error', '')}"[:80])
+            else:
+                line.set_data(result['t_values'], result['y_values'])
+                line.set_linestyle('-' if stage == 'full' else '--')
+                ax.relim()
+                ax.autoscale_view()
+                ax.set_title(titles[stage])
+            fig.canvas.draw_idle()
+
+        def update(val=None):
+            # Только постановка запроса: обработчик слайдера не ждет решателя
+            solver.request({name: float(slider.val) for name, slider in sliders})
 
         def reset(event):
             for name, slider in sliders:
                 slider.reset()
 
+        def on_close(event):
+            timer.stop()
+            solver.close()
+            if surrogate is not None:
+                surrogate.stop()
+
         # Подключаем обработчики
         for name, slider in sliders:
             slider.on_changed(update)
 
         reset_button.on_clicked(reset)
+        fig.canvas.mpl_connect('close_event', on_close)
+        # Отпускание слайдера - сразу точное решение (только если нажатие было на слайдере)
+        slider_axes = {slider.ax for _, slider in sliders}
+        dragging = False
+
+        def on_press(event):
+            nonlocal dragging
+            dragging = event.inaxes in slider_axes
+
+        def on_release(event):
+            nonlocal dragging
+            if dragging:
+                solver.commit()
+            dragging = False
+
+        fig.canvas.mpl_connect('button_press_event', on_press)
+        fig.canvas.mpl_connect('button_release_event', on_release)
+
+        timer = fig.canvas.new_timer(interval=30)
+        timer.add_callback(poll)
+        timer.start()
+
+        # Ссылки на виджеты и решатель живут вместе с визуализатором
+        self._explorer = (solver, timer, sliders, reset_button)
 
         # Первоначальное обновление
         update()
 
         return fig
 
-    def _simulate_equation(self, params, t):
-        """Заглушка для симуляции уравнения"""
-        # В реальной реализации здесь будет вызов Wolfram
-        omega = params.get('omega', 1.0)
-        beta = params.get('beta', 0.1)
+    def create_frequency_response(self, equation_type, base_params, frequency_range,
+                                  initial_conditions=(0.0, 0.0), points=None):
+        """
+        Резонансная кривая (амплитуда от частоты силы), строится по мере расчета
+
+        Проходы вверх и вниз по частоте считаются в фоне
+        (logic.frequency_response.FrequencyResponse); готовая кривая берется
+        из файла семейства без пересчета.
+        """
+        from main.logic.frequency_response import FrequencyResponse, DEFAULT_POINTS
+
+        response = FrequencyResponse(equation_type, base_params, frequency_range,
+                                     points=points or DEFAULT_POINTS,
+                                     initial_conditions=initial_conditions)
 
-        # Простая симуляция затухающих колебаний
-        return np.exp(-beta * t) * np.cos(omega * t)
+        fig, ax = plt.subplots(figsize=(10, 6))
+        self.fig = fig
+        up_line, = ax.plot([], [], 'b.-', linewidth=1.5, label='Ω ↑')
+        down_line, = ax.plot([], [], 'r.--', linewidth=1.5, label='Ω ↓')
+        ax.set_xlim(response.frequencies[0], response.frequencies[-1])
+        ax.set_xlabel('Частота силы Ω')
+        ax.set_ylabel('Амплитуда установившихся колебаний')
+        ax.set_title('Резонансная кривая')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        status = fig.text(0.02, 0.02, '', fontsize=9, color='gray')
+
+        def poll():
+            curve = response.curve()
+            up_line.set_data(curve['frequency'], curve['up'])
+            down_line.set_data(curve['frequency'], curve['down'])
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+            done, total = response.progress
+            status.set_text('' if done == total else f'Посчитано точек: {done}/{total}')
+            fig.canvas.draw_idle()
+
+        def on_close(event):
+            timer.stop()
+            response.stop()
+
+        fig.canvas.mpl_connect('close_event', on_close)
+        timer = fig.canvas.new_timer(interval=200)
+        timer.add_callback(poll)
+        timer.start()
+
+        response.build(self.logic)
+        self._response = (response, timer)
+        poll()
+
+        return fig
 
     def create_bifurcation_diagram(self, param_name, param_range, equation_template):
         """Диаграмма бифуркаций"""
@@ -4,16 +4,70 @@ import matplotlib.animation as animation
 from matplotlib.patches import Rectangle, Circle
 import numpy as np
 
+from main.visuals.decimation import minmax_indices
+
 
 class PhysicsVisualizer:
-    def __init__(self, logic):
+    def __init__(self, logic, fps=30, speed=1.0, trail_frames=300):
+        """
+        Args:
+            logic: объект ODELogic
+            fps: целевая частота кадров
+            speed: сколько единиц модельного времени проигрывается за секунду
+            trail_frames: длина следа (скользящее окно в кадрах)
+        """
         self.logic = logic
         self.fig = None
         self.animation = None
+        self.fps = fps
+        self.speed = speed
+        self.trail_frames = trail_frames
+        self.frame_interval = None
+
+    def _frame_plan(self, t_values, *series):
+        """
+        План кадров: массивы, выбранные по сетке времени кадров
+
+        Данные один раз переводятся в NumPy; выбирается не больше одного
+        отсчета на кадр, так что анимация идет в реальном времени
+        (с учетом speed) независимо от шага решения.
+
+        Returns:
+            (interval_ms, t_frames, [series_frames, ...])
+        """
+        t = np.asarray(t_values, dtype=float)
+        arrays = [np.asarray(values, dtype=float) for values in series]
+
+        duration = float(t[-1] - t[0]) if len(t) > 1 else 0.0
+        frame_dt = self.speed / self.fps
+        frame_times = t[0] + np.arange(int(duration / frame_dt) + 1) * frame_dt
+        frames = np.unique(np.clip(np.searchsorted(t, frame_times), 0, len(t) - 1))
+
+        interval = 1000.0 * duration / self.speed / len(frames) if duration > 0 else 1000.0 / self.fps
+        return max(1, int(round(interval))), t[frames], [values[frames] for values in arrays]
+
+    def _trail(self, k):
+        """Срез скользящего окна следа для кадра k (O(1), без копирования)"""
+        return slice(max(0, k - self.trail_frames), k + 1)
+
+    def _draw_overview(self, ax, t, values, style):
+        """Статичная полупрозрачная траектория целиком (прореженная)"""
+        idx = minmax_indices(values, 1000)
+        ax.plot(t[idx], values[idx], style, alpha=0.25, linewidth=1)
+
+    @staticmethod
+    def _padded_limits(values):
+        low, high = float(np.min(values)), float(np.max(values))
+        pad = 0.05 * (high - low) or 0.5
+        return low - pad, high + pad
 
     def create_spring_animation(self, t_values, y_values):
         """Анимация пружинного маятника"""
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+        interval, t_frames, (y_frames,) = self._frame_plan(t_values, y_values)
+        self.frame_interval = interval
+        t_full = np.asarray(t_values, dtype=float)
+        y_full = np.asarray(y_values, dtype=float)
 
         # Настройка осей
         ax1.set_xlim(-2, 2)
@@ -22,12 +76,13 @@ class PhysicsVisualizer:
         ax1.set_title('Пружинный маятник')
         ax1.grid(True, alpha=0.3)
 
-        ax2.set_xlim(min(t_values), max(t_values))
-        ax2.set_ylim(min(y_values), max(y_values))
+        ax2.set_xlim(t_full[0], t_full[-1])
+        ax2.set_ylim(*self._padded_limits(y_full))
         ax2.set_xlabel('Время')
         ax2.set_ylabel('Смещение')
         ax2.set_title('График колебаний')
         ax2.grid(True, alpha=0.3)
+        self._draw_overview(ax2, t_full, y_full, 'r-')
 
         # Создание объектов анимации
         spring, = ax1.plot([], [], 'b-', linewidth=2)
@@ -37,28 +92,25 @@ class PhysicsVisualizer:
         time_line, = ax2.plot([], [], 'r-', linewidth=2)
         current_point, = ax2.plot([], [], 'ro', markersize=8)
 
-        def animate(i):
-            # Ограничиваем индекс для плавности
-            idx = min(i, len(t_values) - 1)
-            y = y_values[idx]
+        def animate(k):
+            y = y_frames[k]
 
             # Обновление пружины
-            x_spring = [0, 0]
-            y_spring = [0, y]
-            spring.set_data(x_spring, y_spring)
+            spring.set_data([0, 0], [0, y])
 
             # Обновление массы
             mass.set_xy([-0.25, y - 0.25])
 
-            # Обновление графика
-            time_line.set_data(t_values[:idx], y_values[:idx])
-            current_point.set_data([t_values[idx]], [y_values[idx]])
+            # Обновление графика: след - скользящее окно
+            trail = self._trail(k)
+            time_line.set_data(t_frames[trail], y_frames[trail])
+            current_point.set_data([t_frames[k]], [y])
 
             return spring, mass, time_line, current_point
 
         self.animation = animation.FuncAnimation(
-            fig, animate, frames=len(t_values),
-            interval=50, blit=True, repeat=True
+            fig, animate, frames=len(t_frames),
+            interval=interval, blit=True, repeat=True
         )
 
         plt.tight_layout()
@@ -67,16 +119,23 @@ class PhysicsVisualizer:
     def create_pendulum_animation(self, t_values, theta_values):
         """Анимация математического маятника"""
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+        interval, t_frames, (theta_frames,) = self._frame_plan(t_values, theta_values)
+        self.frame_interval = interval
+        t_full = np.asarray(t_values, dtype=float)
+        theta_full = np.asarray(theta_values, dtype=float)
 
         ax1.set_xlim(-2, 2)
         ax1.set_ylim(-2, 1)
         ax1.set_aspect('equal')
         ax1.set_title('Математический маятник')
 
+        ax2.set_xlim(t_full[0], t_full[-1])
+        ax2.set_ylim(*self._padded_limits(theta_full))
         ax2.set_xlabel('Время')
         ax2.set_ylabel('Угол (рад)')
         ax2.set_title('Угловое смещение')
         ax2.grid(True, alpha=0.3)
+        self._draw_overview(ax2, t_full, theta_full, 'r-')
 
         # Создание маятника
         rod, = ax1.plot([], [], 'b-', linewidth=3)
@@ -88,29 +147,27 @@ class PhysicsVisualizer:
 
         L = 1.5  # Длина маятника
 
-        def animate(i):
-            idx = min(i, len(t_values) - 1)
-            theta = theta_values[idx]
-
-            # Координаты маятника
-            x_bob = L * np.sin(theta)
-            y_bob = -L * np.cos(theta)
+        # Координаты груза для всех кадров считаются сразу
+        x_bob = L * np.sin(theta_frames)
+        y_bob = -L * np.cos(theta_frames)
 
+        def animate(k):
             # Обновление стержня
-            rod.set_data([0, x_bob], [0, y_bob])
+            rod.set_data([0, x_bob[k]], [0, y_bob[k]])
 
             # Обновление груза
-            bob.center = (x_bob, y_bob)
+            bob.center = (x_bob[k], y_bob[k])
 
             # Обновление графика
-            angle_line.set_data(t_values[:idx], theta_values[:idx])
-            current_angle.set_data([t_values[idx]], [theta_values[idx]])
+            trail = self._trail(k)
+            angle_line.set_data(t_frames[trail], theta_frames[trail])
+            current_angle.set_data([t_frames[k]], [theta_frames[k]])
 
             return rod, bob, angle_line, current_angle
 
         self.animation = animation.FuncAnimation(
-            fig, animate, frames=len(t_values),
-            interval=50, blit=True, repeat=True
+            fig, animate, frames=len(t_frames),
+            interval=interval, blit=True, repeat=True
         )
 
         plt.tight_layout()
@@ -119,6 +176,11 @@ class PhysicsVisualizer:
     def create_electric_circuit_animation(self, t_values, q_values, i_values):
         """Визуализация RLC-цепи"""
         fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(15, 4))
+        interval, t_frames, (q_frames, i_frames) = self._frame_plan(t_values, q_values, i_values)
+        self.frame_interval = interval
+        t_full = np.asarray(t_values, dtype=float)
+        q_full = np.asarray(q_values, dtype=float)
+        i_full = np.asarray(i_values, dtype=float)
 
         # Схема цепи
         ax1.set_xlim(-1, 3)
@@ -128,15 +190,21 @@ class PhysicsVisualizer:
         ax1.axis('off')
 
         # Графики
+        ax2.set_xlim(t_full[0], t_full[-1])
+        ax2.set_ylim(*self._padded_limits(q_full))
         ax2.set_title('Заряд конденсатора')
         ax2.set_xlabel('Время')
         ax2.set_ylabel('Заряд q(t)')
         ax2.grid(True, alpha=0.3)
+        self._draw_overview(ax2, t_full, q_full, 'b-')
 
+        ax3.set_xlim(t_full[0], t_full[-1])
+        ax3.set_ylim(*self._padded_limits(i_full))
         ax3.set_title('Ток в цепи')
         ax3.set_xlabel('Время')
         ax3.set_ylabel('Ток I(t)')
         ax3.grid(True, alpha=0.3)
+        self._draw_overview(ax3, t_full, i_full, 'g-')
 
         # Рисуем схему цепи
         self._draw_circuit(ax1)
@@ -145,17 +213,16 @@ class PhysicsVisualizer:
         charge_line, = ax2.plot([], [], 'b-', linewidth=2)
         current_line, = ax3.plot([], [], 'g-', linewidth=2)
 
-        def animate(i):
-            idx = min(i, len(t_values) - 1)
-
-            charge_line.set_data(t_values[:idx], q_values[:idx])
-            current_line.set_data(t_values[:idx], i_values[:idx])
+        def animate(k):
+            trail = self._trail(k)
+            charge_line.set_data(t_frames[trail], q_frames[trail])
+            current_line.set_data(t_frames[trail], i_frames[trail])
 
             return charge_line, current_line
 
         self.animation = animation.FuncAnimation(
-            fig, animate, frames=len(t_values),
-            interval=50, blit=True, repeat=True
+            fig, animate, frames=len(t_frames),
+            interval=interval, blit=True, repeat=True
         )
 
         plt.tight_layout()
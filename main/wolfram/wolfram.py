@@ -1,12 +1,30 @@
 # wolfram.py
-from wolframclient.evaluation import WolframLanguageSession
+from wolframclient.evaluation import WolframLanguageSession, WolframEvaluatorPool
 from wolframclient.language import wl, wlexpr
+import asyncio
 import json
+import threading
+
+# Шаг выборки решения по умолчанию
+DEFAULT_STEP = 0.1
+# Точек в одной порции потокового решения
+CHUNK_POINTS = 1000
+# Установившийся режим: сколько сравнений подряд должны совпасть
+# и сколько периодов записывать после него по умолчанию
+STEADY_CONFIRM = 3
+STEADY_PERIODS = 10
+
+
+def wl_number(value):
+    """Число в синтаксисе Wolfram (1e-05 -> 1*^-05) без потери точности"""
+    return repr(float(value)).replace('e+', 'e').replace('e', '*^')
 
 
 class WolframSolver:
     def __init__(self):
         self.session = None
+        # Сессия ядра не потокобезопасна: одно вычисление за раз
+        self._lock = threading.Lock()
         self.connect_to_wolfram()
 
     def connect_to_wolfram(self):
@@ -18,56 +36,418 @@ class WolframSolver:
             print(f"Ошибка подключения к Wolfram: {e}")
             return False
 
-    def solve_second_order_ode(self, equation_str, initial_conditions, t_range=(0, 10)):
+    def solve_second_order_ode(self, equation_str, initial_conditions, t_range=(0, 10),
+                               time_limit=None, precision_goal=None,
+                               stop_after_periods=None, stop_amplitude=None,
+                               steady_tol=None, steady_period=None, steady_periods=STEADY_PERIODS,
+                               step=DEFAULT_STEP):
         """
         Решение ОДУ второго порядка
 
+        Возвращает таблицу 't_values', 'y_values', 'yp_values' с шагом step,
+        вычисленную по интерполяции самого NDSolve (точность интегратора),
+        узлы шагов интегратора: 'dense' = {'t', 'y', 'yp'} (по ним строится
+        плотное решение для увеличения, см. logic.dense_output) и
+        события, найденные интегратором (WhenEvent): 'events' =
+        {'zero_crossings': [t], 'maxima': [[t, y]], 'minima': [[t, y]],
+        'stop_time': t или None, 'steady_time': t или None, 'transient': длительность
+        переходного процесса или None}.
+
+        Установившийся режим (steady_tol) проверяется внутри интегрирования:
+        состояние сравнивается с предыдущим через период - стробоскопически
+        {y, y'} в моменты t_min + kT (steady_period = T, вынужденные колебания)
+        или {y, период} на максимумах (steady_period = None, автономные).
+        После STEADY_CONFIRM совпадений подряд интегрирование продолжается
+        еще steady_periods периодов и останавливается; возвращается только
+        окно установившегося режима.
+
         Args:
             equation_str: строка с уравнением
             initial_conditions: начальные условия [y0, y'0]
             t_range: диапазон времени (t_min, t_max)
+            time_limit: ограничение времени решения в секундах (TimeConstrained)
+            precision_goal: PrecisionGoal/AccuracyGoal для быстрых грубых решений
+            stop_after_periods: остановить после N периодов (по максимумам)
+            stop_amplitude: остановить на экстремуме с |y| < stop_amplitude
+            steady_tol: относительный допуск установившегося режима (None - не искать)
+            steady_period: период стробоскопических сравнений (период вынуждающей силы)
+            steady_periods: сколько периодов установившегося режима вернуть
+            step: шаг таблицы решения
         """
         try:
-            t_min, t_max = t_range
-            y0, yp0 = initial_conditions
+            wolfram_command, data_command = self._ode_commands(
+                equation_str, initial_conditions, t_range, time_limit, precision_goal,
+                stop_after_periods, stop_amplitude, steady_tol, steady_period, steady_periods, step
+            )
 
-            # Формируем команду для решения ОДУ
-            wolfram_command = f"""
-            solution = NDSolve[{{
-                {equation_str},
-                y[0] == {y0},
-                y'[0] == {yp0}
-            }}, y, {{t, {t_min}, {t_max}}}, Method -> "StiffnessSwitching"]
-            """
+            with self._lock:
+                # Выполняем вычисление
+                failed = self.session.evaluate(wlexpr(wolfram_command))
+                if failed is True:
+                    return {'success': False, 'error': f'Превышено время решения ({time_limit} с)'}
+
+                json_data = self.session.evaluate(wlexpr(data_command))
+            return self._ode_result(json_data, equation_str, t_range)
 
-            # Выполняем вычисление
-            result = self.session.evaluate(wlexpr(wolfram_command))
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
 
-            # Получаем данные для графика
-            data_command = """
-            data = Table[{{t, y[t] /. First[solution]}}, {t, """ + str(t_min) + """, """ + str(t_max) + """, 0.1}];
-            ExportString[data, "JSON"]
-            """
+    def _ode_commands(self, equation_str, initial_conditions, t_range, time_limit=None,
+                      precision_goal=None, stop_after_periods=None, stop_amplitude=None,
+                      steady_tol=None, steady_period=None, steady_periods=STEADY_PERIODS,
+                      step=DEFAULT_STEP):
+        """
+        Команды решения для solve_second_order_ode
 
-            json_data = self.session.evaluate(wlexpr(data_command))
-            data_points = json.loads(json_data)
+        Returns:
+            (команда NDSolve -> True при превышении времени, команда выгрузки JSON)
+        """
+        t_min, t_max = t_range
+        y0, yp0 = initial_conditions
 
-            # Извлекаем t и y
-            t_values = [point[0][0] for point in data_points]
-            y_values = [point[0][1] for point in data_points]
+        options = 'Method -> "StiffnessSwitching"'
+        if precision_goal is not None:
+            options += f", PrecisionGoal -> {precision_goal}, AccuracyGoal -> {precision_goal}"
 
-            return {
+        events = self._events(t_min, stop_after_periods, stop_amplitude,
+                              steady_tol, steady_period, steady_periods)
+
+        ndsolve = f"""Module[{{maxima = 0, state, previous = None, last = {t_min}, hits = 0, steady = None, kept = 0}},
+        Reap[NDSolve[{{
+            {equation_str},
+            y[0] == {wl_number(y0)},
+            y'[0] == {wl_number(yp0)},
+            {events}
+        }}, y, {{t, {t_min}, {t_max}}}, {options}], {{"zero", "max", "min", "steady"}}]]"""
+        if time_limit is not None:
+            ndsolve = f"TimeConstrained[{ndsolve}, {time_limit}, {{$Failed, {{}}}}]"
+
+        # Формируем команду для решения ОДУ
+        wolfram_command = f"{{solution, events}} = {ndsolve}; solution === $Failed"
+
+        # Узлы сетки интегратора со значениями y и y', таблица с шагом step
+        # (tableStart + k*step до конца решения), затем события;
+        # при найденном установившемся режиме - только узлы и таблица после него
+        data_command = f"""
+        f = y /. First[solution];
+        grid = Flatten[f["Grid"]];
+        steadyTime = Join @@ events[[4]];
+        tableStart = If[steadyTime =!= {{}}, First[steadyTime], {wl_number(t_min)}];
+        If[steadyTime =!= {{}}, grid = Prepend[Select[grid, # > tableStart &], tableStart]];
+        table = Table[tableStart + k*{wl_number(step)}, {{k, 0, Floor[(Last[grid] - tableStart)/{wl_number(step)} + 10^-9]}}];
+        ExportString[Join[{{grid, Map[f, grid], Map[f', grid], table, Map[f, table], Map[f', table]}},
+            Map[Join @@ # &, events]], "JSON"]
+        """
+
+        return wolfram_command, data_command
+
+    @staticmethod
+    def _ode_result(json_data, equation_str, t_range):
+        """Результат solve_second_order_ode из JSON команды выгрузки"""
+        t_min, t_max = t_range
+        grid, y_grid, yp_grid, t_values, y_values, yp_values, zeros, maxima, minima, steady = json.loads(json_data)
+
+        # Интегрирование закончилось раньше t_max - сработало условие остановки
+        stopped = grid and grid[-1] < t_max - 1e-9 * max(1.0, abs(t_max))
+
+        return {
+            'success': True,
+            't_values': t_values,
+            'y_values': y_values,
+            'yp_values': yp_values,
+            'dense': {'t': grid, 'y': y_grid, 'yp': yp_grid},
+            'events': {
+                'zero_crossings': zeros,
+                'maxima': maxima,
+                'minima': minima,
+                'stop_time': grid[-1] if stopped else None,
+                'steady_time': steady[0] if steady else None,
+                'transient': steady[0] - t_min if steady else None
+            },
+            'equation': equation_str
+        }
+
+    @classmethod
+    def _events(cls, t_min, stop_after_periods=None, stop_amplitude=None,
+                steady_tol=None, steady_period=None, steady_periods=STEADY_PERIODS):
+        """
+        WhenEvent событий и условий остановки (переменные Module: maxima и
+        переменные _steady_event); найденное выдается через Sow с тегами
+        "zero", "max", "min", "steady"
+        """
+        # Условия остановки проверяются на каждом экстремуме
+        stop_conditions = []
+        if stop_after_periods is not None:
+            stop_conditions.append(f"maxima > {int(stop_after_periods)}")
+        if stop_amplitude is not None:
+            stop_conditions.append(f"Abs[y[t]] < {wl_number(stop_amplitude)}")
+        stop = f'; If[{" || ".join(stop_conditions)}, "StopIntegration"]' if stop_conditions else ''
+
+        # События: нули y, максимумы (y' становится < 0) и минимумы (y' > 0)
+        events = f"""WhenEvent[y[t] == 0, Sow[t, "zero"]],
+            WhenEvent[y'[t] < 0, (maxima++; Sow[{{t, y[t]}}, "max"]{stop})],
+            WhenEvent[y'[t] > 0, (Sow[{{t, y[t]}}, "min"]{stop})]"""
+        if steady_tol is not None:
+            events += ",\n            " + cls._steady_event(
+                t_min, steady_tol, steady_period, steady_periods)
+        return events
+
+    @staticmethod
+    def _steady_event(t_min, tol, period, periods):
+        """
+        WhenEvent поиска установившегося режима (переменные Module в solve_second_order_ode)
+
+        Состояние через период сравнивается с предыдущим; после STEADY_CONFIRM
+        совпадений подряд момент записывается (Sow[t, "steady"]), затем
+        через periods периодов интегрирование останавливается.
+        """
+        if period is not None:
+            # Стробоскопически: {y, y'} в моменты t_min + kT
+            condition = f"Mod[t - {t_min}, {wl_number(period)}] == 0"
+            state = "state = {y[t], y'[t]}"
+        else:
+            # От периода к периоду: {y, период} на максимумах
+            condition = "y'[t] < 0"
+            state = "state = {y[t], t - last}; last = t"
+
+        return f"""WhenEvent[{condition}, ({state};
+                    If[steady === None,
+                        hits = If[previous =!= None && Norm[state - previous] < {wl_number(tol)}*Max[1, Norm[state]], hits + 1, 0];
+                        previous = state;
+                        If[hits >= {STEADY_CONFIRM}, steady = t; Sow[t, "steady"]],
+                        kept++];
+                    If[steady =!= None && kept >= {int(periods)}, "StopIntegration"])]"""
+
+    def solve_chunks(self, equation_str, initial_conditions, t_range=(0, 10),
+                     step=DEFAULT_STEP, chunk_points=CHUNK_POINTS, time_limit=None,
+                     stop_after_periods=None, stop_amplitude=None,
+                     steady_tol=None, steady_period=None, steady_periods=STEADY_PERIODS):
+        """
+        Потоковое решение ОДУ второго порядка порциями по chunk_points точек
+
+        Каждая порция - отдельный NDSolve на своем отрезке времени,
+        начальные условия берутся из конца предыдущей. Сетка точек та же,
+        что у таблиц ODELogic.compute_solution; ядро занято только на время порции.
+        Закрытие генератора между порциями прекращает решение.
+
+        События (нули, экстремумы), условия остановки и поиск установившегося
+        режима - те же WhenEvent, что у solve_second_order_ode; состояние
+        событий (счетчик максимумов, сравнения состояний) передается из
+        порции в порцию. Порции до установившегося режима уже выданы,
+        поэтому окно режима выбирает потребитель по 'steady_time'.
+
+        Args:
+            time_limit: ограничение времени одной порции в секундах (TimeConstrained)
+            stop_after_periods, stop_amplitude: условия остановки (см. solve_second_order_ode)
+            steady_tol, steady_period, steady_periods: установившийся режим (см. solve_second_order_ode)
+
+        Yields:
+            {'success': True, 't_values', 'y_values', 'yp_values', 'events', 'progress', 'done'}
+            или {'success': False, 'error', 'timeout'?} (после ошибки генератор завершается);
+            'events' порции - {'zero_crossings', 'maxima', 'minima'}, у последней
+            порции еще 'stop_time', 'steady_time' и 'transient' (как у solve_second_order_ode)
+        """
+        t_min, t_max = t_range
+        y0, yp0 = initial_conditions
+        # Индексы точек сетки t_min + k*step, k = 0..last
+        last = int((t_max - t_min) / step + 1e-9)
+        events = self._events(t_min, stop_after_periods, stop_amplitude,
+                              steady_tol, steady_period, steady_periods)
+        # Переменные Module событий, переходящие из порции в порцию
+        state = {'maxima': 0}
+        if steady_tol is not None:
+            state.update(previous=None, last=float(t_min), hits=0, steady=None, kept=0)
+
+        start = 0
+        initial = f"y[0] == {wl_number(y0)}, y'[0] == {wl_number(yp0)}"
+        while True:
+            end = min(start + chunk_points, last)
+            t_start = t_min + start * step
+            t_end = t_min + end * step
+            # Первая точка порции совпадает с последней точкой предыдущей
+            first = start if start == 0 else start + 1
+
+            ndsolve = f"""Reap[NDSolve[{{
+                {equation_str},
+                {initial},
+                {events}
+            }}, y, {{t, {wl_number(t_start)}, {wl_number(t_end)}}}, Method -> "StiffnessSwitching"],
+            {{"zero", "max", "min", "steady"}}]"""
+            if time_limit is not None:
+                ndsolve = f"TimeConstrained[{ndsolve}, {wl_number(time_limit)}, {{$Failed, {{}}}}]"
+
+            # Таблица - до конца решения (условие остановки могло прервать порцию)
+            variables = ", ".join(f"{name} = {self._wl_value(value)}" for name, value in state.items())
+            exported = ", ".join(f"Replace[{name}, None -> Null]" for name in state)
+            command = f"""Module[{{{variables}, state, solution, reaped, f, tEnd}},
+            {{solution, reaped}} = {ndsolve};
+            If[solution === $Failed, False,
+            f = y /. First[solution];
+            tEnd = f["Domain"][[1, 2]];
+            ExportString[{{
+                Table[With[{{tk = {wl_number(t_min)} + k*{wl_number(step)}}}, {{tk, f[tk], f'[tk]}}],
+                    {{k, {first}, Min[{end}, Floor[(tEnd - {wl_number(t_min)})/{wl_number(step)} + 10^-9]]}}],
+                Map[Join @@ # &, reaped], tEnd, {{{exported}}}}}, "JSON"]]]"""
+
+            try:
+                with self._lock:
+                    json_data = self.session.evaluate(wlexpr(command))
+                if json_data is False:
+                    yield {'success': False, 'error': f'Превышено время решения ({time_limit} с)',
+                           'timeout': True}
+                    return
+                data_points, (zeros, maxima, minima, _), t_reached, values = json.loads(json_data)
+            except Exception as e:
+                yield {'success': False, 'error': str(e)}
+                return
+
+            state = dict(zip(state, values))
+            # Решение порции закончилось раньше ее конца - сработало условие остановки
+            stopped = t_reached < t_end - 1e-9 * max(1.0, abs(t_end))
+            done = stopped or end >= last
+            chunk_events = {'zero_crossings': zeros, 'maxima': maxima, 'minima': minima}
+            if done:
+                steady = state.get('steady')
+                chunk_events.update(stop_time=t_reached if stopped else None, steady_time=steady,
+                                    transient=None if steady is None else steady - t_min)
+            yield {
                 'success': True,
-                't_values': t_values,
-                'y_values': y_values,
-                'equation': equation_str
+                't_values': [point[0] for point in data_points],
+                'y_values': [point[1] for point in data_points],
+                'yp_values': [point[2] for point in data_points],
+                'events': chunk_events,
+                'progress': 1.0 if done else end / last,
+                'done': done
             }
+            if done:
+                return
 
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            _, y_end, yp_end = data_points[-1]
+            t_end = wl_number(t_end)
+            initial = f"y[{t_end}] == {wl_number(y_end)}, y'[{t_end}] == {wl_number(yp_end)}"
+            start = end
+
+    @staticmethod
+    def _wl_value(value):
+        """Значение переменной Module в синтаксисе Wolfram (None, число, список чисел)"""
+        if value is None:
+            return "None"
+        if isinstance(value, list):
+            return "{" + ", ".join(wl_number(v) for v in value) + "}"
+        if isinstance(value, int):
+            return str(value)
+        return wl_number(value)
+
+    def solve_batch(self, equation_strs, initial_conditions, t_range=(0, 10),
+                    step=DEFAULT_STEP, max_kernels=4, on_result=None):
+        """
+        Решение набора уравнений пулом ядер (WolframEvaluatorPool)
+
+        Args:
+            equation_strs: список уравнений
+            on_result: функция (индекс, результат), вызывается по мере готовности
+
+        Returns:
+            список результатов в порядке equation_strs
+        """
+        results = []
+        self.solve_batches([equation_strs], initial_conditions, t_range, step, max_kernels,
+                           on_result=on_result, on_batch=lambda number, batch: results.extend(batch))
+        return results
+
+    def solve_batches(self, batches, initial_conditions, t_range=(0, 10),
+                      step=DEFAULT_STEP, max_kernels=4, on_result=None, on_batch=None):
+        """
+        Решение порций уравнений одним пулом ядер на все порции
+
+        Запуск ядер дороже решения порции, поэтому пул открывается один раз.
+
+        Args:
+            batches: итерируемое порций (списков уравнений); генератор может
+                прекратить расчет, перестав выдавать порции
+            on_result: функция (индекс в порции, результат), по мере готовности
+            on_batch: функция (номер порции, результаты в порядке порции)
+        """
+        t_min, t_max = t_range
+        y0, yp0 = initial_conditions
+
+        def expression(equation_str):
+            return f"""Module[{{solution = NDSolve[{{
+                {equation_str},
+                y[0] == {wl_number(y0)},
+                y'[0] == {wl_number(yp0)}
+            }}, y, {{t, {t_min}, {t_max}}}, Method -> "StiffnessSwitching"]}},
+            ExportString[Table[{{t, y[t], y'[t]}} /. First[solution], {{t, {t_min}, {t_max}, {wl_number(step)}}}], "JSON"]]"""
+
+        async def evaluate_all():
+            async with WolframEvaluatorPool(poolsize=max_kernels) as pool:
+                async def one(index, equation_str):
+                    try:
+                        data_points = json.loads(await pool.evaluate(wlexpr(expression(equation_str))))
+                        return index, {
+                            'success': True,
+                            't_values': [point[0] for point in data_points],
+                            'y_values': [point[1] for point in data_points],
+                            'yp_values': [point[2] for point in data_points],
+                            'equation': equation_str
+                        }
+                    except Exception as e:
+                        return index, {'success': False, 'error': str(e)}
+
+                for number, equation_strs in enumerate(batches):
+                    results = [None] * len(equation_strs)
+                    tasks = [one(i, eq) for i, eq in enumerate(equation_strs)]
+                    for finished in asyncio.as_completed(tasks):
+                        index, result = await finished
+                        results[index] = result
+                        if on_result:
+                            on_result(index, result)
+                    if on_batch:
+                        on_batch(number, results)
+
+        asyncio.run(evaluate_all())
+
+    def solve_chains(self, chains, max_kernels=2):
+        """
+        Параллельные цепочки решений пулом ядер (WolframEvaluatorPool)
+
+        Цепочка - генератор: выдает аргументы solve_second_order_ode
+        (словарь с 'equation_str', 'initial_conditions', 't_range' и
+        настройками) и получает через send() результат в том же виде.
+        Запросы одной цепочки идут последовательно (следующий может
+        зависеть от предыдущего результата), разные цепочки - одновременно
+        на разных ядрах.
+        """
+        async def evaluate_all():
+            async with WolframEvaluatorPool(poolsize=max_kernels) as pool:
+                async def run(chain):
+                    try:
+                        request = next(chain)
+                    except StopIteration:
+                        return
+                    while True:
+                        try:
+                            wolfram_command, data_command = self._ode_commands(**request)
+                            json_data = await pool.evaluate(wlexpr(
+                                f'If[{wolfram_command}, "null", {data_command}]'))
+                            if json.loads(json_data) is None:
+                                result = {'success': False,
+                                          'error': f"Превышено время решения ({request.get('time_limit')} с)"}
+                            else:
+                                result = self._ode_result(json_data, request['equation_str'], request['t_range'])
+                        except Exception as e:
+                            result = {'success': False, 'error': str(e)}
+                        try:
+                            request = chain.send(result)
+                        except StopIteration:
+                            return
+
+                await asyncio.gather(*(run(chain) for chain in chains))
+
+        asyncio.run(evaluate_all())
 
     def solve_system(self, equations, initial_conditions, t_range=(0, 10)):
         """
@@ -86,7 +466,8 @@ class WolframSolver:
                 {ic_system}
             }}, {{{', '.join(['y', 'x'][:len(equations)])}}}, {{t, {t_min}, {t_max}}}]"""
 
-            result = self.session.evaluate(wlexpr(wolfram_command))
+            with self._lock:
+                result = self.session.evaluate(wlexpr(wolfram_command))
 
             return {'success': True, 'result': str(result)}
 